@@ -0,0 +1,85 @@
+import os
+from typing import AsyncIterable, Dict, Iterable, Optional
+import httpx
+from image_result import ImageResult, dimensions, sniff
+from job_store import JobStore, JobStoreError
+
+
+class ArtifactStore:
+    """
+    Generated files kept as PocketBase file-field records (the `artifacts`
+    collection by default) instead of base64 inside the job result.
+
+    Each upload is streamed straight into a multipart request, so a file is
+    never held in memory in full. The job result references the stored file
+    by key (`<record id>/<stored filename>`) and by its public URL.
+    """
+
+    def __init__(self, store: JobStore, collection: Optional[str] = None, public_url: Optional[str] = None):
+        self.store = store
+        self.collection = collection or os.getenv("ARTIFACT_COLLECTION", "artifacts")
+        # Base URL clients load files from (PocketBase behind a CDN or proxy)
+        self.public_url = (public_url or os.getenv("PB_PUBLIC_URL") or store.pb_url).rstrip('/')
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/api/files/{self.collection}/{key}"
+
+    async def exists(self, key: str) -> bool:
+        """Whether the record behind a stored key is still there"""
+        try:
+            await self.store.get_record(self.collection, key.split('/')[0])
+            return True
+        except JobStoreError as e:
+            if e.status == 404:
+                return False
+            raise
+
+    async def put(self, job_id: str, filename: str, content_type: str,
+                  chunks: AsyncIterable[bytes], length: Optional[int] = None) -> Dict:
+        record = await self.store.create_record_with_file(
+            self.collection, {"job": job_id, "content_type": content_type},
+            "file", filename, content_type, chunks, length
+        )
+        key = f"{record['id']}/{record['file']}"
+        return {"key": key, "url": self.url(key)}
+
+    async def put_image(self, job_id: str, filename: str, image: ImageResult) -> Dict:
+        """Store an image already in hand, decoding base64 a chunk at a time."""
+        return await self.put(job_id, filename, image.content_type,
+                              _aiter(image.iter_bytes()), image.byte_length())
+
+    async def put_url(self, job_id: str, stem: str, url: str, timeout: float = 60) -> Dict:
+        """
+        Stream an image from a provider URL into the store. The first chunk is
+        sniffed before anything is uploaded; raises ValueError if it is not an
+        image. Returns the stored key/url plus content_type, extension and size.
+        """
+        async with httpx.AsyncClient(timeout=timeout) as http:
+            async with http.stream("GET", url) as response:
+                response.raise_for_status()
+                chunks = response.aiter_bytes()
+                first = b""
+                async for chunk in chunks:
+                    first += chunk
+                    if len(first) >= 24:
+                        break
+                kind = sniff(first)
+                if kind is None:
+                    raise ValueError(f"Not an image (starts with {first[:8]!r})")
+                content_type, extension = kind
+                length = response.headers.get("Content-Length")
+
+                async def body():
+                    yield first
+                    async for chunk in chunks:
+                        yield chunk
+
+                stored = await self.put(job_id, f"{stem}.{extension}", content_type, body(),
+                                        int(length) if length and not response.headers.get("Content-Encoding") else None)
+        stored.update({"content_type": content_type, "extension": extension, "size": dimensions(first)})
+        return stored
+
+
+async def _aiter(chunks: Iterable[bytes]):
+    for chunk in chunks:
+        yield chunk
@@ -3,29 +3,70 @@ import os
 import socket
 import time
 import traceback
-import requests
+import uuid
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional
-from datetime import datetime
-from pocketbase import PocketBase
+import random
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from job_store import JobStore, JobStoreError
+from realtime import RealtimeSubscription
 
 load_dotenv()
 
+# Collection with a UNIQUE index on (job, attempt); see scripts/setup_job_claims.py
+CLAIMS_COLLECTION = "job_claims"
+# Fields the same script adds to jobs; claiming, leases and cancellation rely on them
+JOB_LEASE_FIELDS = ("lease_token", "attempt", "lease_expires_at",
+                    "external_job_id", "external_endpoint_id", "cancel_requested")
+
+def pb_timestamp(seconds_from_now: float = 0) -> str:
+    """UTC timestamp in PocketBase's sortable date format."""
+    ts = datetime.utcnow() + timedelta(seconds=seconds_from_now)
+    return ts.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3] + 'Z'
+
 class BaseWorker(ABC):
     def __init__(self, 
                  task_types: List[str], 
                  max_concurrent_tasks: int = 5, 
-                 poll_interval: int = 5):
-        self.worker_id = f"worker-{socket.gethostname()}-{os.getpid()}"
+                 poll_interval: int = 5,
+                 claim_batch_size: Optional[int] = None,
+                 intake_mode: Optional[str] = None):
+        # Stable across restarts of the same machine, so a restarted worker can
+        # adopt the jobs its previous incarnation was running
+        self.worker_id = os.getenv("WORKER_ID") or f"worker-{socket.gethostname()}-{os.getpid()}"
         self.task_types = task_types
         self.max_concurrent_tasks = max_concurrent_tasks
         self.poll_interval = poll_interval
+        # How many queued jobs to claim per round-trip (1 = legacy single-claim mode)
+        self.claim_batch_size = max(1, claim_batch_size or max_concurrent_tasks)
         self.running = False
+        self._prepared = False
+
+        # Job intake: 'realtime' wakes the claim loop on PocketBase create events
+        # and falls back to polling while the subscription is down; 'poll' only polls.
+        self.intake_mode = intake_mode or os.getenv("WORKER_INTAKE_MODE", "realtime")
+        # Safety-net poll while realtime is connected (catches missed events)
+        self.realtime_poll_interval = int(os.getenv("WORKER_REALTIME_POLL_INTERVAL", "30"))
+        self.realtime_connected = False
+        self._wake = None
+        self._realtime_task = None
+        # Slot scheduler: running process_safe_task -> the task dict it owns
+        self._in_flight: Dict[asyncio.Task, Dict] = {}
+
+        # Leases: claimed jobs expire unless the owner heartbeats them; any
+        # worker's reaper requeues expired ones (failing them after max attempts)
+        self.lease_ttl = int(os.getenv("WORKER_LEASE_TTL", "60"))
+        self.reaper_interval = int(os.getenv("WORKER_REAPER_INTERVAL", "30"))
+        self.max_attempts = int(os.getenv("WORKER_MAX_ATTEMPTS", "3"))
+        self._background = []
+        # On shutdown, in-flight jobs get this long to finish before they are
+        # cancelled and requeued (keep it under the platform's kill timeout)
+        self.shutdown_grace = float(os.getenv("WORKER_SHUTDOWN_GRACE", "3"))
         
         # Init PocketBase
         self.pb_url = os.getenv("PB_URL", "https://uncensored-engine-db.fly.dev") 
-        self.pb = PocketBase(self.pb_url)
+        self.store = JobStore(self.pb_url)
         
         # Authenticate as Admin (needed to process jobs)
         self.admin_email = os.getenv("PB_ADMIN_EMAIL", "admin@example.com")
@@ -34,104 +75,500 @@ class BaseWorker(ABC):
         print(f"🤖 Worker initialized: {self.worker_id}")
         print(f"   Task types: {', '.join(self.task_types)}")
         print(f"   DB: {self.pb_url}")
+        print(f"   Intake: {self.intake_mode}")
 
     async def _authenticate(self):
         try:
-            # Use direct HTTP request to avoid SDK issues
-            auth_url = f"{self.pb_url}/api/admins/auth-with-password"
-            response = requests.post(auth_url, json={
-                "identity": self.admin_email,
-                "password": self.admin_pass
-            })
-            response.raise_for_status()
-            auth_data = response.json()
-
-            # Set the auth token manually
-            self.pb.auth_store.save(auth_data.get('token'), auth_data.get('admin'))
+            await self.store.authenticate(self.admin_email, self.admin_pass)
             print("✅ PocketBase Admin Auth Success")
         except Exception as e:
             print(f"⚠️ Auth failed: {e}")
 
+    async def _check_schema(self):
+        """
+        Refuse to start unless the claims collection and the lease fields on
+        jobs exist. PocketBase drops unknown fields on write, so without them
+        jobs would be claimed twice and cancel requests never seen.
+        """
+        missing = []
+        try:
+            await self.store.get_collection(CLAIMS_COLLECTION)
+            jobs = await self.store.get_collection('jobs')
+        except JobStoreError as e:
+            if e.status in (401, 403):
+                print(f"⚠️ Can't verify the PocketBase schema without admin auth: {e}")
+                return
+            if e.status != 404:
+                raise
+            missing.append(f"collection '{CLAIMS_COLLECTION}'")
+            jobs = await self.store.get_collection('jobs')
+        fields = {f.get('name') for f in jobs.get('schema') or jobs.get('fields') or []}
+        missing += [f"jobs.{name}" for name in JOB_LEASE_FIELDS if name not in fields]
+        if missing:
+            raise RuntimeError(f"PocketBase schema is missing {', '.join(missing)}; "
+                               f"run `python scripts/setup_job_claims.py` first")
+
+    async def prepare(self):
+        """
+        Authenticate and check the PocketBase schema; raises if the schema
+        is incomplete. start() calls this unless the host already did, e.g.
+        to fail its own startup rather than a background task.
+        """
+        await self._authenticate()
+        await self._check_schema()
+        self._prepared = True
+
     async def start(self):
         """
-        Start the worker polling loop.
+        Start the worker loop.
+
+        Keeps up to max_concurrent_tasks jobs in flight: whenever a slot frees
+        up the loop claims just enough jobs to refill it, so a long job never
+        blocks intake for the rest.
         """
         self.running = True
         print(f"▶️  Worker started: {self.worker_id}")
-        await self._authenticate()
+        if not self._prepared:
+            await self.prepare()
+
+        self._wake = asyncio.Event()
+        if self.intake_mode == 'realtime':
+            self._realtime_task = asyncio.create_task(self._run_realtime())
+        self._background = [
+            asyncio.create_task(self._run_heartbeats()),
+            asyncio.create_task(self._run_reaper())
+        ] + [asyncio.create_task(job) for job in self.background_jobs()]
+
+        await self.recover_tasks()
 
         while self.running:
             try:
+                free_slots = self.max_concurrent_tasks - len(self._in_flight)
+                if free_slots <= 0:
+                    # Woken by a slot finishing (or by stop())
+                    await self._wake.wait()
+                    self._wake.clear()
+                    continue
+
                 # Claim tasks
-                tasks = await self.claim_tasks()
+                tasks = await self.claim_tasks(limit=free_slots)
 
                 if not tasks:
-                    await asyncio.sleep(self.poll_interval)
+                    await self._wait_for_work()
                     continue
 
-                print(f"📋 Claimed {len(tasks)} task(s)")
+                print(f"📋 Claimed {len(tasks)} task(s) ({len(self._in_flight) + len(tasks)}/{self.max_concurrent_tasks} slots busy)")
 
-                # Process tasks concurrently
-                await asyncio.gather(*[self.process_safe_task(task) for task in tasks])
+                for task in tasks:
+                    self._launch(task)
 
             except Exception as e:
                 print(f"❌ Worker loop error: {e}")
                 await asyncio.sleep(10)
 
+        if self._in_flight:
+            print(f"⏳ Waiting up to {self.shutdown_grace:g}s for {len(self._in_flight)} in-flight task(s)")
+            _, pending = await asyncio.wait(list(self._in_flight), timeout=self.shutdown_grace)
+            for slot in pending:
+                self._cancel_slot(slot, 'shutdown')
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        await self.shutdown()
+
+    def background_jobs(self) -> List[Any]:
+        """
+        Extra long-running coroutines to run next to the claim loop; cancelled on stop().
+        """
+        return []
+
+    async def shutdown(self):
+        """
+        Release connections once the loop has drained. Subclasses close their own clients here.
+        """
+        await self.store.close()
+
+    def _launch(self, task: Dict):
+        """
+        Run a claimed task in its own slot.
+        """
+        slot = asyncio.create_task(self.process_safe_task(task))
+        self._in_flight[slot] = task
+        slot.add_done_callback(self._release_slot)
+
+    def _release_slot(self, slot: asyncio.Task):
+        self._in_flight.pop(slot, None)
+        # Refill the freed slot right away instead of waiting out the idle timer
+        if self._wake:
+            self._wake.set()
+
+    def _cancel_slot(self, slot: asyncio.Task, reason: str):
+        """
+        Cancel an in-flight task. `reason` ('user', 'shutdown' or 'lease_lost')
+        decides what happens to the job record; see _on_task_cancelled.
+        """
+        task = self._in_flight.get(slot)
+        if task is None or slot.done():
+            return
+        task.setdefault('cancel_reason', reason)
+        slot.cancel()
+
     def stop(self):
         """
         Stop the worker.
         """
         print(f"⏸  Stopping worker: {self.worker_id}")
         self.running = False
+        if self._realtime_task:
+            self._realtime_task.cancel()
+        for background_task in self._background:
+            background_task.cancel()
+        if self._wake:
+            self._wake.set()
 
-    async def claim_tasks(self) -> List[Dict]:
+    async def _wait_for_work(self):
         """
-        Poll for 'queued' jobs in PocketBase.
+        Idle until a realtime event signals new work or the poll interval elapses.
         """
+        timeout = self.realtime_poll_interval if self.realtime_connected else self.poll_interval
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    async def _run_realtime(self):
+        """
+        Keep a realtime subscription on the jobs collection, reconnecting with backoff.
+        """
+        backoff = 1
+        while self.running:
+            subscription = RealtimeSubscription(
+                self.pb_url,
+                ['jobs'],
+                on_event=self._on_realtime_event,
+                token_getter=lambda: self.store.token,
+                on_connect=self._on_realtime_connect
+            )
+            try:
+                await subscription.run()
+                print("⚠️ Realtime stream closed, polling until reconnected")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Realtime subscription dropped ({e}), polling until reconnected")
+                if getattr(getattr(e, 'response', None), 'status_code', None) in (401, 403):
+                    await self._authenticate()
+
+            if self.realtime_connected:
+                backoff = 1
+            self.realtime_connected = False
+
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+    def _on_realtime_connect(self):
+        print("📡 Realtime intake subscribed to jobs")
+        self.realtime_connected = True
+        # Catch anything queued while we were disconnected
+        self._wake.set()
+
+    def _on_realtime_event(self, topic: str, data: Dict):
+        record = data.get('record') or {}
+        if data.get('action') not in ('create', 'update'):
+            return
+        if record.get('status') == 'queued' and record.get('type') in self.task_types:
+            self._wake.set()
+        elif record.get('cancel_requested') and record.get('status') == 'processing':
+            for slot, task in list(self._in_flight.items()):
+                if task['id'] == record.get('id'):
+                    print(f"🛑 Cancellation requested for task {task['id']}")
+                    self._cancel_slot(slot, 'user')
+
+    async def recover_tasks(self):
+        """
+        Startup recovery pass.
+
+        Re-adopts jobs still marked as ours from before a restart (their
+        external_job_id lets process_task resume instead of resubmitting),
+        requeues anything other dead workers left behind and settles queued
+        jobs cancelled in the meantime.
+        """
+        try:
+            records = await self.store.list_records(
+                'jobs',
+                filter=f"status='processing' && worker_id='{self.worker_id}'",
+                sort="+created",
+                per_page=self.max_concurrent_tasks
+            )
+            for record in records:
+                task = self._record_to_task(record)
+                task['lease_token'] = record.get('lease_token')
+                await self.store.update_record('jobs', record['id'], {
+                    "lease_expires_at": pb_timestamp(self.lease_ttl)
+                })
+                print(f"♻️ Re-adopted job {record['id']}"
+                      f"{' (external ' + record['external_job_id'] + ')' if record.get('external_job_id') else ''}")
+                self._launch(task)
+
+            await self.reap_expired_leases()
+            await self.cancel_queued_jobs()
+        except Exception as e:
+            print(f"⚠️ Recovery pass failed: {e}")
+
+    async def record_external_job(self, task: Dict, external_job_id: str, endpoint_id: str):
+        """
+        Persist the provider-side job id on the job record so it survives a restart.
+        """
+        task['external_job_id'] = external_job_id
+        task['external_endpoint_id'] = endpoint_id
+        try:
+            await self.store.update_record('jobs', task['id'], {
+                "external_job_id": external_job_id,
+                "external_endpoint_id": endpoint_id
+            })
+        except Exception as e:
+            print(f"⚠️ Could not persist external job id for {task['id']}: {e}")
+
+    async def _run_heartbeats(self):
+        """
+        Extend the lease of every in-flight job; cancel any job whose lease we
+        lost or whose owner asked for it to be cancelled.
+        """
+        interval = max(1, self.lease_ttl // 3)
+        while self.running:
+            await asyncio.sleep(interval)
+            for slot, task in list(self._in_flight.items()):
+                if not task.get('lease_token') or slot.done():
+                    continue
+                try:
+                    record = await self.store.get_record('jobs', task['id'])
+                    if record.get('lease_token') != task['lease_token']:
+                        print(f"⚠️ Lease lost for task {task['id']}, cancelling")
+                        self._cancel_slot(slot, 'lease_lost')
+                        continue
+                    if record.get('cancel_requested'):
+                        print(f"🛑 Cancellation requested for task {task['id']}")
+                        self._cancel_slot(slot, 'user')
+                        continue
+                    await self.store.update_record('jobs', task['id'], {
+                        "lease_expires_at": pb_timestamp(self.lease_ttl)
+                    })
+                except Exception as e:
+                    print(f"⚠️ Heartbeat failed for task {task['id']}: {e}")
+
+    async def _run_reaper(self):
+        """
+        Periodically requeue 'processing' jobs whose lease has expired, and
+        cancel queued jobs whose owner asked for it.
+        """
+        while self.running:
+            # Jitter so replicas don't all reap at the same instant
+            await asyncio.sleep(self.reaper_interval * random.uniform(0.8, 1.2))
+            try:
+                await self.reap_expired_leases()
+                await self.cancel_queued_jobs()
+            except Exception as e:
+                print(f"⚠️ Reaper error: {e}")
+
+    async def reap_expired_leases(self) -> int:
+        """
+        Requeue jobs whose owner stopped heartbeating, or fail them once
+        max_attempts is reached. Returns how many jobs were reaped.
+        """
+        now = pb_timestamp()
+        expired = await self.store.list_records(
+            'jobs',
+            filter=f"status='processing' && lease_expires_at != '' && lease_expires_at < '{now}'",
+            sort="+lease_expires_at",
+            per_page=50
+        )
+
+        reaped = 0
+        for record in expired:
+            # Re-read right before writing: another reaper may have requeued it
+            # and a worker re-claimed it since the list call
+            current = await self.store.get_record('jobs', record['id'])
+            if (current.get('status') != 'processing'
+                    or current.get('lease_token') != record.get('lease_token')
+                    or (current.get('lease_expires_at') or '') >= now):
+                continue
+
+            attempt = (current.get('attempt') or 0) + 1
+            if attempt >= self.max_attempts:
+                await self.store.update_record('jobs', record['id'], {
+                    "status": "failed",
+                    "error": f"Worker lease expired {attempt} time(s); giving up",
+                    "lease_token": "",
+                    "completed_at": datetime.utcnow().isoformat()
+                })
+                print(f"💀 Job {record['id']} failed after {attempt} expired lease(s)")
+            else:
+                await self.store.update_record('jobs', record['id'], {
+                    "status": "queued",
+                    "attempt": attempt,
+                    "worker_id": "",
+                    "lease_token": "",
+                    "lease_expires_at": ""
+                })
+                print(f"♻️ Requeued job {record['id']} (attempt {attempt + 1}/{self.max_attempts})")
+            reaped += 1
+
+        return reaped
+
+    async def cancel_queued_jobs(self) -> int:
+        """
+        Settle queued jobs whose cancellation was requested before any worker
+        claimed them (claim_tasks skips those). Taking the attempt's claim
+        first keeps a worker from starting one mid-cancel; if a worker already
+        holds it, its heartbeat sees the request. Returns how many were cancelled.
+        """
+        records = await self.store.list_records(
+            'jobs',
+            filter="status='queued' && cancel_requested = true",
+            sort="+created",
+            per_page=50
+        )
+        cancelled = 0
+        for record in records:
+            if await self._claim_attempt(record, "", {
+                "status": "cancelled",
+                "error": "Cancelled by user",
+                "completed_at": datetime.utcnow().isoformat()
+            }):
+                print(f"🛑 Queued job {record['id']} cancelled")
+                cancelled += 1
+        return cancelled
+
+    async def claim_tasks(self, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Poll for 'queued' jobs in PocketBase and claim up to claim_batch_size of them
+        (or `limit`, when fewer slots are free).
+        """
+        batch_size = min(self.claim_batch_size, limit or self.claim_batch_size)
         try:
             # PocketBase filter syntax
             filter_parts = [f"type='{t}'" for t in self.task_types]
             type_filter = f"({' || '.join(filter_parts)})"
-            filter_str = f"status='queued' && {type_filter}"
-
-            records = self.pb.collection('jobs').get_list(
-                page=1,
-                per_page=5, 
-                query_params={
-                    "filter": filter_str,
-                    "sort": "+created"
-                }
+            filter_str = f"status='queued' && cancel_requested != true && {type_filter}"
+
+            records = await self.store.list_records(
+                'jobs',
+                filter=filter_str,
+                sort="+created",
+                per_page=batch_size
             )
             
-            if not records.items:
+            if not records:
                 return []
 
-            task_record = records.items[0]
-            
-            # Claim it
-            self.pb.collection('jobs').update(task_record.id, {
-                "status": "processing",
-                "worker_id": self.worker_id,
-                "started_at": datetime.utcnow().isoformat()
-            })
-            
-            # Return as dict
-            task_dict = {
-                'id': task_record.id,
-                'type': task_record.type,
-                'params': task_record.params,
-                'input': task_record.params, 
-                'status': 'processing',
-                'user_id': task_record.user_id
-            }
-            return [task_dict]
+            tasks = []
+            for task_record in records[:batch_size]:
+                # Claim it
+                try:
+                    lease_token = await self._acquire_claim(task_record)
+                except Exception as e:
+                    print(f"⚠️ Could not claim job {task_record['id']}: {e}")
+                    continue
+
+                if not lease_token:
+                    # Another worker won the race for this job
+                    continue
+
+                task = self._record_to_task(task_record)
+                task['lease_token'] = lease_token
+                tasks.append(task)
+
+            return tasks
             
         except Exception as e:
             print(f"⚠️ Error claiming tasks: {e}")
             traceback.print_exc()
             return []
 
+    async def _acquire_claim(self, task_record: Dict) -> Optional[str]:
+        """
+        Compare-and-set claim of a queued record.
+
+        Returns the lease token on success, None if another worker got there first.
+        """
+        lease_token = uuid.uuid4().hex
+        attempt = task_record.get('attempt') or 0
+        claimed = await self._claim_attempt(task_record, lease_token, {
+            "status": "processing",
+            "worker_id": self.worker_id,
+            "lease_token": lease_token,
+            "lease_expires_at": pb_timestamp(self.lease_ttl),
+            "attempt": attempt,
+            "started_at": datetime.utcnow().isoformat()
+        })
+        return lease_token if claimed else None
+
+    async def _claim_attempt(self, task_record: Dict, lease_token: str, fields: Dict) -> bool:
+        """
+        Take the job's current attempt, then write `fields` to the job record.
+
+        Inserting into the claims collection is the atomic step: its unique
+        (job, attempt) index lets exactly one caller through per attempt.
+        Returns False if someone else holds the attempt. If the job record
+        can't be updated afterwards, the claim row is deleted again so the
+        attempt stays claimable.
+        """
+        attempt = task_record.get('attempt') or 0
+        try:
+            claim = await self.store.create_record(CLAIMS_COLLECTION, {
+                "job": task_record['id'],
+                "attempt": attempt,
+                "worker_id": self.worker_id,
+                "lease_token": lease_token
+            })
+        except JobStoreError as e:
+            if e.status == 400 and self._is_duplicate_claim(e):
+                return False
+            raise
+
+        try:
+            await self.store.update_record('jobs', task_record['id'], fields)
+        except BaseException:
+            try:
+                await self.store.delete_record(CLAIMS_COLLECTION, claim['id'])
+            except Exception as e:
+                print(f"❌ Could not release claim on job {task_record['id']} (attempt {attempt}); "
+                      f"delete {CLAIMS_COLLECTION} record {claim['id']} to unblock it: {e}")
+            raise
+        return True
+
+    @staticmethod
+    def _is_duplicate_claim(error: JobStoreError) -> bool:
+        """True for the unique-index violation that means another worker holds this attempt."""
+        return any(isinstance(field, dict) and field.get('code') == 'validation_not_unique'
+                   for field in error.data.values())
+
+    async def _holds_lease(self, task: Dict) -> bool:
+        """
+        Check that the job record still carries the lease token we claimed it with.
+        """
+        lease_token = task.get('lease_token')
+        if not lease_token:
+            return True
+
+        record = await self.store.get_record('jobs', task['id'])
+        return record.get('lease_token') == lease_token
+
+    def _record_to_task(self, task_record: Dict) -> Dict:
+        """
+        Convert a claimed PocketBase record into the task dict handed to process_task.
+        """
+        return {
+            'id': task_record['id'],
+            'type': task_record.get('type'),
+            'params': task_record.get('params'),
+            'input': task_record.get('params'), 
+            'status': 'processing',
+            'user_id': task_record.get('user_id'),
+            'external_job_id': task_record.get('external_job_id') or None,
+            'external_endpoint_id': task_record.get('external_endpoint_id') or None
+        }
+
     async def process_safe_task(self, task: Dict):
         """
         Wrapper to process a task with error handling.
@@ -153,21 +590,70 @@ class BaseWorker(ABC):
             
             if not success and 'error' in result:
                 update_data["error"] = result['error']
+
+            if not await self._holds_lease(task):
+                print(f"⚠️ Lease lost for task {task_id}, discarding result")
+                return
             
-            self.pb.collection('jobs').update(task_id, update_data)
+            await self.store.update_record('jobs', task_id, update_data)
             print(f"✅ Task {task_id} finished")
 
+        except asyncio.CancelledError:
+            await self._on_task_cancelled(task)
+            raise
+
         except Exception as e:
             print(f"🔥 Task failed: {e}")
             traceback.print_exc()
             try:
-                self.pb.collection('jobs').update(task_id, {
+                if not await self._holds_lease(task):
+                    return
+                await self.store.update_record('jobs', task_id, {
                     "status": "failed",
                     "error": str(e)
                 })
             except:
                 pass
 
+    async def _on_task_cancelled(self, task: Dict):
+        """
+        Settle the job record of a cancelled task. process_task has already
+        cancelled any provider-side job on its way out.
+
+        - 'user': mark the job cancelled.
+        - 'shutdown': requeue it for another worker, as a fresh attempt.
+        - 'lease_lost': leave it alone; the record belongs to someone else now.
+        """
+        task_id = task.get('id')
+        reason = task.get('cancel_reason') or ('shutdown' if not self.running else 'lease_lost')
+        if reason == 'lease_lost':
+            return
+        try:
+            if not await self._holds_lease(task):
+                return
+            if reason == 'user':
+                await self.store.update_record('jobs', task_id, {
+                    "status": "cancelled",
+                    "error": "Cancelled by user",
+                    "lease_token": "",
+                    "completed_at": datetime.utcnow().isoformat()
+                })
+                print(f"🛑 Task {task_id} cancelled")
+            else:
+                record = await self.store.get_record('jobs', task_id)
+                await self.store.update_record('jobs', task_id, {
+                    "status": "queued",
+                    "attempt": (record.get('attempt') or 0) + 1,
+                    "worker_id": "",
+                    "lease_token": "",
+                    "lease_expires_at": "",
+                    "external_job_id": "",
+                    "external_endpoint_id": ""
+                })
+                print(f"♻️ Requeued task {task_id} on shutdown")
+        except Exception as e:
+            print(f"⚠️ Could not settle cancelled task {task_id}: {e}")
+
     @abstractmethod
     async def process_task(self, task: Dict) -> Dict:
         """
@@ -0,0 +1,91 @@
+import os
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    Error-rate / latency circuit breaker for one provider.
+
+    Looks at the last `window` calls. Once at least `min_calls` are in the
+    window, the breaker opens when the failure rate reaches `error_rate` or
+    the share of calls slower than `slow_seconds` reaches `slow_rate`.
+    An open breaker rejects calls for `cooldown` seconds, then lets a single
+    trial call through (half-open): success closes it, failure re-opens it.
+    """
+
+    def __init__(self, name: str,
+                 window: Optional[int] = None,
+                 min_calls: Optional[int] = None,
+                 error_rate: Optional[float] = None,
+                 slow_seconds: Optional[float] = None,
+                 slow_rate: Optional[float] = None,
+                 cooldown: Optional[float] = None):
+        self.name = name
+        self.window = window or int(os.getenv("BREAKER_WINDOW", "20"))
+        self.min_calls = min_calls or int(os.getenv("BREAKER_MIN_CALLS", "5"))
+        self.error_rate = error_rate or float(os.getenv("BREAKER_ERROR_RATE", "0.5"))
+        self.slow_seconds = slow_seconds or float(os.getenv("BREAKER_SLOW_SECONDS", "120"))
+        self.slow_rate = slow_rate or float(os.getenv("BREAKER_SLOW_RATE", "0.5"))
+        self.cooldown = cooldown or float(os.getenv("BREAKER_COOLDOWN", "60"))
+
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        # (succeeded, seconds) per call
+        self._calls: Deque[Tuple[bool, float]] = deque(maxlen=self.window)
+
+    def allow(self) -> bool:
+        """Whether a call may go to this provider right now."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+            self._trial_in_flight = False
+        if self.state == HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record(self, succeeded: bool, seconds: float):
+        if self.state == HALF_OPEN:
+            self._trial_in_flight = False
+            if succeeded and seconds < self.slow_seconds:
+                print(f"🟢 Circuit for {self.name} closed again")
+                self.state = CLOSED
+                self._calls.clear()
+            else:
+                self._open("trial call failed")
+            return
+
+        self._calls.append((succeeded, seconds))
+        if self.state != CLOSED or len(self._calls) < self.min_calls:
+            return
+        failures = sum(1 for ok, _ in self._calls if not ok)
+        slow = sum(1 for _, s in self._calls if s >= self.slow_seconds)
+        if failures / len(self._calls) >= self.error_rate:
+            self._open(f"{failures}/{len(self._calls)} calls failed")
+        elif slow / len(self._calls) >= self.slow_rate:
+            self._open(f"{slow}/{len(self._calls)} calls slower than {self.slow_seconds:g}s")
+
+    def abandon(self):
+        """A call allowed by allow() ended without a verdict (e.g. it was cancelled)."""
+        if self.state == HALF_OPEN:
+            self._trial_in_flight = False
+
+    def _open(self, reason: str):
+        print(f"🔴 Circuit for {self.name} open for {self.cooldown:g}s: {reason}")
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "calls": len(self._calls),
+            "failures": sum(1 for ok, _ in self._calls if not ok)
+        }
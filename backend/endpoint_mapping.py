@@ -0,0 +1,34 @@
+"""
+endpoints.json: model id -> the RunPod endpoint(s) that serve it.
+
+An entry is either one endpoint ({"endpoint_id": ..., "name": ...}) or a list
+of them (dicts or bare endpoint ID strings), e.g. the same model on different
+GPU types or regions. Everything that reads the file goes through here so
+both shapes keep working.
+"""
+import json
+from pathlib import Path
+
+ENDPOINTS_PATH = Path(__file__).parent / "endpoints.json"
+
+
+def load_endpoints(path=ENDPOINTS_PATH):
+    """The raw endpoints.json mapping ({} if the file doesn't exist)"""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def endpoint_ids(info):
+    """Every endpoint ID in one endpoints.json entry, in file order"""
+    entries = info if isinstance(info, list) else [info]
+    ids = (e if isinstance(e, str) else (e or {}).get('endpoint_id') for e in entries)
+    return [eid for eid in ids if eid]
+
+
+def endpoint_name(info):
+    """The first display name recorded in an entry, if any"""
+    entries = info if isinstance(info, list) else [info]
+    return next((e['name'] for e in entries if isinstance(e, dict) and e.get('name')), None)
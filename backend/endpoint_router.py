@@ -0,0 +1,110 @@
+import asyncio
+import os
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, List, Optional
+from runpod_health import EndpointHealthCache
+
+
+class EndpointRouter:
+    """
+    Picks, among the endpoints that serve a model, the one with the smallest
+    expected wait.
+
+    The estimate combines the cached /health counters (inQueue + inProgress
+    spread over the warm workers) with what this worker knows and RunPod
+    may not have reported yet: jobs we submitted after that health payload
+    was fetched, and our own in-flight count as a lower bound on the backlog.
+    An endpoint with no warm workers pays a cold-start penalty (halved if a
+    worker is already initializing). Job duration is a per-endpoint moving
+    average of our own completions, so a faster GPU type attracts more work.
+
+    choose() takes the chosen endpoint's slot (started()) before returning,
+    so a burst of jobs routed off the same health payload spreads out
+    instead of piling onto one endpoint. Give it back with finished() once
+    the job is done, or release() if it never ran.
+    """
+
+    def __init__(self, health: EndpointHealthCache,
+                 job_seconds: Optional[float] = None,
+                 cold_start_seconds: Optional[float] = None):
+        self.health = health
+        self.default_job_seconds = job_seconds or float(os.getenv("ROUTER_JOB_SECONDS", "20"))
+        self.cold_start_seconds = cold_start_seconds or float(os.getenv("ROUTER_COLD_START_SECONDS", "90"))
+        self.in_flight: Dict[str, int] = defaultdict(int)
+        self.job_seconds: Dict[str, float] = {}
+        self._submitted: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=500))
+
+    async def choose(self, endpoint_ids: List[str]) -> str:
+        if len(endpoint_ids) == 1:
+            self.started(endpoint_ids[0])
+            return endpoint_ids[0]
+        healths = await asyncio.gather(*[self.health.get(eid) for eid in endpoint_ids])
+        # No await from here on: the estimate and the reservation happen together
+        waits = {eid: self.expected_wait(eid, health) for eid, health in zip(endpoint_ids, healths)}
+        best = min(endpoint_ids, key=lambda eid: waits[eid])
+        self.started(best)
+        print(f"🧭 Routing to {best} ({', '.join(f'{eid}: ~{wait:.0f}s' for eid, wait in waits.items())})")
+        return best
+
+    def expected_wait(self, endpoint_id: str, health: Optional[Dict]) -> float:
+        jobs = (health or {}).get('jobs', {})
+        workers = (health or {}).get('workers', {})
+
+        fetched_at = self.health.fetched_at(endpoint_id)
+        unreported = sum(1 for t in self._submitted[endpoint_id] if fetched_at is None or t > fetched_at)
+        backlog = max(jobs.get('inQueue', 0) + jobs.get('inProgress', 0) + unreported,
+                      self.in_flight[endpoint_id])
+
+        warm = workers.get('idle', 0) + workers.get('running', 0)
+        per_job = self.job_seconds.get(endpoint_id, self.default_job_seconds)
+        # Jobs beyond the warm workers queue up; then ours runs for per_job
+        wait = max(0, backlog + 1 - warm) * per_job / max(warm, 1) + per_job
+        if warm == 0:
+            wait += self.cold_start_seconds / (2 if workers.get('initializing', 0) else 1)
+        return wait
+
+    def started(self, endpoint_id: str):
+        self.in_flight[endpoint_id] += 1
+        self._submitted[endpoint_id].append(time.monotonic())
+
+    def release(self, endpoint_id: str):
+        """Give back a slot whose job was never submitted (or rides along in another's)."""
+        self.in_flight[endpoint_id] = max(0, self.in_flight[endpoint_id] - 1)
+        if self._submitted[endpoint_id]:
+            self._submitted[endpoint_id].pop()
+
+    def finished(self, endpoint_id: str, seconds: Optional[float] = None):
+        self.in_flight[endpoint_id] = max(0, self.in_flight[endpoint_id] - 1)
+        if seconds is not None:
+            previous = self.job_seconds.get(endpoint_id, seconds)
+            self.job_seconds[endpoint_id] = 0.8 * previous + 0.2 * seconds
+
+
+class RouterSlot:
+    """
+    The router slot one generation holds, from routing until its job ends.
+    Whatever is still held on release() is given back without a duration
+    sample (the submit failed, or the generation rode along in a batch).
+    """
+
+    def __init__(self, router: EndpointRouter, endpoint_id: Optional[str]):
+        self.router = router
+        self.endpoint_id = endpoint_id
+
+    def move(self, endpoint_id: str):
+        """The job runs on another endpoint than the one routed to (e.g. a resumed job)."""
+        if endpoint_id != self.endpoint_id:
+            self.release()
+            self.router.started(endpoint_id)
+            self.endpoint_id = endpoint_id
+
+    def finish(self, seconds: Optional[float] = None):
+        if self.endpoint_id:
+            self.router.finished(self.endpoint_id, seconds)
+            self.endpoint_id = None
+
+    def release(self):
+        if self.endpoint_id:
+            self.router.release(self.endpoint_id)
+            self.endpoint_id = None
@@ -0,0 +1,63 @@
+import os
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional
+
+
+class LatencyTracker:
+    """Rolling per-key latency samples (e.g. RunPod seconds per model) with percentiles."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self.window))
+
+    def record(self, key: str, seconds: float):
+        self._samples[key].append(seconds)
+
+    def count(self, key: str) -> int:
+        return len(self._samples.get(key, ()))
+
+    def percentile(self, key: str, pct: float) -> Optional[float]:
+        samples = sorted(self._samples.get(key, ()))
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return samples[index]
+
+
+class HedgeBudget:
+    """
+    Sliding one-hour caps on how many hedge requests we pay for, globally
+    and per user. A cap of 0 means no limit for that scope.
+    """
+
+    def __init__(self, max_per_hour: Optional[int] = None, max_per_user_per_hour: Optional[int] = None):
+        self.max_per_hour = max_per_hour if max_per_hour is not None else int(os.getenv("HEDGE_MAX_PER_HOUR", "30"))
+        self.max_per_user_per_hour = (max_per_user_per_hour if max_per_user_per_hour is not None
+                                      else int(os.getenv("HEDGE_MAX_PER_USER_PER_HOUR", "5")))
+        self._global: Deque[float] = deque()
+        self._per_user: Dict[str, Deque[float]] = defaultdict(deque)
+
+    @staticmethod
+    def _trim(spent: Deque[float], now: float):
+        while spent and now - spent[0] >= 3600:
+            spent.popleft()
+
+    def try_spend(self, user_id: Optional[str]) -> bool:
+        """Reserve one hedge for this user if both caps allow it."""
+        now = time.monotonic()
+        self._trim(self._global, now)
+        if self.max_per_hour and len(self._global) >= self.max_per_hour:
+            return False
+        user = self._per_user[user_id or 'anonymous']
+        self._trim(user, now)
+        if self.max_per_user_per_hour and len(user) >= self.max_per_user_per_hour:
+            return False
+        self._global.append(now)
+        user.append(now)
+        return True
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        self._trim(self._global, now)
+        return {"hedges_last_hour": len(self._global), "max_per_hour": self.max_per_hour}
@@ -0,0 +1,143 @@
+import base64
+import binascii
+import struct
+from typing import Optional, Tuple
+
+# (magic bytes, content type, file extension)
+SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png", "png"),
+    (b"\xff\xd8\xff", "image/jpeg", "jpg"),
+    (b"GIF87a", "image/gif", "gif"),
+    (b"GIF89a", "image/gif", "gif"),
+]
+
+# Base64 characters decoded for sniffing: 32 chars -> 24 bytes, enough for
+# every signature above plus the PNG IHDR width/height
+HEADER_CHARS = 32
+
+
+def sniff(header: bytes) -> Optional[Tuple[str, str]]:
+    """(content_type, extension) from the first bytes of an image, or None."""
+    for magic, content_type, extension in SIGNATURES:
+        if header.startswith(magic):
+            return content_type, extension
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp", "webp"
+    return None
+
+
+def dimensions(header: bytes) -> Optional[Tuple[int, int]]:
+    """(width, height) for formats that keep it at a fixed offset (PNG, GIF)."""
+    if header.startswith(b"\x89PNG") and len(header) >= 24 and header[12:16] == b"IHDR":
+        return struct.unpack(">II", header[16:24])
+    if header.startswith(b"GIF") and len(header) >= 10:
+        return struct.unpack("<HH", header[6:10])
+    return None
+
+
+class ImageResult:
+    """
+    One generated image, kept in the form the provider delivered it.
+
+    A base64 payload (bare or as a data: URI) is validated by decoding only
+    its first and last few characters and sniffing the header; it is never
+    decoded in full unless raw bytes are asked for, and iter_bytes() decodes
+    it a chunk at a time for streaming uploads. A downloaded image stays as
+    bytes and is base64-encoded once, on the first data_uri() call.
+    """
+
+    def __init__(self, content_type: str, extension: str, size: Optional[Tuple[int, int]],
+                 b64: Optional[str] = None, data_uri: Optional[str] = None, raw: Optional[bytes] = None):
+        self.content_type = content_type
+        self.extension = extension
+        self.size = size
+        self._b64 = b64
+        self._data_uri = data_uri
+        self._raw = raw
+
+    @classmethod
+    def from_base64(cls, b64: str) -> "ImageResult":
+        return cls(*_check_base64(b64[:HEADER_CHARS], b64[-8:], len(b64)), b64=b64)
+
+    @classmethod
+    def from_data_uri(cls, uri: str) -> "ImageResult":
+        comma = uri.find(',')
+        if comma < 0 or not uri[:comma].endswith(';base64'):
+            raise ValueError(f"Not a base64 data URI: {uri[:50]}...")
+        # Only the head and tail are sliced out; the URI itself is reused as-is
+        head = uri[comma + 1:comma + 1 + HEADER_CHARS]
+        return cls(*_check_base64(head, uri[-8:], len(uri) - comma - 1), data_uri=uri)
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "ImageResult":
+        kind = sniff(raw[:16])
+        if kind is None:
+            raise ValueError(f"Not an image (starts with {raw[:8]!r})")
+        return cls(*kind, dimensions(raw[:24]), raw=raw)
+
+    def data_uri(self) -> str:
+        if self._data_uri is None:
+            b64 = self._b64 if self._b64 is not None else base64.b64encode(self._raw).decode('ascii')
+            self._data_uri = f"data:{self.content_type};base64,{b64}"
+            # The URI now holds the only copy we need
+            self._b64 = self._raw = None
+        return self._data_uri
+
+    def to_bytes(self) -> bytes:
+        """Raw image bytes (decodes the base64 payload if that is all we have)."""
+        if self._raw is not None:
+            return self._raw
+        if self._b64 is not None:
+            return base64.b64decode(self._b64)
+        return base64.b64decode(self._data_uri[self._data_uri.index(',') + 1:])
+
+    def _payload(self):
+        """(base64 text, start offset) or (None, 0) when holding raw bytes."""
+        if self._raw is not None:
+            return None, 0
+        if self._b64 is not None:
+            return self._b64, 0
+        return self._data_uri, self._data_uri.index(',') + 1
+
+    def byte_length(self) -> int:
+        """Decoded size in bytes, computed without decoding."""
+        text, start = self._payload()
+        if text is None:
+            return len(self._raw)
+        return (len(text) - start) // 4 * 3 - (text[-2:].count('='))
+
+    def iter_bytes(self, chunk_size: int = 65536):
+        """Raw bytes in chunks, decoding base64 a chunk at a time."""
+        text, start = self._payload()
+        if text is None:
+            for i in range(0, len(self._raw), chunk_size):
+                yield self._raw[i:i + chunk_size]
+            return
+        step = chunk_size // 3 * 4
+        for i in range(start, len(text), step):
+            yield base64.b64decode(text[i:i + step])
+
+    def artifact(self, filename: str, provider: str, size: Optional[Tuple[int, int]] = None) -> dict:
+        width, height = self.size or size or (None, None)
+        return {
+            'type': f"image_{self.extension}",
+            'content_type': self.content_type,
+            'filename': f"{filename}.{self.extension}",
+            'metadata': {'width': width, 'height': height, 'provider': provider}
+        }
+
+
+def _check_base64(head: str, tail: str, length: int):
+    """Validate a base64 image by its head and tail; returns (content_type, extension, size)."""
+    if length % 4:
+        raise ValueError("Invalid base64 image: length is not a multiple of 4")
+    try:
+        header = base64.b64decode(head, validate=True)
+        # The last quantum carries the padding, so decoding it catches truncation
+        base64.b64decode(tail, validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Invalid base64 image: {e}") from e
+    kind = sniff(header)
+    if kind is None:
+        raise ValueError(f"Not an image (starts with {header[:8]!r})")
+    return kind[0], kind[1], dimensions(header)
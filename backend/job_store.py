@@ -0,0 +1,132 @@
+import json
+import uuid
+from typing import Any, AsyncIterable, Dict, List, Optional
+import httpx
+
+
+class JobStoreError(Exception):
+    """Non-2xx response from PocketBase."""
+
+    def __init__(self, status: int, message: str, data: Optional[Dict] = None):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.data = data or {}
+
+
+class JobStore:
+    """
+    Async PocketBase REST client used by the worker loop.
+
+    All calls share one keep-alive connection pool, so claims, heartbeats and
+    result writes never block the event loop (unlike the sync SDK they replace).
+    Records are returned as plain dicts.
+    """
+
+    def __init__(self, pb_url: str, timeout: float = 15.0, max_connections: int = 20):
+        self.pb_url = pb_url.rstrip('/')
+        self.token: Optional[str] = None
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created lazily so the pool binds to the loop that actually uses it
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.pb_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections)
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, method: str, path: str, **kwargs) -> Any:
+        headers = kwargs.pop('headers', {})
+        if self.token:
+            headers.setdefault("Authorization", self.token)
+
+        r = await self.client.request(method, path, headers=headers, **kwargs)
+        if r.status_code >= 400:
+            try:
+                body = r.json()
+            except ValueError:
+                body = {}
+            raise JobStoreError(r.status_code, body.get('message', r.text[:200]), body.get('data'))
+        if r.status_code == 204 or not r.content:
+            return None
+        return r.json()
+
+    async def authenticate(self, email: str, password: str) -> Dict:
+        auth_data = await self._request("POST", "/api/admins/auth-with-password",
+                                        json={"identity": email, "password": password})
+        self.token = auth_data.get('token')
+        return auth_data
+
+    async def get_collection(self, name: str) -> Dict:
+        """Collection definition (admin only), including its field schema."""
+        return await self._request("GET", f"/api/collections/{name}")
+
+    async def list_records(self, collection: str, filter: Optional[str] = None,
+                           sort: Optional[str] = None, page: int = 1, per_page: int = 30) -> List[Dict]:
+        params = {"page": page, "perPage": per_page}
+        if filter:
+            params["filter"] = filter
+        if sort:
+            params["sort"] = sort
+        data = await self._request("GET", f"/api/collections/{collection}/records", params=params)
+        return data.get('items', [])
+
+    async def count_records(self, collection: str, filter: Optional[str] = None) -> int:
+        params = {"page": 1, "perPage": 1}
+        if filter:
+            params["filter"] = filter
+        data = await self._request("GET", f"/api/collections/{collection}/records", params=params)
+        return data.get('totalItems', 0)
+
+    async def get_record(self, collection: str, record_id: str) -> Dict:
+        return await self._request("GET", f"/api/collections/{collection}/records/{record_id}")
+
+    async def create_record(self, collection: str, data: Dict) -> Dict:
+        return await self._request("POST", f"/api/collections/{collection}/records", json=data)
+
+    async def update_record(self, collection: str, record_id: str, data: Dict) -> Dict:
+        return await self._request("PATCH", f"/api/collections/{collection}/records/{record_id}", json=data)
+
+    async def delete_record(self, collection: str, record_id: str):
+        await self._request("DELETE", f"/api/collections/{collection}/records/{record_id}")
+
+    async def create_record_with_file(self, collection: str, data: Dict, field: str, filename: str,
+                                      content_type: str, chunks: AsyncIterable[bytes],
+                                      length: Optional[int] = None) -> Dict:
+        """
+        Create a record whose `field` is a file, streaming the file from
+        `chunks` as multipart/form-data without holding it in memory. Pass the
+        file's `length` if known to send a Content-Length instead of chunked
+        transfer encoding.
+        """
+        boundary = uuid.uuid4().hex
+        head = b"".join(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'.encode()
+            + (value if isinstance(value, str) else json.dumps(value)).encode() + b"\r\n"
+            for name, value in data.items()
+        ) + (f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+             f'Content-Type: {content_type}\r\n\r\n').encode()
+        tail = f"\r\n--{boundary}--\r\n".encode()
+
+        async def body():
+            yield head
+            async for chunk in chunks:
+                yield chunk
+            yield tail
+
+        headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+        if length is not None:
+            headers["Content-Length"] = str(len(head) + length + len(tail))
+        return await self._request("POST", f"/api/collections/{collection}/records",
+                                   content=body(), headers=headers)
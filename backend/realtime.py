@@ -0,0 +1,65 @@
+import json
+from typing import Callable, Dict, List, Optional
+import httpx
+
+
+class RealtimeSubscription:
+    """
+    Minimal PocketBase realtime (SSE) client.
+
+    Opens /api/realtime, waits for PB_CONNECT, registers the topics for the
+    issued client id, then hands every decoded event to `on_event(topic, data)`.
+    `run()` returns or raises when the stream drops; reconnecting is the caller's job.
+    """
+
+    def __init__(self,
+                 pb_url: str,
+                 topics: List[str],
+                 on_event: Callable[[str, Dict], None],
+                 token_getter: Optional[Callable[[], Optional[str]]] = None,
+                 on_connect: Optional[Callable[[], None]] = None):
+        self.pb_url = pb_url.rstrip('/')
+        self.topics = topics
+        self.on_event = on_event
+        self.token_getter = token_getter
+        self.on_connect = on_connect
+
+    def _headers(self) -> Dict[str, str]:
+        token = self.token_getter() if self.token_getter else None
+        return {"Authorization": token} if token else {}
+
+    async def run(self):
+        # No read timeout: the stream is idle between events by design
+        timeout = httpx.Timeout(10.0, read=None)
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            async with client.stream("GET", f"{self.pb_url}/api/realtime",
+                                     headers={"Accept": "text/event-stream"}) as response:
+                response.raise_for_status()
+
+                event, data_lines = None, []
+                async for line in response.aiter_lines():
+                    if line.startswith("event:"):
+                        event = line[6:].strip()
+                    elif line.startswith("data:"):
+                        data_lines.append(line[5:].strip())
+                    elif line == "" and event:
+                        try:
+                            data = json.loads("\n".join(data_lines) or "{}")
+                        except ValueError:
+                            data = {}
+
+                        if event == "PB_CONNECT":
+                            await self._subscribe(client, data.get("clientId"))
+                        else:
+                            self.on_event(event, data)
+                        event, data_lines = None, []
+
+    async def _subscribe(self, client: httpx.AsyncClient, client_id: Optional[str]):
+        if not client_id:
+            raise RuntimeError("PocketBase realtime did not issue a clientId")
+        r = await client.post(f"{self.pb_url}/api/realtime",
+                              json={"clientId": client_id, "subscriptions": self.topics},
+                              headers=self._headers())
+        r.raise_for_status()
+        if self.on_connect:
+            self.on_connect()
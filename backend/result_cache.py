@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+
+class ResultCache:
+    """
+    Content-addressed disk cache of deterministic generation outputs.
+
+    The key is a SHA-256 of the canonical JSON of everything that feeds the
+    generation, so identical seeded requests map to the same file. Files
+    live under `root/<key[:2]>/<key>`; total size is kept under `max_bytes`
+    by evicting the least recently used entries (recency survives restarts
+    through the files' mtimes). An entry can carry a small JSON sidecar
+    (`.<key>.json`, e.g. where the image was already uploaded) that is
+    evicted with it.
+
+    Safe to call from several threads (the worker runs get/put through
+    asyncio.to_thread): the index is guarded by a lock, file I/O happens
+    outside it.
+    """
+
+    def __init__(self, root: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.root = Path(root or os.getenv("RESULT_CACHE_DIR") or Path(tempfile.gettempdir()) / "z-image-results")
+        self.max_bytes = max_bytes if max_bytes is not None else int(float(os.getenv("RESULT_CACHE_MAX_MB", "2048")) * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # key -> size, least recently used first
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def key(params: Dict) -> str:
+        canonical = json.dumps(params, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def _meta_path(self, key: str) -> Path:
+        return self.root / key[:2] / f".{key}.json"
+
+    def _load(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        files = [p for p in self.root.glob("??/*") if p.is_file() and not p.name.startswith('.')]
+        for path in sorted(files, key=lambda p: p.stat().st_mtime):
+            size = path.stat().st_size
+            self._entries[path.name] = size
+            self._size += size
+        self._evict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted (or removed by hand) since the index lookup
+            with self._lock:
+                self._size -= self._entries.pop(key, 0)
+                self.misses += 1
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.hits += 1
+        return data
+
+    def put(self, key: str, chunks: Iterable[bytes]):
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        # Write under a temp name and rename, so readers never see half a file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.')
+        size = 0
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    size += len(chunk)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        with self._lock:
+            self._size -= self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._size += size
+            self._evict()
+
+    def get_meta(self, key: str) -> Optional[Dict]:
+        """The sidecar stored with an entry, or None"""
+        with self._lock:
+            if key not in self._entries:
+                return None
+        try:
+            return json.loads(self._meta_path(key).read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put_meta(self, key: str, meta: Dict):
+        """Attach a sidecar to an existing entry (ignored if it was evicted)"""
+        with self._lock:
+            if key not in self._entries:
+                return
+        path = self._meta_path(key)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(meta, f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _evict(self):
+        # Caller holds the lock (or is __init__)
+        while self._size > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._size -= size
+            self.evictions += 1
+            for path in (self._path(key), self._meta_path(key)):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
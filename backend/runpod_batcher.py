@@ -0,0 +1,191 @@
+import asyncio
+import json
+import os
+from typing import Callable, Dict, List, Optional
+
+from runpod_client import RunPodClient
+from runpod_poller import RunPodPoller
+
+
+class RunPodBatch:
+    """One RunPod job being filled with, or running, compatible generations."""
+
+    def __init__(self, endpoint_id: str, settings: Dict, webhook: Optional[str]):
+        self.endpoint_id = endpoint_id
+        self.settings = settings
+        self.webhook = webhook
+        self.items: List[Dict] = []
+        # Members still waiting for the result; the job is cancelled when none are
+        self.waiting = 0
+        self.full = asyncio.Event()
+        self.job_id: Optional[str] = None
+        self.submitted: Optional[asyncio.Task] = None
+        self.result: Optional[asyncio.Task] = None
+
+
+class BatchTicket:
+    """A generation's place in a submitted batch."""
+
+    def __init__(self, batch: RunPodBatch, index: int):
+        self.batch = batch
+        self.index = index
+
+    @property
+    def job_id(self) -> str:
+        return self.batch.job_id
+
+    @property
+    def size(self) -> int:
+        return len(self.batch.items)
+
+
+class RunPodBatcher:
+    """
+    Groups compatible RunPod generations into one job for the ComfyUI
+    worker's `batch` input (handler_multi.py samples them in one KSampler
+    call).
+
+    Generations are compatible when they go to the same endpoint with the
+    same settings; only the prompt, negative prompt and seed may differ. The
+    first one opens a batch, which is submitted RUNPOD_BATCH_WINDOW seconds
+    later or as soon as it holds RUNPOD_BATCH_MAX generations (1 = off). A
+    batch of one is sent as a plain job. Every member gets its own item of
+    the output, shaped like the status of a job of its own; the RunPod job is
+    cancelled only once every member has stopped waiting for it.
+    """
+
+    ITEM_FIELDS = ('prompt', 'negative_prompt', 'seed')
+
+    def __init__(self, client: RunPodClient, poller: RunPodPoller,
+                 max_size: Optional[int] = None, window: Optional[float] = None):
+        self.client = client
+        self.poller = poller
+        self.max_size = max_size if max_size is not None else int(os.getenv("RUNPOD_BATCH_MAX", "1"))
+        self.window = window if window is not None else float(os.getenv("RUNPOD_BATCH_WINDOW", "0.25"))
+        # Batch key -> batch still accepting generations
+        self._open: Dict[str, RunPodBatch] = {}
+        self.jobs = 0
+        self.items = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 1
+
+    @classmethod
+    def key(cls, endpoint_id: str, params: Dict) -> str:
+        settings = {k: v for k, v in params.items() if k not in cls.ITEM_FIELDS}
+        return endpoint_id + json.dumps(settings, sort_keys=True)
+
+    async def submit(self, endpoint_id: str, params: Dict, webhook: Optional[str] = None) -> BatchTicket:
+        """Join (or open) a batch for these params and wait until it is submitted to RunPod."""
+        key = self.key(endpoint_id, params)
+        batch = self._open.get(key)
+        if batch is None:
+            settings = {k: v for k, v in params.items() if k not in self.ITEM_FIELDS}
+            batch = self._open[key] = RunPodBatch(endpoint_id, settings, webhook)
+            batch.submitted = asyncio.create_task(self._submit(key, batch))
+        ticket = BatchTicket(batch, len(batch.items))
+        batch.items.append({k: params[k] for k in self.ITEM_FIELDS if k in params})
+        batch.waiting += 1
+        if len(batch.items) >= self.max_size:
+            del self._open[key]
+            batch.full.set()
+        try:
+            await asyncio.shield(batch.submitted)
+        except asyncio.CancelledError:
+            if batch.submitted.done() and not batch.submitted.cancelled():
+                await self._leave(batch)
+            else:
+                # _submit cancels the job if nobody is left once it has an id
+                batch.waiting -= 1
+            raise
+        except Exception:
+            batch.waiting -= 1
+            raise
+        return ticket
+
+    async def wait(self, ticket: BatchTicket, timeout: float,
+                   keep_running: Optional[Callable[[], bool]] = None) -> Dict:
+        """
+        Final status of the ticket's generation, shaped like a single job's
+        (its item of the batch output). Raises asyncio.TimeoutError.
+
+        If the wait is abandoned and `keep_running()` says so, the RunPod job
+        is left running even once no member waits (someone else resumes it).
+        """
+        batch = ticket.batch
+        try:
+            data = await asyncio.wait_for(asyncio.shield(batch.result), timeout)
+        except BaseException:
+            await self._leave(batch, cancel=not (keep_running and keep_running()))
+            raise
+        batch.waiting -= 1
+        return self._item(data, ticket)
+
+    async def _submit(self, key: str, batch: RunPodBatch):
+        try:
+            await asyncio.wait_for(batch.full.wait(), self.window)
+        except asyncio.TimeoutError:
+            pass
+        if self._open.get(key) is batch:
+            del self._open[key]
+        if not batch.waiting:
+            return
+
+        if len(batch.items) == 1:
+            payload_input = {**batch.settings, **batch.items[0]}
+        else:
+            payload_input = {**batch.settings, 'batch': batch.items}
+            print(f"📦 Batching {len(batch.items)} generations into one RunPod job on {batch.endpoint_id}")
+        payload = {"input": payload_input}
+        if batch.webhook:
+            payload["webhook"] = batch.webhook
+        run_request = await self.client.submit(batch.endpoint_id, payload)
+        batch.job_id = run_request.get('id')
+        if not batch.job_id:
+            raise RuntimeError(f"Failed to get RunPod Job ID. Resp: {run_request}")
+        self.jobs += 1
+        self.items += len(batch.items)
+        batch.result = asyncio.create_task(
+            self.poller.wait(batch.endpoint_id, batch.job_id, timeout=None, webhook=bool(batch.webhook)))
+        if not batch.waiting:
+            await self._cancel(batch)
+
+    async def _leave(self, batch: RunPodBatch, cancel: bool = True):
+        batch.waiting -= 1
+        if not batch.waiting and batch.result is not None and not batch.result.done():
+            if cancel:
+                await self._cancel(batch)
+            else:
+                # Stop polling it here; the job itself keeps running
+                batch.result.cancel()
+
+    async def _cancel(self, batch: RunPodBatch):
+        batch.result.cancel()
+        print(f"🛑 Cancelling RunPod job {batch.job_id} on {batch.endpoint_id} (no batched generation is waiting)")
+        if not await self.poller.cancel(batch.endpoint_id, batch.job_id):
+            print(f"⚠️ RunPod did not confirm cancellation of {batch.job_id}")
+
+    @staticmethod
+    def _item(data: Dict, ticket: BatchTicket) -> Dict:
+        if ticket.size == 1 or data.get('status') != 'COMPLETED':
+            return data
+        output = data.get('output') or {}
+        images = output.get('images')
+        if not isinstance(images, list) or len(images) != ticket.size:
+            if output.get('error'):
+                return data
+            return {**data, 'status': 'FAILED',
+                    'error': f"Endpoint returned no batch output (keys: {list(output)})"}
+        item = {k: v for k, v in output.items() if k != 'images'}
+        item.update(images[ticket.index])
+        return {**data, 'output': item}
+
+    def snapshot(self) -> Dict:
+        return {
+            "max_size": self.max_size,
+            "window": self.window,
+            "jobs": self.jobs,
+            "items": self.items,
+            "mean_size": round(self.items / self.jobs, 2) if self.jobs else None
+        }
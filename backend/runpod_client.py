@@ -0,0 +1,139 @@
+import asyncio
+import os
+from typing import AsyncIterator, Dict, Optional
+import httpx
+
+TERMINAL_STATUSES = ('COMPLETED', 'FAILED', 'CANCELLED', 'TIMED_OUT')
+
+# Endpoint settings read back before a saveEndpoint, which wants the full config
+ENDPOINT_FIELDS = "id name templateId gpuIds workersMin workersMax idleTimeout locations networkVolumeId scalerType scalerValue"
+
+
+class RunPodError(Exception):
+    """Non-2xx response from the RunPod serverless API."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"RunPod {status}: {message}")
+        self.status = status
+
+
+class RunPodClient:
+    """
+    Async client for the RunPod serverless API (/v2/{endpoint}/...).
+
+    Each endpoint gets its own keep-alive connection pool, so concurrent
+    submissions and status checks overlap on warm connections instead of
+    blocking the event loop one HTTPS round-trip at a time the way
+    runpod.Endpoint(eid).run() does. One busy endpoint cannot starve the
+    connections of another.
+
+    Endpoint management (workersMin and friends) goes through the GraphQL API,
+    like the scripts under backend/scripts do.
+    """
+
+    def __init__(self, api_key: Optional[str],
+                 base_url: Optional[str] = None,
+                 graphql_url: Optional[str] = None,
+                 timeout: float = 10.0,
+                 submit_timeout: float = 60.0,
+                 max_connections_per_endpoint: int = 20):
+        self.api_key = api_key
+        self.base_url = (base_url or os.getenv("RUNPOD_API_BASE", "https://api.runpod.ai/v2")).rstrip('/')
+        self.graphql_url = graphql_url or os.getenv("RUNPOD_GRAPHQL_URL", "https://api.runpod.io/graphql")
+        self.timeout = timeout
+        # Submissions can carry megabytes of input images
+        self.submit_timeout = submit_timeout
+        self.max_connections_per_endpoint = max_connections_per_endpoint
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def _client(self, endpoint_id: str) -> httpx.AsyncClient:
+        # Created lazily so each pool binds to the loop that actually uses it
+        client = self._clients.get(endpoint_id)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=f"{self.base_url}/{endpoint_id}",
+                timeout=self.timeout,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                limits=httpx.Limits(max_connections=self.max_connections_per_endpoint,
+                                    max_keepalive_connections=self.max_connections_per_endpoint)
+            )
+            self._clients[endpoint_id] = client
+        return client
+
+    async def close(self):
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.aclose()
+
+    async def _request(self, endpoint_id: str, method: str, path: str, **kwargs) -> Dict:
+        r = await self._client(endpoint_id).request(method, path, **kwargs)
+        if r.status_code >= 400:
+            raise RunPodError(r.status_code, r.text[:200])
+        return r.json() if r.content else {}
+
+    async def submit(self, endpoint_id: str, payload: Dict, webhook: Optional[str] = None) -> Dict:
+        """
+        Queue a job (POST /run). `payload` is either the full request body or
+        just its input, like runpod.Endpoint.run(). Returns {'id', 'status'}.
+        """
+        body = dict(payload) if 'input' in payload else {"input": payload}
+        if webhook:
+            body["webhook"] = webhook
+        return await self._request(endpoint_id, "POST", "/run", json=body, timeout=self.submit_timeout)
+
+    async def status(self, endpoint_id: str, job_id: str) -> Dict:
+        """GET /status/{id}. Raises RunPodError(404) once RunPod has forgotten the job."""
+        return await self._request(endpoint_id, "GET", f"/status/{job_id}")
+
+    async def cancel(self, endpoint_id: str, job_id: str) -> Dict:
+        return await self._request(endpoint_id, "POST", f"/cancel/{job_id}")
+
+    async def health(self, endpoint_id: str) -> Dict:
+        """GET /health: {'jobs': {...}, 'workers': {...}} counters for the endpoint."""
+        return await self._request(endpoint_id, "GET", "/health")
+
+    async def stream(self, endpoint_id: str, job_id: str, interval: float = 1.0) -> AsyncIterator[Dict]:
+        """
+        Yield partial outputs of a streaming job (GET /stream/{id}) until it
+        reaches a terminal status.
+        """
+        while True:
+            data = await self._request(endpoint_id, "GET", f"/stream/{job_id}")
+            for chunk in data.get('stream') or []:
+                yield chunk.get('output', chunk)
+            if data.get('status') in TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(interval)
+
+    async def graphql(self, query: str, variables: Optional[Dict] = None) -> Dict:
+        """Run a GraphQL query; returns its `data`. Raises RunPodError on HTTP or GraphQL errors."""
+        body = {"query": query}
+        if variables:
+            body["variables"] = variables
+        # Shares the pool mechanics of the REST endpoints under a reserved key
+        r = await self._client("__graphql__").post(self.graphql_url, json=body)
+        if r.status_code >= 400:
+            raise RunPodError(r.status_code, r.text[:200])
+        data = r.json()
+        if data.get('errors'):
+            raise RunPodError(r.status_code, str(data['errors'])[:200])
+        return data.get('data') or {}
+
+    async def get_endpoint(self, endpoint_id: str) -> Optional[Dict]:
+        """Current settings of one of our serverless endpoints, or None if it doesn't exist."""
+        data = await self.graphql(f"query {{ myself {{ endpoints {{ {ENDPOINT_FIELDS} }} }} }}")
+        for endpoint in (data.get('myself') or {}).get('endpoints') or []:
+            if endpoint.get('id') == endpoint_id:
+                return endpoint
+        return None
+
+    async def save_endpoint(self, endpoint: Dict) -> Dict:
+        """saveEndpoint mutation. Pass the full config from get_endpoint() with your changes applied."""
+        query = f"""
+        mutation SaveEndpoint($input: EndpointInput!) {{
+          saveEndpoint(input: $input) {{ {ENDPOINT_FIELDS} }}
+        }}
+        """
+        endpoint_input = {k: v for k, v in endpoint.items() if v is not None}
+        data = await self.graphql(query, {"input": endpoint_input})
+        return data.get('saveEndpoint') or {}
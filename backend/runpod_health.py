@@ -0,0 +1,72 @@
+import asyncio
+import os
+import time
+from typing import Dict, Optional, Tuple
+from runpod_client import RunPodClient
+
+
+class EndpointHealthCache:
+    """
+    Per-endpoint cache of RunPod /health responses.
+
+    Readers get the cached payload while it is younger than `ttl` (or the
+    `max_age` they ask for). When it is stale, concurrent readers share one
+    in-flight refresh instead of each sending their own request. A failed
+    refresh keeps serving the last good payload.
+    """
+
+    def __init__(self, client: RunPodClient, ttl: Optional[float] = None):
+        self.client = client
+        self.ttl = ttl if ttl is not None else float(os.getenv("RUNPOD_HEALTH_TTL", "10"))
+        self._entries: Dict[str, Tuple[float, Dict]] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.refreshes = 0
+
+    async def get(self, endpoint_id: str, max_age: Optional[float] = None) -> Optional[Dict]:
+        """Health payload for an endpoint, at most `max_age` (default ttl) seconds old."""
+        max_age = self.ttl if max_age is None else max_age
+        entry = self._entries.get(endpoint_id)
+        if entry and time.monotonic() - entry[0] < max_age:
+            self.hits += 1
+            return entry[1]
+
+        task = self._refreshing.get(endpoint_id)
+        if task is None:
+            task = asyncio.create_task(self._refresh(endpoint_id))
+            self._refreshing[endpoint_id] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(endpoint_id, None))
+        else:
+            self.hits += 1
+        # Shielded so one cancelled reader doesn't abort the refresh for the rest
+        return await asyncio.shield(task)
+
+    def peek(self, endpoint_id: str) -> Optional[Dict]:
+        """Last known health payload, however old, without touching the network."""
+        entry = self._entries.get(endpoint_id)
+        return entry[1] if entry else None
+
+    def fetched_at(self, endpoint_id: str) -> Optional[float]:
+        """time.monotonic() of the cached payload, if any."""
+        entry = self._entries.get(endpoint_id)
+        return entry[0] if entry else None
+
+    async def _refresh(self, endpoint_id: str) -> Optional[Dict]:
+        self.refreshes += 1
+        try:
+            health = await self.client.health(endpoint_id)
+        except Exception as e:
+            print(f"Warning: RunPod health check failed for {endpoint_id}: {e}")
+            return self.peek(endpoint_id)
+        self._entries[endpoint_id] = (time.monotonic(), health)
+        return health
+
+    async def worker_summary(self, endpoint_id: str, max_age: Optional[float] = None) -> str:
+        return format_workers(await self.get(endpoint_id, max_age))
+
+
+def format_workers(health: Optional[Dict]) -> str:
+    w = (health or {}).get('workers', {})
+    if not w:
+        return "Unknown"
+    return f"Init: {w.get('initializing', 0)} | Ready: {w.get('ready', 0)} | Run: {w.get('running', 0)}"
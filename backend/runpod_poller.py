@@ -0,0 +1,228 @@
+import asyncio
+import time
+from typing import Dict, Optional
+from runpod_client import RunPodClient, RunPodError, TERMINAL_STATUSES
+from runpod_health import EndpointHealthCache, format_workers
+
+
+class TrackedJob:
+    def __init__(self, endpoint_id: str, job_id: str, future: asyncio.Future, interval: float,
+                 webhook: bool = False):
+        self.endpoint_id = endpoint_id
+        self.job_id = job_id
+        self.future = future
+        self.webhook = webhook
+        self.interval = interval
+        self.next_poll = time.monotonic() + interval
+        self.last_polled = 0.0
+        self.started = time.monotonic()
+        self.last_log = self.started
+        self.status = 'SUBMITTED'
+        self.misses = 0
+
+
+class RunPodPoller:
+    """
+    One status poller for every in-flight RunPod job in this worker.
+
+    Each tick costs at most one /health request per endpoint with outstanding
+    jobs, read through the shared EndpointHealthCache so other health readers
+    ride along for free.
+    When an endpoint's completed/failed counters move by N, the poller checks
+    the N least-recently-polled jobs on that endpoint (more on later ticks if
+    those were not the ones that finished). Each job is also re-checked on
+    its own backoff (min_interval growing to job_max_interval) as a safety
+    net: counter moves can cancel out within a tick and /health can be
+    stale, so this cap bounds how late a missed completion is noticed.
+    So request volume follows endpoints and completions, not jobs x ticks.
+    Requests go through the worker's RunPodClient pools, and waiters get the
+    final /status payload through a per-job future.
+
+    Jobs submitted with a RunPod webhook are resolved by `resolve()` from the
+    webhook route; they only get the slow max_interval poll in case the
+    callback never arrives.
+    """
+
+    def __init__(self, client: RunPodClient,
+                 health: Optional[EndpointHealthCache] = None,
+                 tick: float = 1.0,
+                 min_interval: float = 2.0,
+                 job_max_interval: float = 5.0,
+                 max_interval: float = 60.0,
+                 max_concurrent_requests: int = 10):
+        self.client = client
+        self.health = health or EndpointHealthCache(client)
+        self.tick = tick
+        self.min_interval = min_interval
+        self.job_max_interval = job_max_interval
+        self.max_interval = max_interval
+        self.max_concurrent_requests = max_concurrent_requests
+
+        self.jobs: Dict[str, TrackedJob] = {}
+        self._health_signature: Dict[str, tuple] = {}
+        # Completions reported by /health that we have not matched to a job yet
+        self._unexplained: Dict[str, int] = {}
+        # Webhook results that arrived before the job was tracked
+        self._early_results: Dict[str, Dict] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    def track(self, endpoint_id: str, job_id: str, webhook: bool = False) -> asyncio.Future:
+        """Start tracking a job; the returned future resolves with its final status payload."""
+        if job_id in self.jobs:
+            return self.jobs[job_id].future
+
+        future = asyncio.get_running_loop().create_future()
+        if job_id in self._early_results:
+            future.set_result(self._early_results.pop(job_id))
+            return future
+
+        interval = self.max_interval if webhook else self.min_interval
+        self.jobs[job_id] = TrackedJob(endpoint_id, job_id, future, interval, webhook=webhook)
+        self._ensure_running()
+        return future
+
+    def untrack(self, job_id: str):
+        job = self.jobs.pop(job_id, None)
+        if job and not job.future.done():
+            job.future.cancel()
+
+    async def wait(self, endpoint_id: str, job_id: str, timeout: float, webhook: bool = False) -> Dict:
+        """Wait for a job to reach a terminal status. Raises asyncio.TimeoutError."""
+        future = self.track(endpoint_id, job_id, webhook=webhook)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        finally:
+            if not future.done() or future.cancelled():
+                self.untrack(job_id)
+
+    async def cancel(self, endpoint_id: str, job_id: str) -> bool:
+        """Stop tracking a job and ask RunPod to cancel it. Returns True if RunPod accepted."""
+        self.untrack(job_id)
+        try:
+            await self.client.cancel(endpoint_id, job_id)
+            return True
+        except Exception as e:
+            print(f"⚠️ RunPod cancel failed for {job_id}: {e}")
+            return False
+
+    def _ensure_running(self):
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        self._wake.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+        for job_id in list(self.jobs):
+            self.untrack(job_id)
+
+    async def _run(self):
+        while True:
+            if not self.jobs:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            try:
+                await self._poll_once()
+            except Exception as e:
+                print(f"⚠️ RunPod poller error: {e}")
+            await asyncio.sleep(self.tick)
+
+    async def _poll_once(self):
+        # Webhook-backed jobs don't need the health-driven sweep
+        endpoints = {job.endpoint_id for job in self.jobs.values() if not job.webhook}
+        await asyncio.gather(*[self._refresh_health(eid) for eid in endpoints])
+
+        now = time.monotonic()
+        due = {job.job_id: job for job in self.jobs.values() if job.next_poll <= now}
+        for eid, pending in self._unexplained.items():
+            candidates = sorted((j for j in self.jobs.values() if j.endpoint_id == eid and not j.webhook),
+                                key=lambda j: (j.last_polled, j.started))
+            for job in candidates[:pending]:
+                due[job.job_id] = job
+
+        semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+
+        async def poll(job):
+            async with semaphore:
+                return job.endpoint_id, await self._poll_job(job)
+
+        results = await asyncio.gather(*[poll(job) for job in due.values()])
+        for eid in list(self._unexplained):
+            found = sum(1 for job_eid, finished in results if job_eid == eid and finished)
+            remaining = self._unexplained[eid] - found
+            if remaining <= 0 or not any(j.endpoint_id == eid for j in self.jobs.values()):
+                del self._unexplained[eid]
+            else:
+                self._unexplained[eid] = remaining
+        self._log_progress()
+
+    async def _refresh_health(self, endpoint_id: str):
+        health = await self.health.get(endpoint_id, max_age=self.tick)
+        if not health:
+            return
+
+        jobs = health.get('jobs', {})
+        signature = (jobs.get('completed', 0), jobs.get('failed', 0))
+        previous = self._health_signature.get(endpoint_id)
+        if previous is not None and signature != previous:
+            # Something finished on this endpoint: go find out which of ours it was
+            finished = abs(signature[0] - previous[0]) + abs(signature[1] - previous[1])
+            self._unexplained[endpoint_id] = self._unexplained.get(endpoint_id, 0) + finished
+        self._health_signature[endpoint_id] = signature
+
+    async def _poll_job(self, job: TrackedJob) -> bool:
+        """Poll one job; returns True if it reached a terminal status."""
+        job.last_polled = time.monotonic()
+        try:
+            data = await self.client.status(job.endpoint_id, job.job_id)
+        except RunPodError as e:
+            if e.status != 404:
+                print(f"Warning: Poll failed: {e}")
+                data = {}
+            else:
+                job.misses += 1
+                data = {'status': 'FAILED', 'error': 'Job not found on RunPod'} if job.misses >= 5 else {}
+        except Exception as e:
+            print(f"Warning: Poll failed: {e}")
+            data = {}
+
+        status = data.get('status')
+        if status:
+            job.status = status
+        if status in TERMINAL_STATUSES:
+            self.resolve(job.job_id, data)
+            return True
+
+        job.next_poll = time.monotonic() + job.interval
+        job.interval = min(job.interval * 1.5, self.max_interval if job.webhook else self.job_max_interval)
+        return False
+
+    def resolve(self, job_id: str, data: Dict) -> bool:
+        """Resolve a tracked job with its final status payload."""
+        job = self.jobs.pop(job_id, None)
+        if job is None:
+            # Webhook beat track(): keep it briefly for the waiter that is about to register
+            if data.get('status') in TERMINAL_STATUSES:
+                if len(self._early_results) >= 1000:
+                    self._early_results.pop(next(iter(self._early_results)))
+                self._early_results[job_id] = data
+            return False
+        if job.future.done():
+            return False
+        job.future.set_result(data)
+        return True
+
+    def worker_summary(self, endpoint_id: str) -> str:
+        return format_workers(self.health.peek(endpoint_id))
+
+    def _log_progress(self):
+        now = time.monotonic()
+        for job in self.jobs.values():
+            if now - job.last_log >= 20:
+                job.last_log = now
+                print(f"⏳ Job {job.job_id[:8]}... | Status: {job.status} | Wait: {int(now - job.started)}s "
+                      f"| Workers: {self.worker_summary(job.endpoint_id)}")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Claim contention benchmark.
+
+Seeds a local fake PocketBase with queued jobs, then lets N worker replicas
+race to claim them. Reports claim throughput and how many jobs were claimed
+more than once (each duplicate is a paid-for RunPod generation in production).
+
+    python backend/scripts/bench_claim_contention.py --workers 24 --jobs 500
+    python backend/scripts/bench_claim_contention.py --unconditional   # old behaviour
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_pocketbase import FakePocketBase
+
+
+def make_worker_class():
+    from base_worker import BaseWorker
+
+    class ClaimOnlyWorker(BaseWorker):
+        async def process_task(self, task):
+            return {'success': True}
+
+    return ClaimOnlyWorker
+
+
+async def unconditional_claim(self, task_record):
+    """Pre-lease claim: blind update, no compare-and-set."""
+    await self.store.update_record('jobs', task_record['id'], {
+        "status": "processing",
+        "worker_id": self.worker_id,
+        "started_at": datetime.utcnow().isoformat()
+    })
+    return "unconditional"
+
+
+async def run_worker(worker, claims):
+    await worker._authenticate()
+    while True:
+        tasks = await worker.claim_tasks()
+        if not tasks:
+            break
+        claims.extend(t['id'] for t in tasks)
+    await worker.store.close()
+
+
+async def run_all(workers, claims):
+    await asyncio.gather(*[run_worker(w, claims) for w in workers])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=24)
+    parser.add_argument("--jobs", type=int, default=500)
+    parser.add_argument("--batch", type=int, default=5, help="max_concurrent_tasks per worker")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="simulated DB round-trip")
+    parser.add_argument("--unconditional", action="store_true", help="use the old blind-update claim")
+    args = parser.parse_args()
+
+    fake = FakePocketBase(latency_ms=args.latency_ms)
+    os.environ["PB_URL"] = fake.start()
+    for i in range(args.jobs):
+        fake.create("jobs", {"type": "image_generation", "status": "queued",
+                             "params": {"prompt": f"job {i}"}, "user_id": "bench"})
+
+    worker_cls = make_worker_class()
+    if args.unconditional:
+        worker_cls._acquire_claim = unconditional_claim
+
+    workers = [worker_cls(task_types=['image_generation'], max_concurrent_tasks=args.batch)
+               for _ in range(args.workers)]
+
+    claims = []
+    start = time.perf_counter()
+    asyncio.run(run_all(workers, claims))
+    elapsed = time.perf_counter() - start
+    fake.stop()
+
+    counts = Counter(claims)
+    duplicates = sum(c - 1 for c in counts.values() if c > 1)
+    print("\n" + "=" * 60)
+    print(f"Mode:            {'unconditional' if args.unconditional else 'compare-and-set + lease'}")
+    print(f"Workers:         {args.workers} (batch {args.batch}, DB latency {args.latency_ms}ms)")
+    print(f"Jobs claimed:    {len(counts)}/{args.jobs}")
+    print(f"Duplicates:      {duplicates}")
+    print(f"Elapsed:         {elapsed:.2f}s  ({len(counts) / elapsed:.0f} jobs/s)")
+    print(f"DB requests:     {fake.request_count}")
+    print("=" * 60)
+    return 1 if duplicates and not args.unconditional else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
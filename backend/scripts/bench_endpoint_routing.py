@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Multi-endpoint routing benchmark.
+
+One model served by three endpoints on the capacity-aware fake RunPod:
+  ep-a  1 warm worker  (listed first, so the old one-endpoint mapping sends everything here)
+  ep-b  2 warm workers, slower GPU
+  ep-c  cold, boots one worker on first use
+Submits a steady stream of jobs and compares end-to-end latency when every
+job goes to the first endpoint versus EndpointRouter's least-expected-wait
+choice.
+
+Then routes a burst of --burst jobs at once (as claim_tasks hands them out)
+across two identical warm endpoints, all reading the same health payload,
+and reports how they were spread.
+
+    python backend/scripts/bench_endpoint_routing.py --jobs 30 --every 0.4 --burst 8
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_runpod import FakeRunPod
+from endpoint_router import EndpointRouter
+from runpod_client import RunPodClient
+from runpod_health import EndpointHealthCache
+
+ENDPOINTS = ["ep-a", "ep-b", "ep-c"]
+
+
+def make_fake(args):
+    fake = FakeRunPod()
+    fake.add_endpoint("ep-a", workersMin=1, job_seconds=args.job_seconds)
+    fake.add_endpoint("ep-b", workersMin=2, job_seconds=args.job_seconds * 1.5)
+    fake.add_endpoint("ep-c", workersMin=0, job_seconds=args.job_seconds, cold_start=args.cold_start)
+    fake.start()
+    return fake
+
+
+async def run(args, routed):
+    fake = make_fake(args)
+    client = RunPodClient("fake-key", base_url=fake.base_url)
+    router = EndpointRouter(EndpointHealthCache(client, ttl=1.0),
+                            job_seconds=args.job_seconds, cold_start_seconds=args.cold_start)
+    loop = asyncio.get_running_loop()
+    jobs = []
+
+    for _ in range(args.jobs):
+        # choose() takes the endpoint's slot itself
+        eid = await router.choose(ENDPOINTS) if routed else ENDPOINTS[0]
+        result = await client.submit(eid, {"input": {}})
+        job = fake.jobs[result["id"]]
+        # Report completion back to the router when the fake finishes the job
+        loop.call_later(job["end"] - time.time(), router.finished, eid, job["end"] - job["start"])
+        jobs.append((eid, job))
+        await asyncio.sleep(args.every)
+
+    await client.close()
+    fake.stop()
+    latencies = sorted(job["end"] - job["submitted"] for _, job in jobs)
+    return latencies, Counter(eid for eid, _ in jobs)
+
+
+async def run_burst(args):
+    fake = FakeRunPod()
+    for eid in ("ep-a", "ep-b"):
+        fake.add_endpoint(eid, workersMin=2, job_seconds=args.job_seconds)
+    fake.start()
+    client = RunPodClient("fake-key", base_url=fake.base_url)
+    router = EndpointRouter(EndpointHealthCache(client, ttl=10.0), job_seconds=args.job_seconds)
+    chosen = await asyncio.gather(*[router.choose(["ep-a", "ep-b"]) for _ in range(args.burst)])
+    await client.close()
+    fake.stop()
+    return Counter(chosen)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=30)
+    parser.add_argument("--every", type=float, default=0.4)
+    parser.add_argument("--job-seconds", type=float, default=1.0)
+    parser.add_argument("--cold-start", type=float, default=4.0)
+    parser.add_argument("--burst", type=int, default=8)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    print("=" * 72)
+    for label, routed in (("first endpoint", False), ("least wait", True)):
+        # Keep the router's per-job log lines out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            latencies, spread = asyncio.run(run(args, routed))
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"{label:<15} mean {statistics.mean(latencies):5.2f}s  p95 {p95:5.2f}s  "
+              f"max {latencies[-1]:5.2f}s  spread {dict(sorted(spread.items()))}")
+    with contextlib.redirect_stdout(io.StringIO()):
+        burst = asyncio.run(run_burst(args))
+    print(f"burst of {args.burst:<6} spread {dict(sorted(burst.items()))} over two identical endpoints")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Per-job memory/CPU benchmark for the image result path.
+
+Builds a 1024x1024 PNG and runs it through the old result handling
+(full base64 decode to validate, split/re-wrap into a data: URI, encode
+again after a URL download) and through ImageResult, for each output
+shape RunPod can return. Reports the peak extra memory (tracemalloc) and
+the time per job.
+
+    python backend/scripts/bench_image_result.py --iterations 50
+"""
+import argparse
+import base64
+import os
+import struct
+import sys
+import time
+import tracemalloc
+import zlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from image_result import ImageResult
+
+
+def make_png(size):
+    """A size x size RGB PNG that compresses about as badly as a real render."""
+    row = 1 + size * 3
+    pixels = bytearray(os.urandom(row * size // 2)) + bytearray(row * size - row * size // 2)
+    for y in range(size):
+        pixels[y * row] = 0
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(bytes(pixels), 6)) + chunk(b"IEND", b""))
+
+
+def legacy(output):
+    """The pre-ImageResult logic from generate_with_runpod."""
+    img_b64 = output.get('image_base64')
+    if not img_b64 and 'image_url' in output:
+        url = output['image_url']
+        if url.startswith('data:'):
+            img_b64 = url.split(',')[1]
+        else:
+            img_b64 = base64.b64encode(output['_downloaded']).decode('utf-8')
+    img_bytes = base64.b64decode(img_b64)
+    return f"data:image/png;base64,{img_b64}", len(img_bytes)
+
+
+def current(output):
+    if output.get('image_base64'):
+        image = ImageResult.from_base64(output['image_base64'])
+    elif output['image_url'].startswith('data:'):
+        image = ImageResult.from_data_uri(output['image_url'])
+    else:
+        image = ImageResult.from_bytes(output['_downloaded'])
+    return image.data_uri(), image.size
+
+
+def measure(fn, make_output, iterations):
+    tracemalloc.start()
+    peak = 0
+    elapsed = 0.0
+    for _ in range(iterations):
+        output = make_output()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        result = fn(output)
+        elapsed += time.perf_counter() - started
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+        del result, output
+    tracemalloc.stop()
+    return peak / 1e6, elapsed / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1024)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    png = make_png(args.size)
+    b64 = base64.b64encode(png).decode()
+    uri = f"data:image/png;base64,{b64}"
+    shapes = {
+        "image_base64": lambda: {'image_base64': b64},
+        "data: URI": lambda: {'image_url': uri},
+        "URL download": lambda: {'image_url': 'https://example.invalid/x.png', '_downloaded': png},
+    }
+    assert all(legacy(make())[0] == current(make())[0] for make in shapes.values())
+
+    print(f"{args.size}x{args.size} PNG: {len(png) / 1e6:.2f} MB raw, {len(b64) / 1e6:.2f} MB base64\n")
+    print(f"{'output shape':<14} {'old peak MB':>12} {'new peak MB':>12} {'old ms':>8} {'new ms':>8}")
+    for name, make in shapes.items():
+        old_mb, old_ms = measure(legacy, make, args.iterations)
+        new_mb, new_ms = measure(current, make, args.iterations)
+        print(f"{name:<14} {old_mb:>12.2f} {new_mb:>12.2f} {old_ms:>8.2f} {new_ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
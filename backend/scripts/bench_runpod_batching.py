@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Batch throughput benchmark for RunPodBatcher.
+
+One endpoint with a single warm worker on the capacity-aware fake RunPod,
+running jobs FIFO. A job takes --job-seconds, plus --item-seconds for each
+extra image when it is a batch. Take both from the ComfyUI worker's
+"Generation complete (N in Xs)" log lines on the target GPU: the first is
+a one-image job, the second the marginal cost of one more image in a batch.
+
+A stream of compatible generations (--jobs, one every --every seconds) goes
+through RunPodBatcher for each RUNPOD_BATCH_MAX in --sizes. The report
+shows images/s, per-generation latency and how many RunPod jobs ran.
+
+    python backend/scripts/bench_runpod_batching.py --jobs 32 --every 0.05 --sizes 1,2,4,8
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_runpod import FakeRunPod
+from runpod_batcher import RunPodBatcher
+from runpod_client import RunPodClient
+from runpod_poller import RunPodPoller
+
+
+async def run(args, max_size):
+    fake = FakeRunPod(batch_item_seconds=args.item_seconds)
+    fake.add_endpoint("ep-gpu", workersMin=1, job_seconds=args.job_seconds)
+    fake.start()
+    client = RunPodClient("fake-key", base_url=fake.base_url)
+    poller = RunPodPoller(client, tick=0.05, min_interval=0.05, max_interval=0.05)
+    batcher = RunPodBatcher(client, poller, max_size=max_size, window=args.window)
+
+    async def generate(n):
+        started = time.monotonic()
+        params = {"model_id": "pony-v6", "width": 1024, "height": 1024, "num_inference_steps": 25,
+                  "prompt": f"prompt {n}", "negative_prompt": "bad quality, blurry", "seed": n}
+        ticket = await batcher.submit("ep-gpu", params)
+        result = await batcher.wait(ticket, timeout=600)
+        assert result["status"] == "COMPLETED", result
+        return time.monotonic() - started
+
+    started = time.monotonic()
+    tasks = []
+    for n in range(args.jobs):
+        tasks.append(asyncio.create_task(generate(n)))
+        await asyncio.sleep(args.every)
+    latencies = sorted(await asyncio.gather(*tasks))
+    elapsed = time.monotonic() - started
+
+    await poller.close()
+    await client.close()
+    fake.stop()
+    return elapsed, latencies, batcher.snapshot()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=32)
+    parser.add_argument("--every", type=float, default=0.05)
+    parser.add_argument("--job-seconds", type=float, default=0.4)
+    parser.add_argument("--item-seconds", type=float, default=0.25)
+    parser.add_argument("--window", type=float, default=0.25)
+    parser.add_argument("--sizes", default="1,2,4,8")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    print("=" * 78)
+    for max_size in (int(s) for s in args.sizes.split(',')):
+        # Keep the batcher's per-job log lines out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            elapsed, latencies, stats = asyncio.run(run(args, max_size))
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"batch max {max_size:<2}  {args.jobs / elapsed:5.2f} images/s  "
+              f"mean {statistics.mean(latencies):5.2f}s  p95 {p95:5.2f}s  "
+              f"{stats['jobs']:>3} RunPod jobs (mean size {stats['mean_size']})")
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
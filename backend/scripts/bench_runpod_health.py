@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+RunPod /health traffic benchmark.
+
+While the shared poller tracks N jobs, simulates the other health readers:
+the admin metrics route (polled by the dashboard every second), stuck-job
+logs and balance checks. Runs once with every reader calling /health
+directly, then with all of them reading through EndpointHealthCache, and
+reports how many /health requests hit the (fake) RunPod API.
+
+    python backend/scripts/bench_runpod_health.py --jobs 30 --seconds 15
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_runpod import FakeRunPod
+from runpod_client import RunPodClient
+from runpod_health import EndpointHealthCache
+from runpod_poller import RunPodPoller
+
+
+async def run(fake, args, cached):
+    client = RunPodClient("fake-key", base_url=fake.base_url)
+    health = EndpointHealthCache(client, ttl=args.ttl)
+    poller = RunPodPoller(client, health=health)
+    poller._log_progress = lambda: None
+    read = health.get if cached else client.health
+
+    async def reader(period, jitter):
+        await asyncio.sleep(jitter)
+        while True:
+            await read("ep-bench")
+            await asyncio.sleep(period)
+
+    readers = [asyncio.create_task(reader(1.0, 0))]  # admin dashboard
+    # Per-job readers: stuck-job logs / balance checks, spread out
+    readers += [asyncio.create_task(reader(5.0, i * 5.0 / args.jobs)) for i in range(args.jobs)]
+
+    fake.requests.clear()
+    start = time.perf_counter()
+    jobs = [fake.submit("ep-bench", {"input": {}}) for _ in range(args.jobs)]
+    await asyncio.gather(*[poller.wait("ep-bench", jid, timeout=args.seconds * 5) for jid in jobs])
+    # Keep the readers going for the rest of the window
+    await asyncio.sleep(max(0, args.seconds - (time.perf_counter() - start)))
+    elapsed = time.perf_counter() - start
+
+    for task in readers:
+        task.cancel()
+    await poller.close()
+    await client.close()
+    return dict(fake.requests), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=30)
+    parser.add_argument("--seconds", type=float, default=15.0)
+    parser.add_argument("--ttl", type=float, default=10.0)
+    args = parser.parse_args()
+
+    fake = FakeRunPod(job_seconds=args.seconds * 0.8)
+    fake.start()
+
+    print("=" * 60)
+    for label, cached in (("direct /health", False), ("health cache", True)):
+        counts, elapsed = asyncio.run(run(fake, args, cached))
+        print(f"{label:<15} health={counts.get('health', 0):>4} status={counts.get('status', 0):>4} in {elapsed:.1f}s")
+    print("=" * 60)
+    fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+RunPod status-polling benchmark.
+
+Runs N concurrent jobs against the local fake RunPod, first with the old
+one-loop-per-job polling (GET /status every 2s each), then with the shared
+RunPodPoller, and compares how many API requests each approach made.
+
+    python backend/scripts/bench_runpod_polling.py --jobs 50 --job-seconds 20
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_runpod import FakeRunPod
+from runpod_client import RunPodClient
+from runpod_poller import RunPodPoller, TERMINAL_STATUSES
+
+
+async def legacy_wait(client, base_url, eid, job_id):
+    while True:
+        r = await client.get(f"{base_url}/{eid}/status/{job_id}")
+        if r.json().get('status') in TERMINAL_STATUSES:
+            return
+        await asyncio.sleep(2)
+
+
+async def run(fake, args, shared):
+    base_url = fake.base_url
+    endpoints = [f"ep{i}" for i in range(args.endpoints)]
+    jobs = [(endpoints[i % len(endpoints)], fake.submit(endpoints[i % len(endpoints)], {"input": {}}))
+            for i in range(args.jobs)]
+    fake.requests.clear()
+
+    start = time.perf_counter()
+    if shared:
+        client = RunPodClient("fake-key", base_url=base_url)
+        poller = RunPodPoller(client)
+        poller._log_progress = lambda: None
+        await asyncio.gather(*[poller.wait(eid, jid, timeout=args.job_seconds * 5) for eid, jid in jobs])
+        await poller.close()
+        await client.close()
+    else:
+        async with httpx.AsyncClient() as client:
+            await asyncio.gather(*[legacy_wait(client, base_url, eid, jid) for eid, jid in jobs])
+    elapsed = time.perf_counter() - start
+    return dict(fake.requests), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--endpoints", type=int, default=1)
+    parser.add_argument("--job-seconds", type=float, default=20.0)
+    args = parser.parse_args()
+
+    fake = FakeRunPod(job_seconds=args.job_seconds)
+    fake.start()
+
+    print("=" * 60)
+    for label, shared in (("per-job loops", False), ("shared poller", True)):
+        counts, elapsed = asyncio.run(run(fake, args, shared))
+        total = sum(counts.values())
+        print(f"{label:<14} {total:>5} requests ({total / elapsed:5.1f}/s) "
+              f"status={counts.get('status', 0)} health={counts.get('health', 0)} in {elapsed:.1f}s")
+    print("=" * 60)
+    fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+RunPod submission benchmark.
+
+Submits N jobs concurrently from one event loop against the local fake
+RunPod (with a simulated API round-trip), first through the synchronous
+runpod.Endpoint(eid).run() the worker used to call, then through the async
+RunPodClient, and reports wall time and how long the event loop was blocked.
+
+    python backend/scripts/bench_runpod_submit.py --jobs 40 --latency-ms 150
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import logging
+
+import runpod
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_runpod import FakeRunPod
+from runpod_client import RunPodClient
+
+
+async def loop_lag_monitor(samples, interval=0.01):
+    # Longest gap between ticks = longest stretch the loop was blocked
+    while True:
+        before = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - before - interval)
+
+
+async def run(fake, args, use_client):
+    payload = {"input": {"prompt": "bench", "images": ["x" * args.payload_kb * 1024]}}
+    client = RunPodClient("fake-key", base_url=fake.base_url)
+    runpod.api_key = "fake-key"
+    runpod.endpoint_url_base = fake.base_url
+    # Warm up (pool/SSL context creation is a one-off cost for both)
+    await client.submit("ep-bench", payload)
+    runpod.Endpoint("ep-bench").run(payload)
+
+    lag = []
+    monitor = asyncio.create_task(loop_lag_monitor(lag))
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+
+    if use_client:
+        results = await asyncio.gather(*[client.submit("ep-bench", payload) for _ in range(args.jobs)])
+        ids = [r["id"] for r in results]
+    else:
+        async def submit():
+            return runpod.Endpoint("ep-bench").run(payload).job_id
+
+        ids = await asyncio.gather(*[submit() for _ in range(args.jobs)])
+
+    elapsed = time.perf_counter() - start
+    # Let the monitor observe the stall that just ended
+    await asyncio.sleep(0.05)
+    monitor.cancel()
+    await client.close()
+    return len(ids), elapsed, max(lag or [0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--payload-kb", type=int, default=256)
+    args = parser.parse_args()
+
+    # The runpod SDK turns on INFO logging, which makes httpx log every request
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    fake = FakeRunPod(latency_ms=args.latency_ms)
+    fake.start()
+
+    print("=" * 60)
+    for label, use_client in (("runpod SDK", False), ("RunPodClient", True)):
+        count, elapsed, max_lag = asyncio.run(run(fake, args, use_client))
+        print(f"{label:<13} {count} submits in {elapsed:5.2f}s "
+              f"({count / elapsed:6.1f}/s), event loop blocked up to {max_lag * 1000:6.0f}ms")
+    print("=" * 60)
+    fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,7 @@ from datetime import datetime
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from z_image_worker import ZImageWorker
+from endpoint_mapping import ENDPOINTS_PATH, endpoint_ids, load_endpoints
 
 # Explicit test prompts (increasingly explicit to test sensitivity)
 EXPLICIT_TEST_PROMPTS = [
@@ -178,13 +179,11 @@ async def main():
     print("Testing with explicit language to identify sensitive models...\n")
     
     # Load endpoints
-    endpoints_path = Path(__file__).parent.parent / "endpoints.json"
-    if not endpoints_path.exists():
+    if not ENDPOINTS_PATH.exists():
         print("❌ endpoints.json not found. Run setup_all_models.py first.")
         sys.exit(1)
     
-    with open(endpoints_path, 'r') as f:
-        endpoints = json.load(f)
+    endpoints = load_endpoints()
     
     # Load model config for names
     config_path = Path(__file__).parent.parent.parent / "config" / "models.json"
@@ -197,11 +196,11 @@ async def main():
     all_results = []
     
     for model_id, info in endpoints.items():
-        endpoint_id = info['endpoint_id']
         model_name = model_names.get(model_id, model_id)
         
-        result = await test_model_comprehensive(model_id, endpoint_id, model_name)
-        all_results.append(result)
+        for endpoint_id in endpoint_ids(info):
+            result = await test_model_comprehensive(model_id, endpoint_id, model_name)
+            all_results.append(result)
     
     # Save results
     results_path = Path(__file__).parent.parent / "model_test_results.json"
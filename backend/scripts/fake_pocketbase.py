@@ -0,0 +1,356 @@
+"""
+In-memory PocketBase stand-in for local benchmarks and verification scripts.
+
+Implements just enough of the REST API for BaseWorker: admin auth, record
+CRUD with simple filters, collection schemas for the startup check, plus
+UNIQUE indexes so the (job, attempt) claim on `job_claims` behaves like the
+real database.
+
+Multipart record creation stores file fields in memory (chunked request
+bodies are accepted, as sent by streamed uploads) and serves them back
+from `/api/files/<collection>/<record>/<filename>`.
+
+`/api/realtime` speaks the PocketBase SSE protocol (PB_CONNECT, then one event
+per record change on subscribed collections); `drop_realtime()` closes every
+open stream so fallback paths can be exercised.
+
+Filter support is deliberately small: `field='value'` clauses on the same field
+are OR-ed (as in `(type='a' || type='b')`), every other clause is AND-ed.
+"""
+import json
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+CLAUSE_RE = re.compile(r"(\w+)\s*(!=|>=|<=|=|<|>)\s*('([^']*)'|[\w.:-]+)")
+
+DEFAULT_UNIQUE = {"job_claims": ("job", "attempt")}
+
+# Served from /api/collections/<name> (what scripts/setup_job_claims.py creates)
+DEFAULT_SCHEMA = {
+    "jobs": ["type", "status", "params", "result", "error", "user_id", "worker_id", "started_at",
+             "completed_at", "lease_token", "attempt", "lease_expires_at", "external_job_id",
+             "external_endpoint_id", "cancel_requested"],
+    "job_claims": ["job", "attempt", "worker_id", "lease_token"],
+}
+
+
+def _parse_filter(filter_str):
+    clauses = []
+    for field, op, raw, quoted in CLAUSE_RE.findall(filter_str or ""):
+        value = quoted if raw.startswith("'") else raw
+        if not raw.startswith("'"):
+            try:
+                value = float(raw)
+            except ValueError:
+                value = {"true": True, "false": False}.get(raw, raw)
+        clauses.append((field, op, value))
+    return clauses
+
+
+def _compare(actual, op, expected):
+    if isinstance(expected, float):
+        try:
+            actual = float(actual or 0)
+        except (TypeError, ValueError):
+            return False
+    elif actual is None:
+        actual = ""
+    if op == "=":
+        return actual == expected
+    if op == "!=":
+        return actual != expected
+    if op == "<":
+        return actual < expected
+    if op == ">":
+        return actual > expected
+    if op == "<=":
+        return actual <= expected
+    return actual >= expected
+
+
+def _matches(record, clauses):
+    equals = {}
+    for field, op, value in clauses:
+        if op == "=":
+            equals.setdefault(field, []).append(value)
+        elif not _compare(record.get(field), op, value):
+            return False
+    return all(any(_compare(record.get(f), "=", v) for v in values)
+               for f, values in equals.items())
+
+
+class FakePocketBase:
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=0, unique=None, schema=None):
+        self.latency = latency_ms / 1000.0
+        self.unique = unique or DEFAULT_UNIQUE
+        self.schema = DEFAULT_SCHEMA if schema is None else schema
+        self.collections = {}
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.realtime_clients = {}
+        # (collection, record id, filename) -> bytes
+        self.files = {}
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self.url
+
+    def stop(self):
+        self.drop_realtime()
+        self.server.shutdown()
+        self.server.server_close()
+
+    # --- record helpers (also used directly by scripts) ---
+
+    def create(self, collection, data):
+        with self.lock:
+            records = self.collections.setdefault(collection, {})
+            keys = self.unique.get(collection)
+            if keys:
+                wanted = tuple(data.get(k) for k in keys)
+                for existing in records.values():
+                    if tuple(existing.get(k) for k in keys) == wanted:
+                        return None
+            now = datetime.utcnow().isoformat(sep=" ", timespec="microseconds") + "Z"
+            record = {
+                "id": data.get("id") or uuid.uuid4().hex[:15],
+                "collectionId": collection,
+                "collectionName": collection,
+                "created": now,
+                "updated": now,
+            }
+            record.update({k: v for k, v in data.items() if k != "id"})
+            records[record["id"]] = record
+        self._broadcast(collection, "create", record)
+        return dict(record)
+
+    def update(self, collection, record_id, data):
+        with self.lock:
+            record = self.collections.get(collection, {}).get(record_id)
+            if record is None:
+                return None
+            record.update({k: v for k, v in data.items() if k != "id"})
+            record["updated"] = datetime.utcnow().isoformat(sep=" ", timespec="microseconds") + "Z"
+        self._broadcast(collection, "update", record)
+        return dict(record)
+
+    def get(self, collection, record_id):
+        with self.lock:
+            record = self.collections.get(collection, {}).get(record_id)
+            return dict(record) if record else None
+
+    def delete(self, collection, record_id):
+        with self.lock:
+            return self.collections.get(collection, {}).pop(record_id, None) is not None
+
+    def list(self, collection, filter_str=None, sort=None):
+        clauses = _parse_filter(filter_str)
+        with self.lock:
+            items = [dict(r) for r in self.collections.get(collection, {}).values()
+                     if _matches(r, clauses)]
+        for key in reversed([k.strip() for k in (sort or "").split(",") if k.strip()]):
+            items.sort(key=lambda r: str(r.get(key.lstrip("+-"), "")), reverse=key.startswith("-"))
+        return items
+
+    # --- realtime ---
+
+    def _broadcast(self, collection, action, record):
+        for client in list(self.realtime_clients.values()):
+            if collection in client["topics"]:
+                client["queue"].put((collection, {"action": action, "record": dict(record)}))
+
+    def drop_realtime(self):
+        for client in list(self.realtime_clients.values()):
+            client["queue"].put(None)
+
+    # --- HTTP layer ---
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _raw_body(self):
+                if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                    chunks = []
+                    while True:
+                        size = int(self.rfile.readline().split(b";")[0], 16)
+                        if size == 0:
+                            self.rfile.readline()
+                            return b"".join(chunks)
+                        chunks.append(self.rfile.read(size))
+                        self.rfile.readline()
+                length = int(self.headers.get("Content-Length") or 0)
+                return self.rfile.read(length) if length else b""
+
+            def _body(self):
+                raw = self._raw_body()
+                content_type = self.headers.get("Content-Type", "")
+                if content_type.startswith("multipart/form-data"):
+                    message = BytesParser(policy=HTTP).parsebytes(
+                        f"Content-Type: {content_type}\r\n\r\n".encode() + raw)
+                    body, files = {}, {}
+                    for part in message.iter_parts():
+                        name = part.get_param("name", header="content-disposition")
+                        if part.get_filename():
+                            files[name] = (part.get_filename(), part.get_payload(decode=True))
+                        else:
+                            body[name] = part.get_content().strip()
+                    return body, files
+                return (json.loads(raw) if raw else {}), {}
+
+            def _route(self):
+                fake.request_count += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+                parsed = urlparse(self.path)
+                parts = [p for p in parsed.path.split("/") if p]
+                return parts, parse_qs(parsed.query)
+
+            def _stream_realtime(self):
+                client_id = uuid.uuid4().hex
+                client = {"queue": queue.Queue(), "topics": set()}
+                fake.realtime_clients[client_id] = client
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                try:
+                    self._write_event("PB_CONNECT", {"clientId": client_id})
+                    while True:
+                        try:
+                            item = client["queue"].get(timeout=1)
+                        except queue.Empty:
+                            continue
+                        if item is None:
+                            break
+                        self._write_event(*item)
+                except OSError:
+                    pass
+                finally:
+                    fake.realtime_clients.pop(client_id, None)
+
+            def _write_event(self, event, data):
+                self.wfile.write(f"event:{event}\ndata:{json.dumps(data)}\n\n".encode())
+                self.wfile.flush()
+
+            def do_POST(self):
+                parts, _ = self._route()
+                body, files = self._body()
+                for field, (filename, _) in files.items():
+                    stem, ext = os.path.splitext(filename)
+                    body[field] = f"{stem}_{uuid.uuid4().hex[:10]}{ext}"
+                if parts == ["api", "realtime"]:
+                    client = fake.realtime_clients.get(body.get("clientId"))
+                    if client is None:
+                        return self._send(404, {"code": 404, "message": "Missing or invalid client id."})
+                    client["topics"] = set(body.get("subscriptions") or [])
+                    self.send_response(204)
+                    self.end_headers()
+                    return
+                if parts[:3] == ["api", "admins", "auth-with-password"]:
+                    return self._send(200, {"token": "fake-admin-token",
+                                            "admin": {"id": "admin", "email": body.get("identity")}})
+                if len(parts) == 4 and parts[:2] == ["api", "collections"] and parts[3] == "records":
+                    record = fake.create(parts[2], body)
+                    if record is None:
+                        return self._send(400, {"code": 400, "message": "Failed to create record.",
+                                                "data": {"job": {"code": "validation_not_unique"}}})
+                    for field, (_, content) in files.items():
+                        fake.files[(parts[2], record["id"], record[field])] = content
+                    return self._send(200, record)
+                self._send(404, {"code": 404, "message": "Not found."})
+
+            def do_PATCH(self):
+                parts, _ = self._route()
+                if len(parts) == 5 and parts[3] == "records":
+                    record = fake.update(parts[2], parts[4], self._body()[0])
+                    if record is None:
+                        return self._send(404, {"code": 404, "message": "Not found."})
+                    return self._send(200, record)
+                self._send(404, {"code": 404, "message": "Not found."})
+
+            def do_DELETE(self):
+                parts, _ = self._route()
+                if len(parts) == 5 and parts[3] == "records" and fake.delete(parts[2], parts[4]):
+                    self.send_response(204)
+                    self.end_headers()
+                    return
+                self._send(404, {"code": 404, "message": "Not found."})
+
+            def do_GET(self):
+                parts, query = self._route()
+                if parts == ["api", "realtime"]:
+                    return self._stream_realtime()
+                if len(parts) == 5 and parts[:2] == ["api", "files"]:
+                    content = fake.files.get(tuple(parts[2:]))
+                    if content is None:
+                        return self._send(404, {"code": 404, "message": "Not found."})
+                    self.send_response(200)
+                    self.send_header("Content-Length", str(len(content)))
+                    self.end_headers()
+                    self.wfile.write(content)
+                    return
+                if len(parts) == 3 and parts[:2] == ["api", "collections"]:
+                    fields = fake.schema.get(parts[2])
+                    if fields is None:
+                        return self._send(404, {"code": 404, "message": "Not found."})
+                    return self._send(200, {"name": parts[2], "schema": [{"name": f} for f in fields]})
+                if len(parts) == 5 and parts[3] == "records":
+                    record = fake.get(parts[2], parts[4])
+                    if record is None:
+                        return self._send(404, {"code": 404, "message": "Not found."})
+                    return self._send(200, record)
+                if len(parts) == 4 and parts[3] == "records":
+                    items = fake.list(parts[2], query.get("filter", [None])[0], query.get("sort", [None])[0])
+                    page = int(query.get("page", ["1"])[0])
+                    per_page = int(query.get("perPage", ["30"])[0])
+                    start = (page - 1) * per_page
+                    return self._send(200, {
+                        "page": page,
+                        "perPage": per_page,
+                        "totalItems": len(items),
+                        "totalPages": (len(items) + per_page - 1) // per_page,
+                        "items": items[start:start + per_page]
+                    })
+                self._send(404, {"code": 404, "message": "Not found."})
+
+        return Handler
+
+
+if __name__ == "__main__":
+    fake = FakePocketBase(port=8090)
+    print(f"Fake PocketBase listening on {fake.start()}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        fake.stop()
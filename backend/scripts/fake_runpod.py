@@ -0,0 +1,246 @@
+"""
+In-memory RunPod serverless stand-in for local benchmarks and verification scripts.
+
+Serves /v2/{endpoint}/run, /status/{id}, /cancel/{id} and /health. Each
+submitted job completes after `job_seconds` with a tiny PNG as `image_base64`
+unless it is cancelled first; jobs sent with a `webhook` get the final status
+POSTed there, like RunPod does. A job with a `batch` input (handler_multi's
+batched sampling) takes `batch_item_seconds` longer per extra item and
+returns one PNG per item in `images`, each as wide as the item's prompt is
+long, so callers can tell which image they got. `latency_ms` delays every request to model
+the API round-trip. Point the worker at it with
+RUNPOD_API_BASE=http://127.0.0.1:<port>/v2.
+
+Endpoints registered with add_endpoint() have limited capacity: workersMin
+warm workers (or one worker that boots for `cold_start` seconds) run jobs
+FIFO, each taking the endpoint's `job_seconds`. Unregistered endpoints run
+every job at once.
+
+/graphql answers the two operations the worker uses: listing
+`myself { endpoints }` and the `saveEndpoint` mutation. Every save is
+recorded in `saved_endpoints` (use
+RUNPOD_GRAPHQL_URL=http://127.0.0.1:<port>/graphql).
+"""
+import base64
+import json
+import threading
+import time
+import urllib.request
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench_image_result import make_png
+
+# 1x1 transparent PNG
+TINY_PNG = base64.b64encode(bytes.fromhex(
+    "89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489"
+    "0000000d4944415478da63f8ffff3f0005fe02fea7d6a4f90000000049454e44ae426082"
+)).decode()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Benchmarks open dozens of connections at once; the default backlog of 5
+    # drops SYNs and adds 1s retransmit stalls
+    request_queue_size = 128
+
+
+class FakeRunPod:
+    def __init__(self, host="127.0.0.1", port=0, job_seconds=3.0, latency_ms=0, batch_item_seconds=0.0):
+        self.job_seconds = job_seconds
+        self.batch_item_seconds = batch_item_seconds
+        self.latency = latency_ms / 1000.0
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.requests = Counter()
+        self.webhooks_delivered = 0
+        self.endpoints = {}
+        self.saved_endpoints = []
+        # Endpoints that answer /run with 404, like a deleted endpoint
+        self.dead_endpoints = set()
+        # endpoint -> time each of its workers is next free
+        self.workers = {}
+        self.server = _Server((host, port), self._handler_class())
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v2"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @property
+    def graphql_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/graphql"
+
+    def add_endpoint(self, endpoint_id, **config):
+        self.endpoints[endpoint_id] = {"id": endpoint_id, "name": endpoint_id, "templateId": "tpl",
+                                       "gpuIds": "ADA_24", "workersMin": 0, "workersMax": 3,
+                                       "idleTimeout": 5, **config}
+
+    def graphql(self, body):
+        query = body.get("query", "")
+        if "saveEndpoint" in query:
+            endpoint = dict((body.get("variables") or {}).get("input") or {})
+            with self.lock:
+                self.endpoints.setdefault(endpoint.get("id"), {}).update(endpoint)
+                self.saved_endpoints.append(endpoint)
+                saved = dict(self.endpoints[endpoint.get("id")])
+            return {"data": {"saveEndpoint": saved}}
+        if "myself" in query:
+            return {"data": {"myself": {"endpoints": [dict(e) for e in self.endpoints.values()]}}}
+        return {"errors": [{"message": "unsupported query"}]}
+
+    def submit(self, endpoint_id, body):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        extra = self.batch_item_seconds * (len(body.get("input", {}).get("batch") or [None]) - 1)
+        with self.lock:
+            endpoint = self.endpoints.get(endpoint_id)
+            if endpoint is None:
+                start, end = now + 0.2, now + self.job_seconds + extra
+            else:
+                warm = endpoint.get("workersMin", 0)
+                free = self.workers.setdefault(endpoint_id, [])
+                while len(free) < max(warm, 1):
+                    free.append(now if len(free) < warm else now + endpoint.get("cold_start", 0))
+                worker = min(range(len(free)), key=free.__getitem__)
+                start = max(now, free[worker])
+                end = free[worker] = start + endpoint.get("job_seconds", self.job_seconds) + extra
+            self.jobs[job_id] = {
+                "endpoint": endpoint_id,
+                "input": body.get("input", {}),
+                "submitted": now,
+                "start": start,
+                "end": end
+            }
+        if body.get("webhook"):
+            threading.Timer(end - now, self._deliver_webhook, args=(job_id, body["webhook"])).start()
+        return job_id
+
+    def cancel(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            if "cancelled" not in job and time.time() < job["end"]:
+                job["cancelled"] = time.time()
+        return self.job_status(job_id)
+
+    def _deliver_webhook(self, job_id, url):
+        if "cancelled" in self.jobs.get(job_id, {}):
+            return
+        data = json.dumps(self.job_status(job_id)).encode()
+        request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+        try:
+            urllib.request.urlopen(request, timeout=10).read()
+            self.webhooks_delivered += 1
+        except Exception as e:
+            print(f"Fake RunPod: webhook delivery failed: {e}")
+
+    def job_status(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if "cancelled" in job:
+            return {"id": job_id, "status": "CANCELLED"}
+        now = time.time()
+        if now < job["end"]:
+            return {"id": job_id, "status": "IN_PROGRESS" if now >= job["start"] else "IN_QUEUE"}
+        batch = job["input"].get("batch")
+        if batch:
+            output = {"images": [{"image_base64": base64.b64encode(make_png(len(item["prompt"]))).decode(),
+                                  "prompt": item["prompt"], "seed": item.get("seed")} for item in batch]}
+        else:
+            output = {"image_base64": TINY_PNG}
+        return {"id": job_id, "status": "COMPLETED", "output": output,
+                "delayTime": int((job["start"] - job["submitted"]) * 1000),
+                "executionTime": int((job["end"] - job["start"]) * 1000)}
+
+    def health(self, endpoint_id):
+        endpoint = self.endpoints.get(endpoint_id)
+        warm = 1 if endpoint is None else max(endpoint.get("workersMin", 0), len(self.workers.get(endpoint_id, [])))
+        counts = Counter()
+        for job_id, job in list(self.jobs.items()):
+            if job["endpoint"] == endpoint_id:
+                counts[self.job_status(job_id)["status"]] += 1
+        return {
+            "jobs": {
+                "completed": counts["COMPLETED"],
+                "failed": counts["FAILED"],
+                "cancelled": counts["CANCELLED"],
+                "inProgress": counts["IN_PROGRESS"],
+                "inQueue": counts["IN_QUEUE"]
+            },
+            "workers": {"idle": max(0, warm - counts["IN_PROGRESS"]), "initializing": 0,
+                        "ready": max(0, warm - counts["IN_PROGRESS"]), "running": counts["IN_PROGRESS"]}
+        }
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _parts(self):
+                if fake.latency:
+                    time.sleep(fake.latency)
+                return [p for p in self.path.split("?")[0].split("/") if p]
+
+            def do_GET(self):
+                parts = self._parts()
+                if len(parts) >= 3 and parts[0] == "v2":
+                    fake.requests[parts[2]] += 1
+                if len(parts) == 3 and parts[2] == "health":
+                    return self._send(200, fake.health(parts[1]))
+                if len(parts) == 4 and parts[2] == "status":
+                    status = fake.job_status(parts[3])
+                    return self._send(200, status) if status else self._send(404, {"error": "job not found"})
+                self._send(404, {"error": "not found"})
+
+            def do_POST(self):
+                parts = self._parts()
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+                if len(parts) >= 3 and parts[0] == "v2":
+                    fake.requests[parts[2]] += 1
+                if parts == ["graphql"]:
+                    fake.requests["graphql"] += 1
+                    return self._send(200, fake.graphql(body))
+                if len(parts) == 3 and parts[2] == "run":
+                    if parts[1] in fake.dead_endpoints:
+                        return self._send(404, {"error": "endpoint not found"})
+                    return self._send(200, {"id": fake.submit(parts[1], body), "status": "IN_QUEUE"})
+                if len(parts) == 4 and parts[2] == "cancel":
+                    status = fake.cancel(parts[3])
+                    return self._send(200, status) if status else self._send(404, {"error": "job not found"})
+                self._send(404, {"error": "not found"})
+
+        return Handler
+
+
+if __name__ == "__main__":
+    fake = FakeRunPod(port=8091)
+    print(f"Fake RunPod listening on {fake.start()}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        fake.stop()
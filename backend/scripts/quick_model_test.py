@@ -11,6 +11,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from z_image_worker import ZImageWorker
+from endpoint_mapping import ENDPOINTS_PATH, endpoint_ids, load_endpoints
 
 # Quick explicit test prompts
 QUICK_PROMPTS = [
@@ -94,13 +95,11 @@ async def quick_test_model(model_id, endpoint_id, model_name):
     }
 
 async def main():
-    endpoints_path = Path(__file__).parent.parent / "endpoints.json"
-    if not endpoints_path.exists():
+    if not ENDPOINTS_PATH.exists():
         print("❌ endpoints.json not found")
         sys.exit(1)
     
-    with open(endpoints_path, 'r') as f:
-        endpoints = json.load(f)
+    endpoints = load_endpoints()
     
     config_path = Path(__file__).parent.parent.parent / "config" / "models.json"
     with open(config_path, 'r') as f:
@@ -112,8 +111,9 @@ async def main():
     
     results = []
     for model_id, info in endpoints.items():
-        result = await quick_test_model(model_id, info['endpoint_id'], model_names.get(model_id, model_id))
-        results.append(result)
+        for endpoint_id in endpoint_ids(info):
+            result = await quick_test_model(model_id, endpoint_id, model_names.get(model_id, model_id))
+            results.append(result)
     
     # Save results
     output = {
@@ -13,6 +13,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from z_image_worker import ZImageWorker
+from endpoint_mapping import ENDPOINTS_PATH, endpoint_ids, load_endpoints
 
 # Explicit test prompts (increasingly explicit)
 TEST_PROMPTS = [
@@ -31,16 +32,15 @@ async def test_single_model(model_id, endpoint_id=None):
     
     # Load endpoint mapping if available
     if not endpoint_id:
-        endpoints_path = Path(__file__).parent.parent / "endpoints.json"
-        if endpoints_path.exists():
-            with open(endpoints_path, 'r') as f:
-                endpoints = json.load(f)
-                if model_id in endpoints:
-                    endpoint_id = endpoints[model_id]['endpoint_id']
-                else:
-                    print(f"⚠️  Model {model_id} not found in endpoints.json")
-                    print("   Using default endpoint from RUNPOD_ENDPOINT_ID")
-                    endpoint_id = os.getenv("RUNPOD_ENDPOINT_ID")
+        if ENDPOINTS_PATH.exists():
+            endpoints = load_endpoints()
+            ids = endpoint_ids(endpoints.get(model_id, []))
+            if ids:
+                endpoint_id = ids[0]
+            else:
+                print(f"⚠️  Model {model_id} not found in endpoints.json")
+                print("   Using default endpoint from RUNPOD_ENDPOINT_ID")
+                endpoint_id = os.getenv("RUNPOD_ENDPOINT_ID")
         else:
             endpoint_id = os.getenv("RUNPOD_ENDPOINT_ID")
     
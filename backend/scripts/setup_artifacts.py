@@ -0,0 +1,47 @@
+"""
+Create the `artifacts` collection that holds generated files.
+
+ZImageWorker uploads each generated image as a file record here and puts
+only its key and URL in the job result. Files are not protected, so the URL
+in the result is all a client needs to load the image.
+"""
+import os
+import requests
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path='backend/.env')
+
+pb_url = os.getenv("PB_URL", "https://uncensored-engine-db.fly.dev")
+admin_email = os.getenv("PB_ADMIN_EMAIL", "admin@example.com")
+admin_pass = os.getenv("PB_ADMIN_PASS", "password123456")
+collection = os.getenv("ARTIFACT_COLLECTION", "artifacts")
+
+ARTIFACTS_SCHEMA = {
+    "name": collection,
+    "type": "base",
+    "schema": [
+        {"name": "job", "type": "text", "required": True},
+        {"name": "content_type", "type": "text"},
+        {"name": "file", "type": "file", "required": True,
+         "options": {"maxSelect": 1, "maxSize": 52428800, "protected": False}}
+    ],
+    "indexes": [
+        f"CREATE INDEX idx_{collection}_job ON {collection} (job)"
+    ]
+}
+
+def setup_artifacts():
+    auth_url = f"{pb_url}/api/admins/auth-with-password"
+    r = requests.post(auth_url, json={"identity": admin_email, "password": admin_pass})
+    r.raise_for_status()
+    headers = {"Authorization": r.json().get('token')}
+
+    r = requests.get(f"{pb_url}/api/collections/{collection}", headers=headers)
+    if r.status_code == 404:
+        r = requests.post(f"{pb_url}/api/collections", headers=headers, json=ARTIFACTS_SCHEMA)
+        print(f"Create {collection}: {r.status_code}")
+    else:
+        print(f"{collection} already exists")
+
+if __name__ == "__main__":
+    setup_artifacts()
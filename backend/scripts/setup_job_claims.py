@@ -0,0 +1,70 @@
+"""
+Create the `job_claims` collection and the lease fields on `jobs`.
+
+BaseWorker claims a job by inserting a (job, attempt) row into `job_claims`.
+The UNIQUE index on that pair is what makes the claim atomic across replicas.
+"""
+import os
+import requests
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path='backend/.env')
+
+pb_url = os.getenv("PB_URL", "https://uncensored-engine-db.fly.dev")
+admin_email = os.getenv("PB_ADMIN_EMAIL", "admin@example.com")
+admin_pass = os.getenv("PB_ADMIN_PASS", "password123456")
+
+CLAIMS_SCHEMA = {
+    "name": "job_claims",
+    "type": "base",
+    "schema": [
+        {"name": "job", "type": "text", "required": True},
+        {"name": "attempt", "type": "number"},
+        {"name": "worker_id", "type": "text"},
+        {"name": "lease_token", "type": "text"}
+    ],
+    "indexes": [
+        "CREATE UNIQUE INDEX idx_job_claims_job_attempt ON job_claims (job, attempt)"
+    ]
+}
+
+# Fields BaseWorker writes on the jobs record itself
+JOB_FIELDS = [
+    {"name": "lease_token", "type": "text"},
+    {"name": "attempt", "type": "number"},
+    {"name": "lease_expires_at", "type": "date"},
+    {"name": "external_job_id", "type": "text"},
+    {"name": "external_endpoint_id", "type": "text"},
+    # Set by the app to ask the owning worker to cancel a job
+    {"name": "cancel_requested", "type": "bool"}
+]
+
+def setup_job_claims():
+    auth_url = f"{pb_url}/api/admins/auth-with-password"
+    r = requests.post(auth_url, json={"identity": admin_email, "password": admin_pass})
+    r.raise_for_status()
+    headers = {"Authorization": r.json().get('token')}
+
+    # 1. Claims collection
+    r = requests.get(f"{pb_url}/api/collections/job_claims", headers=headers)
+    if r.status_code == 404:
+        r = requests.post(f"{pb_url}/api/collections", headers=headers, json=CLAIMS_SCHEMA)
+        print(f"Create job_claims: {r.status_code}")
+    else:
+        print("job_claims already exists")
+
+    # 2. Lease fields on jobs
+    r = requests.get(f"{pb_url}/api/collections/jobs", headers=headers)
+    r.raise_for_status()
+    jobs = r.json()
+    existing = {f['name'] for f in jobs.get('schema', [])}
+    missing = [f for f in JOB_FIELDS if f['name'] not in existing]
+    if missing:
+        r = requests.patch(f"{pb_url}/api/collections/jobs", headers=headers,
+                           json={"schema": jobs['schema'] + missing})
+        print(f"Add {[f['name'] for f in missing]} to jobs: {r.status_code}")
+    else:
+        print("jobs already has lease fields")
+
+if __name__ == "__main__":
+    setup_job_claims()
@@ -4,16 +4,19 @@ Sync endpoint IDs from backend/endpoints.json to frontend MODELS object.
 This ensures the frontend uses the correct endpoint IDs.
 """
 import json
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from endpoint_mapping import ENDPOINTS_PATH, endpoint_ids, endpoint_name, load_endpoints
+
 # Load endpoints
-endpoints_path = Path(__file__).parent.parent / "endpoints.json"
-if not endpoints_path.exists():
+if not ENDPOINTS_PATH.exists():
     print("❌ endpoints.json not found")
     exit(1)
 
-with open(endpoints_path, 'r') as f:
-    endpoints = json.load(f)
+endpoints = load_endpoints()
 
 # Load model config for names
 config_path = Path(__file__).parent.parent.parent / "config" / "models.json"
@@ -26,11 +29,13 @@ model_configs = {m['id']: m for m in config.get('models', [])}
 models_js = "        const MODELS = {\n"
 for model_id, info in endpoints.items():
     model_config = model_configs.get(model_id, {})
-    name = info.get('name') or model_config.get('name', model_id)
-    endpoint_id = info.get('endpoint_id')
+    name = endpoint_name(info) or model_config.get('name', model_id)
+    ids = endpoint_ids(info)
+    # Several endpoints: leave it unpinned so the backend router picks one per job
+    endpoint_id = f"'{ids[0]}'" if len(ids) == 1 else 'null'
     uncensored_level = model_config.get('uncensored_level', 'medium')
     
-    models_js += f"            '{model_id}': {{ provider: 'runpod', endpoint_id: '{endpoint_id}', name: '{name}', uncensored_level: '{uncensored_level}' }},\n"
+    models_js += f"            '{model_id}': {{ provider: 'runpod', endpoint_id: {endpoint_id}, name: '{name}', uncensored_level: '{uncensored_level}' }},\n"
 
 # Add models that don't have endpoints yet (use default)
 default_endpoint = "4znje87s0eaktv"  # The existing endpoint we found
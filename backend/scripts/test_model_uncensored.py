@@ -14,6 +14,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from z_image_worker import ZImageWorker
+from endpoint_mapping import ENDPOINTS_PATH, endpoint_ids, load_endpoints
 
 # Load test prompts
 CONFIG_PATH = Path(__file__).parent.parent.parent / "config" / "models.json"
@@ -118,13 +119,11 @@ async def main():
         sys.exit(1)
     
     # Load endpoint mapping
-    endpoints_path = Path(__file__).parent.parent / "endpoints.json"
-    if not endpoints_path.exists():
+    if not ENDPOINTS_PATH.exists():
         print("❌ ERROR: endpoints.json not found. Run setup_all_models.py first.")
         sys.exit(1)
     
-    with open(endpoints_path, 'r') as f:
-        endpoints = json.load(f)
+    endpoints = load_endpoints()
     
     print("🧪 UNCENSORED MODEL TEST SUITE")
     print("=" * 60)
@@ -132,9 +131,9 @@ async def main():
     all_results = []
     
     for model_id, info in endpoints.items():
-        endpoint_id = info['endpoint_id']
-        result = await test_model_uncensored(model_id, endpoint_id, runpod_api_key)
-        all_results.append(result)
+        for endpoint_id in endpoint_ids(info):
+            result = await test_model_uncensored(model_id, endpoint_id, runpod_api_key)
+            all_results.append(result)
     
     # Save results
     results_path = Path(__file__).parent.parent / "uncensored_test_results.json"
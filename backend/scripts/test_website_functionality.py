@@ -14,6 +14,7 @@ from datetime import datetime
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from z_image_worker import ZImageWorker
+from endpoint_mapping import ENDPOINTS_PATH, endpoint_ids, load_endpoints
 
 # Explicit test prompts
 TEST_PROMPTS = [
@@ -97,13 +98,11 @@ async def main():
     print("Testing all models with explicit language to see what works...\n")
     
     # Load endpoints
-    endpoints_path = Path(__file__).parent.parent / "endpoints.json"
-    if not endpoints_path.exists():
+    if not ENDPOINTS_PATH.exists():
         print("❌ endpoints.json not found")
         sys.exit(1)
     
-    with open(endpoints_path, 'r') as f:
-        endpoints = json.load(f)
+    endpoints = load_endpoints()
     
     # Load model names
     config_path = Path(__file__).parent.parent.parent / "config" / "models.json"
@@ -115,12 +114,13 @@ async def main():
     # Test each model
     all_results = []
     for model_id, info in endpoints.items():
-        result = await test_model_functionality(
-            model_id, 
-            info['endpoint_id'], 
-            model_names.get(model_id, model_id)
-        )
-        all_results.append(result)
+        for endpoint_id in endpoint_ids(info):
+            result = await test_model_functionality(
+                model_id, 
+                endpoint_id, 
+                model_names.get(model_id, model_id)
+            )
+            all_results.append(result)
     
     # Also test models without endpoints (use default)
     default_endpoint = "4znje87s0eaktv"
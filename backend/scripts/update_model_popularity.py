@@ -0,0 +1,57 @@
+"""
+Write per-model popularity into config/models.json.
+
+Counts the image jobs of the last POPULARITY_DAYS days (default 7) per
+model_id and stores the count as each model's `popularity`. The ComfyUI
+worker preloads the PRELOAD_TOP_N most popular checkpoints at startup, so
+rerun this (and rebuild the worker image) when traffic shifts.
+"""
+import json
+import os
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import requests
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path='backend/.env')
+
+pb_url = os.getenv("PB_URL", "https://uncensored-engine-db.fly.dev")
+admin_email = os.getenv("PB_ADMIN_EMAIL", "admin@example.com")
+admin_pass = os.getenv("PB_ADMIN_PASS", "password123456")
+days = int(os.getenv("POPULARITY_DAYS", "7"))
+CONFIG_PATH = Path(__file__).parent.parent.parent / "config" / "models.json"
+
+def count_jobs(headers):
+    since = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+    counts = Counter()
+    page = 1
+    while True:
+        r = requests.get(f"{pb_url}/api/collections/jobs/records", headers=headers, params={
+            "filter": f'created >= "{since}" && type="image_generation"', "fields": "params", "perPage": 500, "page": page
+        })
+        r.raise_for_status()
+        data = r.json()
+        for record in data.get('items', []):
+            counts[(record.get('params') or {}).get('model_id', 'pony-v6')] += 1
+        if page >= data.get('totalPages', 1):
+            return counts
+        page += 1
+
+def update_model_popularity():
+    auth_url = f"{pb_url}/api/admins/auth-with-password"
+    r = requests.post(auth_url, json={"identity": admin_email, "password": admin_pass})
+    r.raise_for_status()
+    headers = {"Authorization": r.json().get('token')}
+
+    counts = count_jobs(headers)
+    config = json.loads(CONFIG_PATH.read_text())
+    for model in config.get('models', []):
+        model['popularity'] = counts.get(model['id'], 0)
+        print(f"{model['id']}: {model['popularity']} jobs in the last {days} days")
+    CONFIG_PATH.write_text(json.dumps(config, indent=2) + "\n")
+    print(f"Updated {CONFIG_PATH}")
+
+if __name__ == "__main__":
+    update_model_popularity()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Verify that generated images are stored as files, not inside job results.
+
+Runs against the fake PocketBase (which keeps file fields in memory) and the
+fake RunPod:
+  1. a RunPod job's result references the image by artifact key/URL, the
+     result JSON stays small, and the URL serves the original bytes,
+  2. uploading a large base64 image streams it: peak memory stays near one
+     chunk instead of the image size (measured against a fake PocketBase in
+     a subprocess, so its own parsing is not counted),
+  3. an image URL is streamed through into the store with its type sniffed,
+     and a URL that is not an image is rejected without storing anything,
+  4. if the store is unreachable the image falls back to an inline data: URI.
+"""
+import asyncio
+import base64
+import json
+import logging
+import os
+import subprocess
+import sys
+import tracemalloc
+from pathlib import Path
+
+BACKEND = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import httpx
+from fake_pocketbase import FakePocketBase
+from fake_runpod import FakeRunPod, TINY_PNG
+from bench_image_result import make_png
+
+
+async def main():
+    fake = FakeRunPod(job_seconds=0.3)
+    fake_pb = FakePocketBase()
+    os.environ.update({
+        "PB_URL": fake_pb.start(),
+        "RUNPOD_API_BASE": fake.start(),
+        "RUNPOD_API_KEY": "fake-key",
+        "PROVIDER_FALLBACKS": "",
+    })
+    os.chdir(BACKEND)
+    from artifact_store import ArtifactStore
+    from image_result import ImageResult
+    from job_store import JobStore
+    from z_image_worker import ZImageWorker
+
+    worker = ZImageWorker()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    worker.runpod_poller.min_interval = 0.2
+
+    # 1: full job
+    input_data = {"provider": "runpod", "endpoint_id": "ep-art", "model_id": "pony-v6", "prompt": "artifact check"}
+    task = {"id": "job-art", "type": "image_generation", "input": input_data}
+    fake_pb.create("jobs", {"id": task["id"], "type": task["type"], "status": "processing", "params": input_data})
+    result = await worker.generate_with_fallback(task, input_data, worker.get_provider_chain(input_data))
+    artifact = (result.get('artifacts') or [{}])[0]
+    async with httpx.AsyncClient() as http:
+        served = (await http.get(result['images'][0]['url'])).content if result.get('success') else b""
+    result_size = len(json.dumps(result))
+
+    # 2: streamed upload of a large image
+    big = make_png(1024)
+    image = ImageResult.from_base64(base64.b64encode(big).decode())
+    remote_pb = subprocess.Popen(
+        [sys.executable, "-u", "-c",
+         "import time; from fake_pocketbase import FakePocketBase; print(FakePocketBase().start()); time.sleep(120)"],
+        cwd=Path(__file__).parent, stdout=subprocess.PIPE, text=True)
+    remote = ArtifactStore(JobStore(remote_pb.stdout.readline().strip()))
+    await remote.put_image("job-big", "warmup.png", image)
+    tracemalloc.start()
+    stored_remote = await remote.put_image("job-big", "big.png", image)
+    upload_peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    async with httpx.AsyncClient() as http:
+        big_ok = (await http.get(stored_remote['url'])).content == big
+    await remote.store.close()
+    remote_pb.kill()
+    stored_big = await worker.artifacts.put_image("job-big", "big.png", image)
+
+    # 3: URL streamed through the store
+    via_url = await worker.artifacts.put_url("job-url", "from_url", stored_big['url'])
+    url_ok = fake_pb.files[("artifacts", *via_url['key'].split('/'))] == big
+    fake_pb.create("jobs", {"id": "not-an-image"})
+    files_before = len(fake_pb.files)
+    try:
+        await worker.artifacts.put_url("job-bad", "bad", f"{fake_pb.url}/api/collections/jobs/records/not-an-image")
+        rejected = False
+    except ValueError:
+        rejected = len(fake_pb.files) == files_before
+
+    # 4: store down -> inline
+    worker.artifacts = ArtifactStore(JobStore("http://127.0.0.1:9"))
+    inline = await worker._image_output({"id": "job-inline"}, TINY_PNG, 'runpod', (1, 1))
+
+    await worker.shutdown()
+    fake.stop()
+    fake_pb.stop()
+
+    checks = [
+        (f"job result references the artifact ({artifact.get('key')})",
+         result.get('success') and artifact.get('url') == result['images'][0]['url']
+         and '/api/files/artifacts/' in artifact['url']),
+        (f"result JSON is small ({result_size} bytes)", result_size < 1000),
+        ("artifact URL serves the original image", served == base64.b64decode(TINY_PNG)),
+        (f"large upload streamed ({len(big) / 1e6:.2f} MB image, peak {upload_peak:.2f} MB)",
+         big_ok and upload_peak < len(big) / 1e6 / 2),
+        (f"URL streamed into the store ({via_url['content_type']}, {via_url['size']})",
+         url_ok and via_url['content_type'] == 'image/png' and via_url['size'] == (1024, 1024)),
+        ("non-image URL rejected, nothing stored", rejected),
+        ("unreachable store falls back to inline data: URI",
+         inline['images'][0]['url'].startswith('data:image/png;base64,') and 'key' not in inline['artifacts'][0]),
+    ]
+    print("\n" + "=" * 60)
+    for label, ok in checks:
+        print(f"{'✅ PASS' if ok else '❌ FAIL'}: {label}")
+    print("=" * 60)
+    return 0 if all(ok for _, ok in checks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Verify in-flight coalescing of identical deterministic jobs.
+
+Runs ZImageWorker.process_task against the fake RunPod (result cache off,
+so only coalescing can dedupe):
+  1. five concurrent jobs with the same seed and settings submit one RunPod
+     job, and all five get its image,
+  2. jobs with different seeds still run separately,
+  3. if the leader is cancelled, its RunPod job is cancelled and a waiting
+     job takes over and completes the generation for the rest.
+"""
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_pocketbase import FakePocketBase
+from fake_runpod import FakeRunPod
+
+
+async def main():
+    fake = FakeRunPod(job_seconds=1.0)
+    fake_pb = FakePocketBase()
+    os.environ.update({
+        "PB_URL": fake_pb.start(),
+        "RUNPOD_API_BASE": fake.start(),
+        "RUNPOD_API_KEY": "fake-key",
+        "RUNPOD_ENDPOINT_ID": "ep-coalesce",
+        "PROVIDER_FALLBACKS": "",
+        "ARTIFACT_STORE": "inline",
+        "RESULT_CACHE_MAX_MB": "0",
+    })
+    os.chdir(BACKEND)
+    from z_image_worker import ZImageWorker
+
+    worker = ZImageWorker()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    worker.runpod_poller.min_interval = 0.2
+    count = 0
+
+    def job(seed):
+        nonlocal count
+        count += 1
+        input_data = {"provider": "runpod", "endpoint_id": "ep-coalesce", "model_id": "pony-v6",
+                      "prompt": "coalesce check", "seed": seed}
+        task = {"id": f"job-{count}", "type": "image_generation", "input": input_data}
+        fake_pb.create("jobs", {"id": task["id"], "type": task["type"], "status": "processing", "params": input_data})
+        return asyncio.create_task(worker.process_task(task))
+
+    # 1: identical jobs
+    runs = fake.requests["run"]
+    same = await asyncio.gather(*[job(7) for _ in range(5)])
+    same_runs = fake.requests["run"] - runs
+
+    # 2: different seeds
+    runs = fake.requests["run"]
+    distinct = await asyncio.gather(*[job(100 + n) for n in range(3)])
+    distinct_runs = fake.requests["run"] - runs
+
+    # 3: leader cancelled mid-flight
+    runs = fake.requests["run"]
+    leader = job(9)
+    await asyncio.sleep(0.3)
+    followers = [job(9) for _ in range(3)]
+    await asyncio.sleep(0.3)
+    leader.cancel()
+    await asyncio.gather(leader, return_exceptions=True)
+    takeover = await asyncio.gather(*followers)
+    takeover_runs = fake.requests["run"] - runs
+    cancelled = sum(1 for j in list(fake.jobs) if fake.job_status(j)["status"] == "CANCELLED")
+
+    await worker.shutdown()
+    fake.stop()
+    fake_pb.stop()
+
+    checks = [
+        (f"5 identical jobs -> {same_runs} RunPod job", same_runs == 1),
+        ("all identical jobs got the image",
+         all(r.get('success') for r in same) and len({r['images'][0]['url'] for r in same}) == 1
+         and sum(1 for r in same if r['output'].get('coalesced_with')) == 4),
+        (f"3 distinct seeds -> {distinct_runs} RunPod jobs", distinct_runs == 3 and all(r.get('success') for r in distinct)),
+        (f"leader cancel: RunPod job cancelled ({cancelled})", cancelled == 1),
+        (f"a follower took over ({takeover_runs} submissions), all followers succeeded",
+         takeover_runs == 2 and all(r.get('success') for r in takeover)),
+        ("no generations left registered", not worker._generations),
+    ]
+    print("\n" + "=" * 60)
+    for label, ok in checks:
+        print(f"{'✅ PASS' if ok else '❌ FAIL'}: {label}")
+    print("=" * 60)
+    return 0 if all(ok for _, ok in checks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Verify tail-latency hedging of RunPod jobs locally.
+
+Runs ZImageWorker.generate_with_fallback against the fake RunPod, where
+each "ep-cold-N" endpoint has no warm workers and a long cold start, with OpenRouter as the
+hedge provider (replaced by an in-process stub). The RunPod latency tracker
+is seeded with fast samples so the p95 is known:
+  1. a job stuck behind the cold start is hedged after the p95 and the
+     hedge's result is returned,
+  2. the losing RunPod job is cancelled on RunPod,
+  3. a fast job on a warm endpoint finishes before the p95 and is never hedged,
+  4. the per-user hedge cap stops further hedges for that user, while
+     another user can still hedge.
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_pocketbase import FakePocketBase
+from fake_runpod import FakeRunPod
+
+HEDGE_DELAY = 2.5
+
+
+async def main():
+    fake = FakeRunPod(job_seconds=0.3)
+    for n in (1, 3, 4, 5):
+        fake.add_endpoint(f"ep-cold-{n}", workersMin=0, cold_start=30, job_seconds=0.3)
+    fake_pb = FakePocketBase()
+    os.environ.update({
+        "PB_URL": fake_pb.start(),
+        "RUNPOD_API_BASE": fake.start(),
+        "RUNPOD_API_KEY": "fake-key",
+        "RESULT_CACHE_MAX_MB": "0",
+        "PROVIDER_FALLBACKS": "",
+        "HEDGE_PROVIDER": "openrouter",
+        "HEDGE_MIN_SAMPLES": "5",
+        "HEDGE_MIN_DELAY": "0",
+        "HEDGE_MAX_PER_USER_PER_HOUR": "2",
+    })
+    os.chdir(BACKEND)
+    from z_image_worker import ZImageWorker
+
+    worker = ZImageWorker()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    # Poll quickly so the warm-endpoint job completes well inside the p95
+    worker.runpod_poller.min_interval = 0.2
+    worker.runpod_poller.tick = 0.2
+    stub_calls = []
+
+    async def openrouter_stub(task, input_data):
+        stub_calls.append(task['id'])
+        await asyncio.sleep(0.1)
+        return {'success': True, 'output': {'provider': 'openrouter'}, 'images': [{'url': 'data:,'}]}
+
+    worker.generate_with_openrouter = openrouter_stub
+    for _ in range(10):
+        worker.runpod_latency.record("pony-v6", HEDGE_DELAY)
+
+    async def job(n, endpoint=None, user="user-a"):
+        endpoint = endpoint or f"ep-cold-{n}"
+        input_data = {"provider": "runpod", "endpoint_id": endpoint, "model_id": "pony-v6",
+                      "prompt": f"hedge check {n}", "seed": n}
+        task = {"id": f"job-{n}", "type": "image_generation", "input": input_data, "user_id": user}
+        fake_pb.create("jobs", {"id": task["id"], "type": task["type"], "status": "processing", "params": input_data})
+        started = time.monotonic()
+        result = await worker.generate_with_fallback(task, input_data, worker.get_provider_chain(input_data))
+        return result, time.monotonic() - started
+
+    # 1 + 2: cold endpoint gets hedged, RunPod job cancelled
+    hedged, hedged_secs = await job(1)
+    cold_statuses = [fake.job_status(job_id)["status"] for job_id, j in fake.jobs.items() if j["endpoint"] == "ep-cold-1"]
+
+    # 3: warm endpoint finishes before the p95
+    fast, _ = await job(2, "ep-warm")
+    calls_after_fast = len(stub_calls)
+
+    # 4: user-a has one hedge left; the third cold job runs without one
+    await job(3)
+    capped_task = asyncio.create_task(job(4))
+    await asyncio.sleep(HEDGE_DELAY + 1.0)
+    capped_unhedged = not capped_task.done() and len(stub_calls) == calls_after_fast + 1
+    capped_task.cancel()
+    await asyncio.gather(capped_task, return_exceptions=True)
+    other_user, _ = await job(5, user="user-b")
+
+    await worker.shutdown()
+    fake.stop()
+    fake_pb.stop()
+
+    checks = [
+        (f"cold job answered by the hedge in {hedged_secs:.1f}s",
+         hedged.get('success') and hedged['output'].get('hedged_by') == 'openrouter' and hedged_secs < HEDGE_DELAY + 2),
+        (f"losing RunPod job cancelled ({cold_statuses})", cold_statuses == ["CANCELLED"]),
+        ("fast job not hedged", fast.get('success') and 'hedged_by' not in fast['output'] and calls_after_fast == 1),
+        ("per-user cap stops the third hedge", capped_unhedged),
+        ("another user can still hedge", other_user.get('output', {}).get('hedged_by') == 'openrouter'),
+        ("RunPod breaker not blamed for hedged jobs", worker.breakers["runpod"].snapshot()["failures"] == 0),
+    ]
+    print("\n" + "=" * 60)
+    for label, ok in checks:
+        print(f"{'✅ PASS' if ok else '❌ FAIL'}: {label}")
+    print("=" * 60)
+    return 0 if all(ok for _, ok in checks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Verify the job claim protocol against a local fake PocketBase.
+
+  1. two workers racing for one queued job: exactly one claims it,
+  2. if the job update fails after the claim row is inserted, the claim row
+     is deleted again and another worker can claim the job,
+  3. a 400 from the claims insert that is not a unique-index violation is
+     raised, not mistaken for a lost race,
+  4. a job cancelled while still queued is settled as cancelled by the
+     reap pass and can no longer be claimed,
+  5. the startup schema check refuses a database without `job_claims` or
+     without the lease fields on jobs.
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_pocketbase import DEFAULT_SCHEMA, FakePocketBase
+
+
+async def main():
+    fake = FakePocketBase()
+    os.environ["PB_URL"] = fake.start()
+    from base_worker import BaseWorker, CLAIMS_COLLECTION
+    from job_store import JobStoreError
+
+    class ClaimOnlyWorker(BaseWorker):
+        async def process_task(self, task):
+            return {'success': True}
+
+    first, second = workers = [ClaimOnlyWorker(task_types=['image_generation']) for _ in range(2)]
+    for worker in workers:
+        await worker._authenticate()
+
+    def queue_job():
+        return fake.create("jobs", {"type": "image_generation", "status": "queued",
+                                    "params": {"prompt": "claim"}, "user_id": "verify"})
+
+    # 1: race
+    raced = queue_job()
+    race = await asyncio.gather(*[w._acquire_claim(dict(raced)) for w in workers])
+
+    # 2: job update fails after the claim row went in
+    stuck = queue_job()
+    update_record = first.store.update_record
+
+    async def failing_update(collection, record_id, data):
+        if collection == 'jobs':
+            raise JobStoreError(503, "Service Unavailable")
+        return await update_record(collection, record_id, data)
+
+    first.store.update_record = failing_update
+    try:
+        await first._acquire_claim(dict(stuck))
+        update_raised = False
+    except JobStoreError:
+        update_raised = True
+    first.store.update_record = update_record
+    leftover = [c for c in fake.list(CLAIMS_COLLECTION) if c["job"] == stuck["id"]]
+    reclaimed = await second._acquire_claim(dict(stuck))
+
+    # 3: a 400 that isn't a duplicate claim
+    other = queue_job()
+    create_record = first.store.create_record
+
+    async def invalid_create(collection, data):
+        raise JobStoreError(400, "Failed to create record.", {"job": {"code": "validation_required"}})
+
+    first.store.create_record = invalid_create
+    try:
+        await first._acquire_claim(dict(other))
+        invalid_raised = False
+    except JobStoreError:
+        invalid_raised = True
+    first.store.create_record = create_record
+
+    # 4: cancelled before anyone claimed it
+    cancelled = fake.create("jobs", {"type": "image_generation", "status": "queued", "cancel_requested": True,
+                                     "params": {"prompt": "never mind"}, "user_id": "verify"})
+    settled = await first.cancel_queued_jobs()
+    cancelled_status = fake.get("jobs", cancelled["id"])["status"]
+    late_claim = await second._acquire_claim(dict(cancelled))
+
+    # 5: schema check
+    async def schema_error():
+        try:
+            await first._check_schema()
+        except RuntimeError as e:
+            return str(e)
+        return None
+
+    complete = await schema_error()
+    fake.schema = {"jobs": [f for f in DEFAULT_SCHEMA["jobs"] if f != "cancel_requested"]}
+    incomplete = await schema_error() or ""
+
+    for worker in workers:
+        await worker.store.close()
+    stuck_status = fake.get("jobs", stuck["id"])["status"]
+    fake.stop()
+
+    checks = [
+        ("two workers racing: exactly one claim", sum(1 for token in race if token) == 1),
+        ("failed job update is raised to the caller", update_raised),
+        ("failed job update: claim row deleted", not leftover),
+        ("failed job update: another worker can claim the job",
+         reclaimed is not None and stuck_status == "processing"),
+        ("non-unique 400 from the claims insert is raised", invalid_raised),
+        (f"queued cancel settled by the reap pass ({settled} job, status {cancelled_status})",
+         settled == 1 and cancelled_status == "cancelled"),
+        ("cancelled job can't be claimed afterwards", late_claim is None),
+        ("schema check passes with job_claims and the lease fields", complete is None),
+        ("schema check names the missing collection and field",
+         "'job_claims'" in incomplete and "jobs.cancel_requested" in incomplete),
+    ]
+    print("\n" + "=" * 60)
+    for label, ok in checks:
+        print(f"{'✅ PASS' if ok else '❌ FAIL'}: {label}")
+    print("=" * 60)
+    return 0 if all(ok for _, ok in checks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Verify job leases end to end against the fake PocketBase and fake RunPod.
+
+  1. a processing job whose lease expired is requeued as the next attempt,
+  2. once max attempts are used up it is failed instead,
+  3. a restarted worker re-adopts the job it owned and resumes its RunPod
+     job instead of submitting a second one,
+  4. lease handoff: a worker whose lease renewals stop getting through loses
+     the job to another worker, which resumes the same RunPod job and
+     completes it; the old owner must not cancel it on the way out.
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+BACKEND = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_pocketbase import FakePocketBase
+from fake_runpod import FakeRunPod
+
+EID = "ep-lease"
+
+
+async def wait_until(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.1)
+    return True
+
+
+async def main():
+    fake = FakeRunPod(job_seconds=4.0)
+    fake_pb = FakePocketBase()
+    os.environ.update({
+        "PB_URL": fake_pb.start(),
+        "RUNPOD_API_BASE": fake.start(),
+        "RUNPOD_API_KEY": "fake-key",
+        "RUNPOD_ENDPOINT_ID": EID,
+        "PROVIDER_FALLBACKS": "",
+        "ARTIFACT_STORE": "inline",
+        "RESULT_CACHE_MAX_MB": "0",
+        "WORKER_LEASE_TTL": "3",
+        "WORKER_REAPER_INTERVAL": "1",
+        "WORKER_MAX_ATTEMPTS": "3",
+    })
+    os.chdir(BACKEND)
+    from base_worker import pb_timestamp
+    from z_image_worker import ZImageWorker
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    params = {"provider": "runpod", "endpoint_id": EID, "model_id": "pony-v6", "prompt": "lease check", "seed": 7}
+
+    def make_worker(worker_id):
+        os.environ["WORKER_ID"] = worker_id
+        worker = ZImageWorker()
+        worker.runpod_poller.min_interval = 0.2
+        return worker
+
+    def status(job):
+        return fake_pb.get("jobs", job["id"])
+
+    def expired_job(attempt):
+        return fake_pb.create("jobs", {"type": "image_generation", "status": "processing", "params": params,
+                                       "user_id": "verify", "worker_id": "worker-gone", "attempt": attempt,
+                                       "lease_token": uuid.uuid4().hex, "lease_expires_at": pb_timestamp(-5)})
+
+    # 1 + 2: reaper
+    reaper = make_worker("worker-reaper")
+    await reaper._authenticate()
+    requeue, exhausted = expired_job(0), expired_job(2)
+    reaped = await reaper.reap_expired_leases()
+    requeued, failed = status(requeue), status(exhausted)
+    for job in (requeue, exhausted):
+        fake_pb.delete("jobs", job["id"])
+    await reaper.shutdown()
+
+    # 3: restart with a RunPod job already submitted
+    runpod_job = fake.submit(EID, {"input": params})
+    adopted = fake_pb.create("jobs", {"type": "image_generation", "status": "processing", "params": params,
+                                      "user_id": "verify", "worker_id": "worker-restart", "attempt": 0,
+                                      "lease_token": uuid.uuid4().hex, "lease_expires_at": pb_timestamp(3),
+                                      "external_job_id": runpod_job, "external_endpoint_id": EID})
+    runs_before = fake.requests["run"]
+    restarted = make_worker("worker-restart")
+    restarted_loop = asyncio.create_task(restarted.start())
+    await wait_until(lambda: status(adopted)["status"] != "processing", 20)
+    restart_runs = fake.requests["run"] - runs_before
+    adopted_final = status(adopted)
+    restarted.stop()
+    await restarted_loop
+
+    # 4: lease handoff
+    old_owner = make_worker("worker-old")
+    old_loop = asyncio.create_task(old_owner.start())
+    handed = fake_pb.create("jobs", {"type": "image_generation", "status": "queued", "params": params,
+                                     "user_id": "verify"})
+    await wait_until(lambda: status(handed).get("external_job_id"), 10)
+    handed_runpod_job = status(handed)["external_job_id"]
+    runs_before = fake.requests["run"]
+
+    # Partition the old owner: its lease renewals and new claims stop landing
+    update_record = old_owner.store.update_record
+
+    async def dropped_renewal(collection, record_id, data):
+        if set(data) == {"lease_expires_at"}:
+            return {}
+        return await update_record(collection, record_id, data)
+
+    async def no_claims(limit=None):
+        return []
+
+    old_owner.store.update_record = dropped_renewal
+    old_owner.claim_tasks = no_claims
+    new_owner = make_worker("worker-new")
+    new_loop = asyncio.create_task(new_owner.start())
+    await wait_until(lambda: status(handed)["status"] in ("completed", "failed"), 30)
+    handed_final = status(handed)
+    handoff_runs = fake.requests["run"] - runs_before
+    runpod_final = fake.job_status(handed_runpod_job)["status"]
+
+    for worker, loop in ((old_owner, old_loop), (new_owner, new_loop)):
+        worker.stop()
+        await loop
+    fake.stop()
+    fake_pb.stop()
+
+    checks = [
+        (f"expired lease requeued as attempt {requeued.get('attempt')}",
+         requeued["status"] == "queued" and requeued.get("attempt") == 1 and not requeued.get("lease_token")),
+        (f"max attempts reached: failed ({failed.get('error')})", failed["status"] == "failed" and reaped == 2),
+        (f"restart: job re-adopted and completed ({adopted_final['status']})",
+         adopted_final["status"] == "completed" and adopted_final.get("worker_id") == "worker-restart"),
+        (f"restart: RunPod job resumed, not resubmitted ({restart_runs} new /run calls)", restart_runs == 0),
+        (f"handoff: new owner completed the job ({handed_final['status']}, {handed_final.get('error') or 'no error'})",
+         handed_final["status"] == "completed" and handed_final.get("worker_id") == "worker-new"),
+        (f"handoff: same RunPod job, left running ({handoff_runs} new /run calls, RunPod {runpod_final})",
+         handoff_runs == 0 and runpod_final == "COMPLETED"),
+    ]
+    print("\n" + "=" * 60)
+    for label, ok in checks:
+        print(f"{'✅ PASS' if ok else '❌ FAIL'}: {label}")
+    print("=" * 60)
+    return 0 if all(ok for _, ok in checks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Verify the provider fallback chain and its circuit breakers locally.
+
+Runs ZImageWorker.generate_with_fallback against the fake RunPod with a
+runpod -> openrouter chain (OpenRouter replaced by an in-process stub):
+  1. jobs on a dead (404) endpoint fall back and still succeed,
+  2. after BREAKER_MIN_CALLS failures RunPod is skipped outright,
+  3. after the cool-down exactly one trial call goes to RunPod,
+  4. an endpoint that answers, but slower than BREAKER_SLOW_SECONDS, trips
+     the breaker on latency alone,
+  5. with no fallback after it, RunPod is still called while its breaker
+     is open.
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_pocketbase import FakePocketBase
+from fake_runpod import FakeRunPod
+
+
+async def main():
+    fake = FakeRunPod(job_seconds=1.2)
+    fake.dead_endpoints.add("ep-dead")
+    fake_pb = FakePocketBase()
+    os.environ.update({
+        "PB_URL": fake_pb.start(),
+        "RUNPOD_API_BASE": fake.start(),
+        "RUNPOD_API_KEY": "fake-key",
+        "RESULT_CACHE_MAX_MB": "0",
+        "PROVIDER_FALLBACKS": "openrouter",
+        "BREAKER_MIN_CALLS": "3",
+        "BREAKER_COOLDOWN": "2",
+        "BREAKER_SLOW_SECONDS": "1.0",
+    })
+    os.chdir(BACKEND)
+    from z_image_worker import ZImageWorker
+
+    worker = ZImageWorker()
+    stub_calls = []
+
+    async def openrouter_stub(task, input_data):
+        stub_calls.append(task['id'])
+        await asyncio.sleep(0.05)
+        return {'success': True, 'output': {'provider': 'openrouter'}, 'images': [{'url': 'data:,'}]}
+
+    worker.generate_with_openrouter = openrouter_stub
+
+    async def job(n, endpoint, chain=None):
+        input_data = {"provider": "runpod", "endpoint_id": endpoint, "model_id": "pony-v6",
+                      "prompt": f"fallback check {n}", "seed": n}
+        task = {"id": f"job-{n}", "type": "image_generation", "input": input_data}
+        fake_pb.create("jobs", {"id": task["id"], "type": task["type"], "status": "processing", "params": input_data})
+        return await worker.generate_with_fallback(task, input_data, chain or worker.get_provider_chain(input_data))
+
+    # 1 + 2: dead endpoint
+    results = [await job(n, "ep-dead") for n in range(8)]
+    runs_after_trip = fake.requests["run"]
+
+    # 3: half-open trial after the cool-down
+    await asyncio.sleep(2.2)
+    results += [await job(n, "ep-dead") for n in range(8, 12)]
+    runs_after_trial = fake.requests["run"]
+
+    # 4: slow but working endpoint
+    worker.breakers.clear()
+    fake.requests.clear()
+    slow_results = [await job(n, "ep-slow") for n in range(20, 26)]
+    slow_runs = fake.requests["run"]
+    slow_state = worker.breakers["runpod"].state
+
+    # 5: RunPod-only chain with the breaker still open
+    fake.requests.clear()
+    alone_results = [await job(n, "ep-slow", chain=['runpod']) for n in range(30, 32)]
+    alone_runs = fake.requests["run"]
+
+    slots = worker.endpoint_router.in_flight
+    await worker.shutdown()
+    fake.stop()
+    fake_pb.stop()
+
+    checks = [
+        ("every dead-endpoint job succeeded via fallback",
+         all(r.get('success') and r['output'].get('fallback_from') == 'runpod' for r in results)),
+        (f"RunPod tried only until the breaker opened ({runs_after_trip} /run calls)", runs_after_trip == 3),
+        (f"one trial call after cool-down ({runs_after_trial - runs_after_trip})", runs_after_trial - runs_after_trip == 1),
+        (f"slow endpoint tripped on latency ({slow_runs} /run calls, state {slow_state})",
+         slow_runs == 3 and slow_state == "open"),
+        (f"router slots all given back ({dict(slots)})", not any(slots.values())),
+        ("slow-endpoint jobs all succeeded", all(r.get('success') for r in slow_results)),
+        (f"no fallback configured: RunPod still called past the open breaker ({alone_runs} /run calls)",
+         alone_runs == 2 and all(r.get('success') for r in alone_results)),
+    ]
+    print("\n" + "=" * 60)
+    for label, ok in checks:
+        print(f"{'✅ PASS' if ok else '❌ FAIL'}: {label}")
+    print("=" * 60)
+    return 0 if all(ok for _, ok in checks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Verify realtime job intake against the local fake PocketBase.
+
+Measures how long a job submitted to an idle worker waits before it is
+claimed, in 'poll' and 'realtime' intake modes, then drops the realtime
+stream and checks the worker still picks up work by polling.
+"""
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_pocketbase import FakePocketBase
+
+POLL_INTERVAL = 5
+
+
+async def measure_intake(fake, worker, label):
+    claimed = {}
+
+    original_claim = worker.claim_tasks
+
+    async def timed_claim(*args, **kwargs):
+        tasks = await original_claim(*args, **kwargs)
+        for t in tasks:
+            claimed[t['id']] = time.perf_counter()
+        return tasks
+
+    worker.claim_tasks = timed_claim
+    runner = asyncio.create_task(worker.start())
+
+    # Let the worker go idle (and realtime subscribe) before submitting
+    await asyncio.sleep(1.5)
+
+    waits = []
+    for i in range(3):
+        submitted = time.perf_counter()
+        job = fake.create("jobs", {"type": "image_generation", "status": "queued",
+                                   "params": {"prompt": f"{label} {i}"}, "user_id": "verify"})
+        while job['id'] not in claimed and time.perf_counter() - submitted < POLL_INTERVAL * 3:
+            await asyncio.sleep(0.01)
+        waits.append(claimed.get(job['id'], float('inf')) - submitted)
+        await asyncio.sleep(1.3)
+
+    worker.stop()
+    await asyncio.wait_for(runner, 15)
+    return waits
+
+
+async def main():
+    fake = FakePocketBase()
+    os.environ["PB_URL"] = fake.start()
+
+    from base_worker import BaseWorker
+
+    class NoopWorker(BaseWorker):
+        async def process_task(self, task):
+            return {'success': True}
+
+    results = {}
+    for mode in ('poll', 'realtime'):
+        worker = NoopWorker(task_types=['image_generation'], poll_interval=POLL_INTERVAL, intake_mode=mode)
+        results[mode] = await measure_intake(fake, worker, mode)
+
+    # Drop the subscription: polling (or the reconnect) must still pick up work
+    worker = NoopWorker(task_types=['image_generation'], poll_interval=1, intake_mode='realtime')
+    runner = asyncio.create_task(worker.start())
+    await asyncio.sleep(1.0)
+    worker.realtime_poll_interval = 3600  # would hang forever without the fallback
+    fake.drop_realtime()
+    await asyncio.sleep(0.5)
+    job = fake.create("jobs", {"type": "image_generation", "status": "queued", "params": {}, "user_id": "verify"})
+    deadline = time.perf_counter() + 5
+    while fake.get("jobs", job['id'])['status'] == 'queued' and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+    fallback_ok = fake.get("jobs", job['id'])['status'] != 'queued'
+    worker.stop()
+    await asyncio.wait_for(runner, 15)
+    fake.stop()
+
+    print("\n" + "=" * 60)
+    for mode, waits in results.items():
+        print(f"{mode:<9} intake wait: " + ", ".join(f"{w * 1000:.0f}ms" for w in waits))
+    print(f"Intake after stream drop:              {'✅ PASS' if fallback_ok else '❌ FAIL'}")
+    ok = max(results['realtime']) < 0.5 and fallback_ok
+    print(f"Realtime intake under 500ms:           {'✅ PASS' if max(results['realtime']) < 0.5 else '❌ FAIL'}")
+    print("=" * 60)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
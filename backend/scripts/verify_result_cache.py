@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Verify the deterministic result cache.
+
+Runs ZImageWorker.process_task against the fake RunPod with the cache in a
+temporary directory:
+  1. a repeated seeded request is served from the cache without a RunPod job,
+  2. a different seed, or a changed healer override, misses,
+  3. unseeded requests (no seed, or "seed": null) are never cached,
+  4. a hit reuses the artifact the first generation uploaded instead of
+     storing the image again, and uploads afresh if that artifact is gone,
+  5. the disk cache stays under its size bound, evicting least recently
+     used entries, and keeps its entries across a restart,
+  6. concurrent gets and puts from worker threads (as asyncio.to_thread
+     runs them) neither raise nor corrupt the size accounting.
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BACKEND = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_pocketbase import FakePocketBase
+from fake_runpod import FakeRunPod
+
+
+async def main():
+    cache_dir = tempfile.mkdtemp(prefix="result-cache-")
+    fake = FakeRunPod(job_seconds=0.3)
+    fake_pb = FakePocketBase()
+    os.environ.update({
+        "PB_URL": fake_pb.start(),
+        "RUNPOD_API_BASE": fake.start(),
+        "RUNPOD_API_KEY": "fake-key",
+        "RUNPOD_ENDPOINT_ID": "ep-cache",
+        "PROVIDER_FALLBACKS": "",
+        "RESULT_CACHE_DIR": cache_dir,
+    })
+    os.chdir(BACKEND)
+    from result_cache import ResultCache
+    from z_image_worker import ZImageWorker
+
+    worker = ZImageWorker()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    worker.runpod_poller.min_interval = 0.2
+    jobs = 0
+
+    async def run(**params):
+        nonlocal jobs
+        jobs += 1
+        input_data = {"provider": "runpod", "endpoint_id": "ep-cache", "model_id": "pony-v6",
+                      "prompt": "cache check", **params}
+        task = {"id": f"job-{jobs}", "type": "image_generation", "input": input_data}
+        fake_pb.create("jobs", {"id": task["id"], "type": task["type"], "status": "processing", "params": input_data})
+        runs = fake.requests["run"]
+        result = await worker.process_task(task)
+        return result, fake.requests["run"] - runs
+
+    def artifacts():
+        return len(fake_pb.list("artifacts"))
+
+    first, first_runs = await run(seed=42)
+    uploads = artifacts()
+    again, again_runs = await run(seed=42)
+    hit_uploads = artifacts() - uploads
+    fake_pb.delete("artifacts", first['artifacts'][0]['key'].split('/')[0])
+    reuploaded, _ = await run(seed=42)
+    after_reupload, _ = await run(seed=42)
+    other_seed, other_seed_runs = await run(seed=43)
+    worker.healer.get_overrides = lambda model_id: {"max_steps": 10}
+    healed, healed_runs = await run(seed=42)
+    worker.healer.get_overrides = lambda model_id: {}
+    unseeded_runs = (await run())[1] + (await run())[1]
+    null_seeds = [await run(seed=None) for _ in range(2)]
+
+    await worker.shutdown()
+    fake.stop()
+    fake_pb.stop()
+
+    # 4: LRU bound
+    lru_dir = tempfile.mkdtemp(prefix="result-cache-lru-")
+    blob = b"x" * 1000
+    cache = ResultCache(lru_dir, max_bytes=3000)
+    for n in range(3):
+        cache.put(f"k{n}", [blob])
+        cache.put_meta(f"k{n}", {"artifact": {"key": f"rec{n}/k{n}.png"}})
+    cache.get("k0")
+    cache.put("k3", [blob])
+    kept = sorted(cache._entries)
+    evicted_meta = cache.get_meta("k1") is None and not cache._meta_path("k1").exists()
+    reloaded = ResultCache(lru_dir, max_bytes=3000)
+
+    # 5: threads racing on a cache that keeps evicting
+    busy = ResultCache(tempfile.mkdtemp(prefix="result-cache-threads-"), max_bytes=5000)
+
+    def hammer(n):
+        for i in range(300):
+            key = f"k{(n + i) % 12}"
+            if i % 2:
+                busy.put(key, [blob])
+            else:
+                busy.get(key)
+
+    with ThreadPoolExecutor(16) as pool:
+        errors = [f.exception() for f in [pool.submit(hammer, n) for n in range(16)]]
+    errors = [e for e in errors if e]
+    consistent = busy._size == sum(busy._entries.values()) <= 5000
+
+    checks = [
+        ("first seeded request ran on RunPod", first.get('success') and first_runs == 1),
+        ("repeat served from cache (no RunPod job)",
+         again_runs == 0 and again['output'].get('cached') and again['images'] == first['images']),
+        ("different seed missed", other_seed_runs == 1 and not other_seed['output'].get('cached')),
+        ("healer override changed the key", healed_runs == 1 and not healed['output'].get('cached')),
+        ("unseeded requests never cached", unseeded_runs == 2),
+        ('"seed": null runs with a random seed, uncached',
+         all(r.get('success') and runs == 1 for r, runs in null_seeds)),
+        (f"hit reused the stored artifact ({hit_uploads} new uploads)",
+         hit_uploads == 0 and again['artifacts'][0]['key'] == first['artifacts'][0]['key']),
+        ("deleted artifact: next hit uploads again, later hits reuse that",
+         reuploaded['output'].get('cached') and reuploaded['artifacts'][0]['key'] != first['artifacts'][0]['key']
+         and after_reupload['artifacts'][0]['key'] == reuploaded['artifacts'][0]['key']),
+        (f"LRU kept {kept} under 3000 bytes", kept == ["k0", "k2", "k3"] and cache._size == 3000),
+        ("evicted entry took its sidecar with it", evicted_meta),
+        ("entries survive a restart", sorted(reloaded._entries) == kept and reloaded.get("k3") == blob
+         and reloaded.get_meta("k0") == {"artifact": {"key": "rec0/k0.png"}}),
+        (f"concurrent get/put: {len(errors)} errors, size accounting consistent ({busy._size} bytes)",
+         not errors and consistent),
+    ]
+    print("\n" + "=" * 60)
+    for label, ok in checks:
+        print(f"{'✅ PASS' if ok else '❌ FAIL'}: {label}")
+    print("=" * 60)
+    return 0 if all(ok for _, ok in checks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Verify micro-batching of compatible RunPod generations.
+
+Runs ZImageWorker.process_task against the fake RunPod with
+RUNPOD_BATCH_MAX=4 (result cache off):
+  1. four concurrent unseeded jobs with the same settings share one RunPod
+     job, and each gets its own item's image,
+  2. a fifth compatible job past the cap starts a new batch, and a job
+     alone in its window is sent as a plain (unbatched) job,
+  3. jobs with different settings, and seeded jobs, are not batched,
+  4. cancelling one member leaves the batch running for the others;
+     cancelling every member cancels the RunPod job.
+"""
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_pocketbase import FakePocketBase
+from fake_runpod import FakeRunPod
+
+
+async def main():
+    fake = FakeRunPod(job_seconds=1.0, batch_item_seconds=0.1)
+    fake_pb = FakePocketBase()
+    os.environ.update({
+        "PB_URL": fake_pb.start(),
+        "RUNPOD_API_BASE": fake.start(),
+        "RUNPOD_API_KEY": "fake-key",
+        "RUNPOD_ENDPOINT_ID": "ep-batch",
+        "PROVIDER_FALLBACKS": "",
+        "ARTIFACT_STORE": "inline",
+        "RESULT_CACHE_MAX_MB": "0",
+        "RUNPOD_BATCH_MAX": "4",
+        "RUNPOD_BATCH_WINDOW": "0.3",
+    })
+    os.chdir(BACKEND)
+    from image_result import ImageResult
+    from z_image_worker import ZImageWorker
+
+    worker = ZImageWorker()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    worker.runpod_poller.min_interval = 0.2
+    count = 0
+
+    def job(prompt, **params):
+        nonlocal count
+        count += 1
+        input_data = {"provider": "runpod", "endpoint_id": "ep-batch", "model_id": "pony-v6",
+                      "prompt": prompt, **params}
+        task = {"id": f"job-{count}", "type": "image_generation", "input": input_data}
+        fake_pb.create("jobs", {"id": task["id"], "type": task["type"], "status": "processing", "params": input_data})
+        return asyncio.create_task(worker.process_task(task))
+
+    def width(result):
+        return ImageResult.from_data_uri(result['images'][0]['url']).size[0]
+
+    def submitted():
+        return [fake.jobs[j]["input"] for j in list(fake.jobs)]
+
+    # 1 + 2: a full batch, then one job past the cap
+    before = len(fake.jobs)
+    prompts = ["a" * n for n in range(1, 6)]
+    grouped = await asyncio.gather(*[job(p) for p in prompts])
+    grouped_jobs = submitted()[before:]
+
+    # 3: different settings / seeded
+    before = len(fake.jobs)
+    separate = await asyncio.gather(job("x", width=512), job("y", width=768), job("s1", seed=1), job("s2", seed=2))
+    separate_jobs = submitted()[before:]
+
+    # 4: cancellations
+    before = len(fake.jobs)
+    members = [job(p) for p in ("c1", "c2", "c3")]
+    await asyncio.sleep(0.6)
+    members[0].cancel()
+    partial = await asyncio.gather(*members, return_exceptions=True)
+    partial_job = list(fake.jobs)[before]
+    everyone = [job(p) for p in ("d1", "d2")]
+    await asyncio.sleep(0.6)
+    for member in everyone:
+        member.cancel()
+    await asyncio.gather(*everyone, return_exceptions=True)
+    await asyncio.sleep(0.3)
+    abandoned_job = list(fake.jobs)[before + 1]
+
+    slots = worker.endpoint_router.in_flight
+    await worker.shutdown()
+    fake.stop()
+    fake_pb.stop()
+
+    checks = [
+        (f"5 compatible jobs -> {len(grouped_jobs)} RunPod jobs (batch of 4, then a plain job)",
+         [len(j.get("batch") or [None]) for j in grouped_jobs] == [4, 1] and "batch" not in grouped_jobs[1]),
+        ("every batched job got its own item's image",
+         all(r.get('success') for r in grouped) and [width(r) for r in grouped[:4]] == [1, 2, 3, 4]
+         and all(r['output'].get('batch_size') == 4 for r in grouped[:4])),
+        (f"different settings and seeded jobs -> {len(separate_jobs)} unbatched RunPod jobs",
+         len(separate_jobs) == 4 and not any("batch" in j for j in separate_jobs)
+         and all(r.get('success') for r in separate)),
+        ("one member cancelled: the others still completed",
+         isinstance(partial[0], asyncio.CancelledError) and all(r.get('success') for r in partial[1:])
+         and fake.job_status(partial_job)["status"] == "COMPLETED"),
+        ("every member cancelled: RunPod job cancelled",
+         fake.job_status(abandoned_job)["status"] == "CANCELLED"),
+        (f"router slots all given back ({dict(slots)})", not any(slots.values())),
+        (f"batching stats {worker.runpod_batcher.snapshot()}",
+         worker.runpod_batcher.jobs == 6 and worker.runpod_batcher.items == 12),
+    ]
+    print("\n" + "=" * 60)
+    for label, ok in checks:
+        print(f"{'✅ PASS' if ok else '❌ FAIL'}: {label}")
+    print("=" * 60)
+    return 0 if all(ok for _, ok in checks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
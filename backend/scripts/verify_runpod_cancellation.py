@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Verify that RunPod jobs are cancelled whenever the worker stops waiting on them.
+
+Runs ZImageWorker against the fake PocketBase and a slow fake RunPod:
+  1. a job whose record gets `cancel_requested` ends up 'cancelled' and its
+     RunPod job CANCELLED,
+  2. jobs still running at shutdown are cancelled on RunPod and requeued,
+  3. a job that exceeds RUNPOD_JOB_TIMEOUT is cancelled on RunPod.
+"""
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_pocketbase import FakePocketBase
+from fake_runpod import FakeRunPod
+
+
+def queue_job(fake_pb, n):
+    return fake_pb.create("jobs", {
+        "type": "image_generation",
+        "status": "queued",
+        "user_id": "verify",
+        "params": {"prompt": f"cancel check {n}", "provider": "runpod",
+                   "model_id": "pony-v6", "endpoint_id": "ep-verify", "seed": n}
+    })["id"]
+
+
+async def wait_until(predicate, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        await asyncio.sleep(0.05)
+    return False
+
+
+async def main():
+    fake_pb = FakePocketBase()
+    fake_rp = FakeRunPod(job_seconds=60)
+    os.environ.update({
+        "PB_URL": fake_pb.start(),
+        "RUNPOD_API_BASE": fake_rp.start(),
+        "RUNPOD_API_KEY": "fake-key",
+        "RESULT_CACHE_MAX_MB": "0",
+        "WORKER_LEASE_TTL": "3",
+        "WORKER_SHUTDOWN_GRACE": "0.5",
+    })
+    os.chdir(BACKEND)
+    from z_image_worker import ZImageWorker
+
+    def record(job_id):
+        return fake_pb.get("jobs", job_id)
+
+    def runpod_status(job_id):
+        external = record(job_id).get("external_job_id")
+        return (fake_rp.job_status(external) or {}).get("status") if external else None
+
+    # 1 + 2: user cancellation, then shutdown with jobs in flight
+    worker = ZImageWorker()
+    loop_task = asyncio.create_task(worker.start())
+    jobs = [queue_job(fake_pb, n) for n in range(3)]
+    await wait_until(lambda: all(record(j).get("external_job_id") for j in jobs))
+    submitted = {j: record(j)["external_job_id"] for j in jobs}
+
+    started = time.monotonic()
+    fake_pb.update("jobs", jobs[0], {"cancel_requested": True})
+    await wait_until(lambda: record(jobs[0])["status"] == "cancelled")
+    user_cancel_latency = time.monotonic() - started
+
+    worker.stop()
+    await asyncio.wait_for(loop_task, 10)
+    requeued = all(record(j)["status"] == "queued" and not record(j).get("external_job_id") for j in jobs[1:])
+    for j in jobs[1:]:
+        fake_pb.delete("jobs", j)
+
+    # 3: timeout
+    os.environ["RUNPOD_JOB_TIMEOUT"] = "1"
+    worker = ZImageWorker()
+    loop_task = asyncio.create_task(worker.start())
+    timeout_job = queue_job(fake_pb, 99)
+    await wait_until(lambda: record(timeout_job)["status"] == "failed")
+    worker.stop()
+    await asyncio.wait_for(loop_task, 10)
+
+    fake_rp.stop()
+    fake_pb.stop()
+
+    checks = [
+        (f"user cancel marked job cancelled ({user_cancel_latency:.2f}s)",
+         record(jobs[0])["status"] == "cancelled"),
+        ("user cancel cancelled RunPod job", fake_rp.job_status(submitted[jobs[0]])["status"] == "CANCELLED"),
+        ("shutdown requeued in-flight jobs", requeued),
+        ("shutdown cancelled their RunPod jobs",
+         all(fake_rp.job_status(submitted[j])["status"] == "CANCELLED" for j in jobs[1:])),
+        ("timed-out job failed", record(timeout_job)["status"] == "failed"),
+        ("timed-out RunPod job cancelled", runpod_status(timeout_job) == "CANCELLED"),
+    ]
+    print("\n" + "=" * 60)
+    for label, ok in checks:
+        print(f"{'✅ PASS' if ok else '❌ FAIL'}: {label}")
+    print("=" * 60)
+    return 0 if all(ok for _, ok in checks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
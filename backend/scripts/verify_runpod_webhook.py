@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Verify RunPod webhook completion end to end, entirely locally.
+
+Starts the fake PocketBase, a fake RunPod that calls webhooks, and server.py
+(which runs ZImageWorker) under uvicorn. A queued runpod job must complete
+through the webhook route without any /status polling, and a callback with
+the wrong secret must be rejected. The worker runs as Fly machine
+"machine-a"; a callback naming another machine must be answered with a
+fly-replay to it.
+"""
+import asyncio
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_pocketbase import FakePocketBase
+from fake_runpod import FakeRunPod
+
+JOB_SECONDS = 2.0
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def main():
+    fake_pb = FakePocketBase()
+    fake_rp = FakeRunPod(job_seconds=JOB_SECONDS)
+    port = free_port()
+
+    os.environ.update({
+        "PB_URL": fake_pb.start(),
+        "RUNPOD_API_BASE": fake_rp.start(),
+        "RUNPOD_API_KEY": "fake-key",
+        "RESULT_CACHE_MAX_MB": "0",
+        "WORKER_PUBLIC_URL": f"http://127.0.0.1:{port}",
+        "RUNPOD_WEBHOOK_SECRET": "verify-secret",
+        "FLY_MACHINE_ID": "machine-a",
+    })
+    os.chdir(BACKEND)
+
+    import uvicorn
+    import server
+
+    srv = uvicorn.Server(uvicorn.Config(server.app, host="127.0.0.1", port=port, log_level="warning"))
+    serve_task = asyncio.create_task(srv.serve())
+    while not srv.started:
+        await asyncio.sleep(0.05)
+    await asyncio.sleep(1.0)
+
+    submitted = time.perf_counter()
+    job = fake_pb.create("jobs", {
+        "type": "image_generation",
+        "status": "queued",
+        "user_id": "verify",
+        "params": {"prompt": "webhook check", "provider": "runpod",
+                   "model_id": "pony-v6", "endpoint_id": "ep-verify", "seed": 1}
+    })
+    while fake_pb.get("jobs", job["id"])["status"] not in ("completed", "failed"):
+        if time.perf_counter() - submitted > 60:
+            break
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - submitted
+    final = fake_pb.get("jobs", job["id"])
+
+    async with httpx.AsyncClient() as client:
+        bad = await client.post(f"http://127.0.0.1:{port}/webhooks/runpod/wrong",
+                                json={"id": "x", "status": "COMPLETED"})
+        elsewhere = await client.post(f"http://127.0.0.1:{port}/webhooks/runpod/verify-secret?instance=machine-b",
+                                      json={"id": "x", "status": "COMPLETED"})
+
+    srv.should_exit = True
+    await serve_task
+    fake_rp.stop()
+    fake_pb.stop()
+
+    checks = [
+        ("job completed", final["status"] == "completed"),
+        ("webhook delivered", fake_rp.webhooks_delivered == 1),
+        ("no /status polling", fake_rp.requests.get("status", 0) == 0),
+        (f"done within {JOB_SECONDS + 1.5:.1f}s ({elapsed:.2f}s)", elapsed < JOB_SECONDS + 1.5),
+        ("wrong secret rejected", bad.status_code == 403),
+        ("other machine's webhook replayed there", elsewhere.headers.get("fly-replay") == "instance=machine-b"),
+    ]
+    print("\n" + "=" * 60)
+    for label, ok in checks:
+        print(f"{'✅ PASS' if ok else '❌ FAIL'}: {label}")
+    print("=" * 60)
+    return 0 if all(ok for _, ok in checks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -7,6 +7,10 @@ import json
 import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from endpoint_mapping import endpoint_ids
+
 def check_file(path, description):
     """Check if a file exists"""
     if path.exists():
@@ -57,7 +61,7 @@ def main():
                 endpoints = json.load(f)
                 print(f"   → {len(endpoints)} endpoints configured")
                 for model_id, info in list(endpoints.items())[:3]:
-                    print(f"   → {model_id}: {info.get('endpoint_id', 'N/A')}")
+                    print(f"   → {model_id}: {', '.join(endpoint_ids(info)) or 'N/A'}")
         except Exception as e:
             print(f"   ⚠️  Error reading endpoints: {e}")
     else:
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Verify the warm pool controller against the fake RunPod GraphQL/health API.
+
+Drives the local queued-job count through idle -> burst -> brief dip ->
+sustained idle with compressed timers, and checks that workersMin goes up
+on the burst (capped by the cost ceiling), ignores the dip (hysteresis),
+comes back down after the sustained idle, and that each saveEndpoint call
+carries the endpoint's full config, including changes made on the
+dashboard in between.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_runpod import FakeRunPod
+from runpod_client import RunPodClient
+from runpod_health import EndpointHealthCache
+from warm_pool import WarmPoolController
+
+EID = "ep-warm"
+
+
+async def main():
+    fake = FakeRunPod()
+    fake.start()
+    fake.add_endpoint(EID, workersMin=0, workersMax=5)
+
+    client = RunPodClient("fake-key", base_url=fake.base_url, graphql_url=fake.graphql_url)
+    queued = {"n": 0}
+
+    async def queued_count():
+        return queued["n"]
+
+    controller = WarmPoolController(
+        client, EndpointHealthCache(client, ttl=0), EID, queued_count,
+        floor=0, max_workers=4, jobs_per_worker=2,
+        max_hourly_usd=1.5, gpu_cost_per_hr=0.69,  # cost ceiling: 2 workers
+        interval=0.1, scale_down_after=1.0, cooldown=0.3
+    )
+    loop = asyncio.create_task(controller.run())
+
+    def warm():
+        return fake.endpoints[EID]["workersMin"]
+
+    await asyncio.sleep(0.5)
+    idle_min = warm()
+
+    queued["n"] = 5  # wants 3 warm workers, budget allows 2
+    await asyncio.sleep(0.5)
+    burst_min = warm()
+
+    # Changed on the RunPod dashboard while the controller runs
+    fake.endpoints[EID].update(gpuIds="AMPERE_48", idleTimeout=30)
+
+    queued["n"] = 0  # dip shorter than scale_down_after
+    await asyncio.sleep(0.5)
+    queued["n"] = 5
+    await asyncio.sleep(0.3)
+    dip_min = warm()
+
+    queued["n"] = 0
+    await asyncio.sleep(1.6)
+    final_min = warm()
+
+    loop.cancel()
+    await client.close()
+    fake.stop()
+
+    saves = fake.saved_endpoints
+    checks = [
+        ("idle: workersMin stays 0", idle_min == 0),
+        (f"burst: raised to cost ceiling 2 (got {burst_min})", burst_min == 2),
+        (f"brief dip ignored (got {dip_min})", dip_min == 2),
+        (f"sustained idle: lowered to 0 (got {final_min})", final_min == 0),
+        (f"two saveEndpoint calls (got {len(saves)})", len(saves) == 2),
+        ("saves carry full config", all(s.get("templateId") and s.get("gpuIds") and s.get("name") for s in saves)),
+        ("dashboard changes survive the next save",
+         saves[-1].get("gpuIds") == "AMPERE_48" and fake.endpoints[EID]["idleTimeout"] == 30),
+    ]
+    print("\n" + "=" * 60)
+    for label, ok in checks:
+        print(f"{'✅ PASS' if ok else '❌ FAIL'}: {label}")
+    print("=" * 60)
+    return 0 if all(ok for _, ok in checks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -8,6 +8,10 @@ import sys
 import requests
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from endpoint_mapping import endpoint_ids
+
 # Colors for output
 GREEN = '\033[92m'
 RED = '\033[91m'
@@ -60,7 +64,7 @@ def check_endpoints_file():
         print(f"{GREEN}✅ endpoints.json found{RESET}")
         print(f"   → {len(endpoints)} endpoints configured")
         for model_id, info in list(endpoints.items())[:3]:
-            print(f"   → {model_id}: {info.get('endpoint_id', 'N/A')}")
+            print(f"   → {model_id}: {', '.join(endpoint_ids(info)) or 'N/A'}")
         if len(endpoints) > 3:
             print(f"   → ... and {len(endpoints) - 3} more")
         return True, endpoints
@@ -140,13 +144,13 @@ def check_runpod_endpoints(runpod_key, endpoints):
         
         # Check each configured endpoint
         for model_id, info in endpoints.items():
-            endpoint_id = info.get('endpoint_id')
-            if endpoint_id in runpod_endpoint_ids:
-                ep_info = runpod_endpoint_ids[endpoint_id]
-                print(f"{GREEN}✅{RESET} {model_id}: {endpoint_id}")
-                print(f"      Name: {ep_info.get('name', 'N/A')}")
-            else:
-                print(f"{RED}❌{RESET} {model_id}: {endpoint_id} (NOT FOUND in RunPod)")
+            for endpoint_id in endpoint_ids(info):
+                if endpoint_id in runpod_endpoint_ids:
+                    ep_info = runpod_endpoint_ids[endpoint_id]
+                    print(f"{GREEN}✅{RESET} {model_id}: {endpoint_id}")
+                    print(f"      Name: {ep_info.get('name', 'N/A')}")
+                else:
+                    print(f"{RED}❌{RESET} {model_id}: {endpoint_id} (NOT FOUND in RunPod)")
         
     except Exception as e:
         print(f"{RED}❌ Error checking RunPod endpoints: {e}{RESET}")
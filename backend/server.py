@@ -1,7 +1,8 @@
 import asyncio
 import os
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Request, Response
 from z_image_worker import ZImageWorker
 
 # Global worker instance
@@ -18,16 +19,25 @@ async def lifespan(app: FastAPI):
     # For simple deployments, running it alongside is fine.
     try:
         worker = ZImageWorker()
+    except Exception as e:
+        print(f"⚠️ Failed to start worker: {e}")
+    if worker:
+        # Raises (failing server startup) if PocketBase lacks the claims schema
+        await worker.prepare()
         # Run worker in background task
         task = asyncio.create_task(worker.start())
         print("🚀 Background worker started")
-    except Exception as e:
-        print(f"⚠️ Failed to start worker: {e}")
     
     yield
     
     if worker:
         worker.stop()
+        # Let the loop drain: in-flight jobs past the grace period are cancelled
+        # on RunPod and requeued before the process exits
+        try:
+            await asyncio.wait_for(task, worker.shutdown_grace + 10)
+        except Exception as e:
+            print(f"⚠️ Worker did not shut down cleanly: {e}")
         print("🛑 Background worker stopped")
 
 app = FastAPI(title="Z-Image-Turbo Backend", lifespan=lifespan)
@@ -47,3 +57,16 @@ async def admin_metrics():
         return {"error": "Worker not initialized"}
     return await worker.get_admin_metrics()
 
+@app.post("/webhooks/runpod/{secret}")
+async def runpod_webhook(secret: str, request: Request, instance: Optional[str] = None):
+    """RunPod calls this when a job submitted with a webhook finishes"""
+    if instance and instance != os.getenv("FLY_MACHINE_ID") and "fly-replay-src" not in request.headers:
+        # Meant for the worker on another Fly machine: have the proxy replay it there
+        return Response(status_code=409, headers={"fly-replay": f"instance={instance}"})
+    if not worker:
+        raise HTTPException(status_code=503, detail="Worker not initialized")
+    payload = await request.json()
+    resolved = worker.handle_runpod_webhook(secret, payload)
+    if resolved is None:
+        raise HTTPException(status_code=403, detail="Invalid webhook secret")
+    return {"ok": True, "resolved": resolved}
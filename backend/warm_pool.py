@@ -0,0 +1,132 @@
+import asyncio
+import math
+import os
+import time
+from typing import Awaitable, Callable, Dict, Optional
+from runpod_client import RunPodClient
+from runpod_health import EndpointHealthCache
+
+
+class WarmPoolController:
+    """
+    Keeps an endpoint's workersMin in step with demand so jobs land on warm
+    workers instead of waiting out a checkpoint cold start.
+
+    Demand is our own queued jobs plus RunPod's inQueue and inProgress
+    counts; the target is one warm worker per `jobs_per_worker` of demand,
+    between `floor` and a ceiling set by `max_workers`, the endpoint's
+    workersMax and the hourly cost budget.
+
+    Hysteresis: raising happens on the next tick, lowering only once the
+    target has stayed below the current value for `scale_down_after`
+    seconds (and never while workers are still initializing), and no two
+    changes are closer than `cooldown` seconds apart.
+    """
+
+    def __init__(self, client: RunPodClient, health: EndpointHealthCache, endpoint_id: str,
+                 queued_count: Callable[[], Awaitable[int]],
+                 floor: Optional[int] = None,
+                 max_workers: Optional[int] = None,
+                 jobs_per_worker: Optional[int] = None,
+                 max_hourly_usd: Optional[float] = None,
+                 gpu_cost_per_hr: Optional[float] = None,
+                 interval: Optional[float] = None,
+                 scale_down_after: Optional[float] = None,
+                 cooldown: Optional[float] = None):
+        self.client = client
+        self.health = health
+        self.endpoint_id = endpoint_id
+        self.queued_count = queued_count
+
+        self.floor = floor if floor is not None else int(os.getenv("WARM_POOL_MIN", "0"))
+        self.max_workers = max_workers if max_workers is not None else int(os.getenv("WARM_POOL_MAX", "3"))
+        self.jobs_per_worker = jobs_per_worker or int(os.getenv("WARM_POOL_JOBS_PER_WORKER", "2"))
+        self.max_hourly_usd = max_hourly_usd if max_hourly_usd is not None else float(os.getenv("WARM_POOL_MAX_HOURLY_USD", "2.0"))
+        self.gpu_cost_per_hr = gpu_cost_per_hr or float(os.getenv("WARM_POOL_GPU_COST_PER_HR", "0.69"))
+        self.interval = interval or float(os.getenv("WARM_POOL_INTERVAL", "15"))
+        self.scale_down_after = scale_down_after if scale_down_after is not None else float(os.getenv("WARM_POOL_SCALE_DOWN_AFTER", "300"))
+        self.cooldown = cooldown if cooldown is not None else float(os.getenv("WARM_POOL_COOLDOWN", "60"))
+
+        self.config: Optional[Dict] = None
+        self.current: Optional[int] = None
+        self._last_change = float('-inf')
+        self._below_since: Optional[float] = None
+
+    @property
+    def ceiling(self) -> int:
+        by_cost = math.floor(self.max_hourly_usd / self.gpu_cost_per_hr) if self.gpu_cost_per_hr > 0 else self.max_workers
+        ceiling = min(self.max_workers, by_cost)
+        if self.config and self.config.get('workersMax') is not None:
+            ceiling = min(ceiling, self.config['workersMax'])
+        return max(0, ceiling)
+
+    def target(self, demand: int) -> int:
+        wanted = math.ceil(demand / self.jobs_per_worker)
+        return max(min(self.floor, self.ceiling), min(wanted, self.ceiling))
+
+    def decide(self, demand: int, now: float, initializing: int = 0) -> Optional[int]:
+        """New workersMin for this demand, or None to leave it alone."""
+        target = self.target(demand)
+        if target >= self.current:
+            self._below_since = None
+            if target > self.current and now - self._last_change >= self.cooldown:
+                return target
+            return None
+
+        if self._below_since is None:
+            self._below_since = now
+        if (now - self._below_since >= self.scale_down_after and now - self._last_change >= self.cooldown
+                and not initializing):
+            return target
+        return None
+
+    async def run(self):
+        print(f"🔥 Warm pool controller watching {self.endpoint_id} "
+              f"(min {self.floor}, ceiling {self.ceiling}, every {self.interval:g}s)")
+        while True:
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Warm pool controller error ({self.endpoint_id}): {e}")
+            await asyncio.sleep(self.interval)
+
+    async def tick(self) -> Optional[int]:
+        """One control step. Returns the new workersMin if it was changed."""
+        if self.config is None:
+            await self._refresh()
+
+        queued = await self.queued_count()
+        health = await self.health.get(self.endpoint_id) or {}
+        jobs = health.get('jobs', {})
+        demand = queued + jobs.get('inQueue', 0) + jobs.get('inProgress', 0)
+
+        workers = health.get('workers', {})
+        now = time.monotonic()
+        new_min = self.decide(demand, now, workers.get('initializing', 0))
+        if new_min is None:
+            return None
+        # saveEndpoint writes the whole config back: re-read it first so changes
+        # made on the dashboard since the last save aren't reverted
+        await self._refresh()
+        new_min = self.decide(demand, now, workers.get('initializing', 0))
+        if new_min is None:
+            return None
+
+        print(f"🔥 Warm pool {self.endpoint_id}: workersMin {self.current} -> {new_min} "
+              f"(queued {queued}, inQueue {jobs.get('inQueue', 0)}, inProgress {jobs.get('inProgress', 0)}, "
+              f"idle {workers.get('idle', 0)}, initializing {workers.get('initializing', 0)})")
+        saved = await self.client.save_endpoint({**self.config, 'workersMin': new_min})
+        self.config.update(saved or {'workersMin': new_min})
+        self.current = new_min
+        self._last_change = time.monotonic()
+        self._below_since = None
+        return new_min
+
+    async def _refresh(self):
+        config = await self.client.get_endpoint(self.endpoint_id)
+        if config is None:
+            raise RuntimeError("endpoint not found")
+        self.config = config
+        self.current = config.get('workersMin') or 0
@@ -0,0 +1,580 @@
+#!/usr/bin/env python3
+"""
+RunPod Serverless Handler with ComfyUI - Multi-Model Support
+Supports all uncensored models via ComfyUI workflows
+"""
+
+import runpod
+import json
+import base64
+import io
+import sys
+import os
+import random
+import gc
+import math
+import time
+from collections import OrderedDict
+from PIL import Image
+
+# Add ComfyUI to path
+sys.path.append('/comfyui')
+
+# Import ComfyUI modules
+try:
+    print("🔧 Loading ComfyUI modules...")
+    from nodes import NODE_CLASS_MAPPINGS
+    from comfy import model_management
+    import folder_paths
+    import comfy.sample
+    import torch
+    print("✅ ComfyUI modules loaded successfully")
+except ImportError as e:
+    print(f"❌ ComfyUI import error: {e}")
+    print(f"   sys.path: {sys.path}")
+    print(f"   /comfyui exists: {os.path.exists('/comfyui')}")
+    print(f"   /comfyui contents: {os.listdir('/comfyui') if os.path.exists('/comfyui') else 'N/A'}")
+    raise
+
+# Initialize ComfyUI nodes
+print("🔧 Initializing ComfyUI nodes...")
+CheckpointLoaderSimple = NODE_CLASS_MAPPINGS["CheckpointLoaderSimple"]()
+CLIPTextEncode = NODE_CLASS_MAPPINGS["CLIPTextEncode"]()
+KSampler = NODE_CLASS_MAPPINGS["KSampler"]()
+VAEDecode = NODE_CLASS_MAPPINGS["VAEDecode"]()
+EmptyLatentImage = NODE_CLASS_MAPPINGS["EmptyLatentImage"]()
+SaveImage = NODE_CLASS_MAPPINGS["SaveImage"]()
+print("✅ ComfyUI nodes initialized")
+
+GB = 1024 ** 3
+
+class CheckpointCache:
+    """
+    Bounded LRU cache of loaded checkpoints (checkpoint name -> the
+    (model, clip, vae) tuple from CheckpointLoaderSimple).
+
+    Two tiers are budgeted separately:
+      - host: every cached checkpoint holds its weights in system RAM. Past
+        CKPT_CACHE_HOST_GB (default 60% of RAM) or CKPT_CACHE_MAX_MODELS,
+        the least recently used checkpoint is dropped entirely. Room is made
+        before a load (using the file size as the estimate), so the cache
+        never holds an extra checkpoint while the new one loads.
+      - device: ComfyUI keeps recently sampled models on the GPU. Before a
+        job runs, the least recently used other checkpoints are unloaded
+        from VRAM until the job's checkpoint fits in CKPT_CACHE_DEVICE_GB
+        (default total VRAM minus CKPT_VRAM_RESERVE_GB for activations).
+    Unloading goes through model_management, so ComfyUI's own bookkeeping
+    of loaded models stays correct.
+    """
+
+    def __init__(self):
+        device = model_management.get_torch_device()
+        total_vram = model_management.get_total_memory(device)
+        total_ram = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+        self.device_budget = float(os.getenv("CKPT_CACHE_DEVICE_GB", "0")) * GB or \
+            max(total_vram - float(os.getenv("CKPT_VRAM_RESERVE_GB", "3")) * GB, total_vram / 2)
+        self.host_budget = float(os.getenv("CKPT_CACHE_HOST_GB", "0")) * GB or total_ram * 0.6
+        self.max_models = int(os.getenv("CKPT_CACHE_MAX_MODELS", "3"))
+        # name -> (checkpoint_output, size in bytes), least recently used first
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.device_evictions = 0
+
+    @staticmethod
+    def _patchers(checkpoint_output):
+        """The ModelPatchers of a (model, clip, vae) tuple."""
+        model, clip, vae = checkpoint_output[:3]
+        return [p for p in (model, getattr(clip, 'patcher', None), getattr(vae, 'patcher', None)) if p is not None]
+
+    @classmethod
+    def _size(cls, checkpoint_output):
+        return sum(p.model_size() for p in cls._patchers(checkpoint_output) if hasattr(p, 'model_size'))
+
+    @staticmethod
+    def _device_resident(patchers):
+        ids = {id(p) for p in patchers}
+        return any(id(loaded.model) in ids for loaded in model_management.current_loaded_models)
+
+    @staticmethod
+    def _unload_from_device(patchers):
+        ids = {id(p) for p in patchers}
+        for i in reversed(range(len(model_management.current_loaded_models))):
+            if id(model_management.current_loaded_models[i].model) in ids:
+                loaded = model_management.current_loaded_models.pop(i)
+                loaded.model_unload()
+        model_management.soft_empty_cache()
+
+    def get(self, ckpt_name):
+        """Loaded checkpoint, loading (and evicting) as needed."""
+        if ckpt_name in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(ckpt_name)
+            return self.entries[ckpt_name][0]
+
+        self.misses += 1
+        self._evict_host(max(self.max_models - 1, 0), self.host_budget - self._disk_size(ckpt_name))
+        print(f"📦 Loading checkpoint: {ckpt_name}")
+        started = time.time()
+        checkpoint_output = CheckpointLoaderSimple.load_checkpoint(ckpt_name=ckpt_name)
+        size = self._size(checkpoint_output)
+        print(f"✅ Checkpoint loaded: {ckpt_name} ({size / GB:.1f} GB, {time.time() - started:.1f}s)")
+        self.entries[ckpt_name] = (checkpoint_output, size)
+        # The file size is only an estimate: settle up with the real size
+        self._evict_host(self.max_models, self.host_budget, keep=ckpt_name)
+        return checkpoint_output
+
+    def make_room(self, ckpt_name):
+        """Unload least recently used checkpoints from VRAM until `ckpt_name` fits the device budget."""
+        needed = self.entries[ckpt_name][1]
+        resident = []
+        for name, (output, size) in self.entries.items():
+            patchers = self._patchers(output)
+            if name != ckpt_name and self._device_resident(patchers):
+                resident.append((name, size, patchers))
+        used = sum(size for _, size, _ in resident)
+        for name, size, patchers in resident:
+            if used + needed <= self.device_budget:
+                break
+            print(f"⏏️ Unloading {name} from VRAM ({size / GB:.1f} GB)")
+            self._unload_from_device(patchers)
+            used -= size
+            self.device_evictions += 1
+
+    def evict_others(self, ckpt_name):
+        """Drop every checkpoint except `ckpt_name` (after an out-of-memory error)."""
+        for name in [n for n in self.entries if n != ckpt_name]:
+            self._evict(name)
+
+    @staticmethod
+    def _disk_size(ckpt_name):
+        """Size of the checkpoint file, roughly what its weights take in RAM (0 if not found)."""
+        try:
+            return os.path.getsize(folder_paths.get_full_path("checkpoints", ckpt_name))
+        except (OSError, TypeError):
+            return 0
+
+    def _evict_host(self, max_models, budget, keep=None):
+        """Drop least recently used checkpoints other than `keep` until both limits hold."""
+        while any(n != keep for n in self.entries) and (
+                len(self.entries) > max_models
+                or sum(size for _, size in self.entries.values()) > budget):
+            name = next(n for n in self.entries if n != keep)
+            self._evict(name)
+
+    def _evict(self, name):
+        checkpoint_output, size = self.entries.pop(name)
+        print(f"🗑️ Evicting checkpoint {name} ({size / GB:.1f} GB)")
+        conditioning_cache.invalidate(name)
+        self._unload_from_device(self._patchers(checkpoint_output))
+        del checkpoint_output
+        gc.collect()
+        model_management.soft_empty_cache()
+        self.evictions += 1
+
+    def stats(self):
+        return {
+            "loaded": list(self.entries),
+            "host_gb": round(sum(size for _, size in self.entries.values()) / GB, 2),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "device_evictions": self.device_evictions
+        }
+
+class ConditioningCache:
+    """
+    LRU cache of CLIPTextEncode outputs keyed by (checkpoint name, text).
+
+    Repeated prompts, and the default negative prompt most jobs share, skip
+    the text encoder. Entries are bounded by COND_CACHE_MB of tensor memory
+    and dropped when their checkpoint is evicted from CheckpointCache.
+    """
+
+    def __init__(self):
+        self.max_bytes = float(os.getenv("COND_CACHE_MB", "256")) * 1024 * 1024
+        # (ckpt_name, text) -> (conditioning, size in bytes), least recently used first
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _size(conditioning):
+        """Bytes held by a conditioning ([[tensor, {"pooled_output": tensor, ...}], ...])"""
+        total = 0
+        for tensor, extra in conditioning:
+            for t in (tensor, *extra.values()):
+                if hasattr(t, 'element_size'):
+                    total += t.numel() * t.element_size()
+        return total
+
+    def encode(self, ckpt_name, clip, text):
+        key = (ckpt_name, text)
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+
+        self.misses += 1
+        conditioning = CLIPTextEncode.encode(clip=clip, text=text)[0]
+        size = self._size(conditioning)
+        if size <= self.max_bytes:
+            self.entries[key] = (conditioning, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+        return conditioning
+
+    def invalidate(self, ckpt_name):
+        """Drop every entry encoded with `ckpt_name`'s text encoder"""
+        for key in [k for k in self.entries if k[0] == ckpt_name]:
+            self.size -= self.entries.pop(key)[1]
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "mb": round(self.size / 1024 / 1024, 1),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+checkpoint_cache = CheckpointCache()
+conditioning_cache = ConditioningCache()
+
+# Model ID to checkpoint name mapping, for models without a checkpoint_name in the config
+# These should match files in /comfyui/models/checkpoints/
+MODEL_MAP = {
+    "pony-v6": "ponyDiffusionV6XL_v6StartWithThisOne.safetensors",
+    "abyssorangemix3": "abyssorangemix3.safetensors",
+    "realistic-vision-v5": "realisticVisionV50_v50VAE.safetensors",
+    "flux-dev-uncensored": "flux1-dev.safetensors",
+    "sdxl-turbo-uncensored": "sd_xl_turbo_1.0_fp16.safetensors",
+    "chilloutmix": "chilloutmix_NiPrunedFp32Fix.safetensors",
+    "deliberate-v3": "deliberate_v3.safetensors",
+    "dreamshaper-v8": "dreamshaper_8.safetensors",
+    "epicrealism-v5": "epicrealism_natural_sin_rc1_vae.safetensors",
+    "juggernaut-xl-v9": "juggernautXL_v9.safetensors"
+}
+
+DEFAULT_MODEL_INFO = {
+    'recommended_steps': 25,
+    'recommended_cfg': 7.5,
+    'max_resolution': 1024
+}
+
+class ModelRegistry:
+    """
+    Model configs from the models.json file, indexed by model ID.
+
+    The file is parsed once and re-read only when its mtime changes, so a
+    lookup per job is a stat and a dict access rather than a JSON parse and
+    a scan. If a changed file fails to parse, the previous configs are kept
+    and the file is retried on the next lookup.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime = None
+        self.config = None
+        self.models = {}
+
+    def _refresh(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self.mtime:
+            return
+        if mtime is None:
+            self.config, self.models = None, {}
+        else:
+            try:
+                with open(self.path, 'r') as f:
+                    config = json.load(f)
+            except Exception as e:
+                print(f"Warning: Could not load model config: {e}")
+                return
+            models = {}
+            for model in config.get('models', []):
+                models.setdefault(model['id'], model)
+            self.config, self.models = config, models
+            print(f"📋 Model config loaded: {len(models)} models")
+        self.mtime = mtime
+
+    def load(self):
+        """The whole config, or None if there is no readable file"""
+        self._refresh()
+        return self.config
+
+    def get(self, model_id):
+        """Config for `model_id`, or None"""
+        self._refresh()
+        return self.models.get(model_id)
+
+model_registry = ModelRegistry(os.getenv("MODEL_CONFIG_PATH", "/app/config/models.json"))
+
+def load_model_config():
+    """Load model configuration from file"""
+    return model_registry.load()
+
+def get_model_checkpoint_name(model_id):
+    """Get checkpoint filename for a model ID"""
+    model = model_registry.get(model_id)
+    if model and model.get('checkpoint_name'):
+        return model['checkpoint_name']
+    return MODEL_MAP.get(model_id, "ponyDiffusionV6XL_v6StartWithThisOne.safetensors")
+
+def get_model_info(model_id):
+    """Get model information from config"""
+    return model_registry.get(model_id) or dict(DEFAULT_MODEL_INFO)
+
+def load_checkpoint(ckpt_name):
+    """Load a checkpoint model (cached) and make room for it in VRAM"""
+    try:
+        checkpoint_output = checkpoint_cache.get(ckpt_name)
+    except Exception as e:
+        print(f"❌ Error loading checkpoint {ckpt_name}: {e}")
+        raise
+    checkpoint_cache.make_room(ckpt_name)
+    return checkpoint_output
+
+def is_out_of_memory(error):
+    return isinstance(error, MemoryError) or "out of memory" in str(error).lower()
+
+def batch_conditioning(conditionings):
+    """Concatenate single-prompt conditionings along the batch dimension"""
+    if len(conditionings) == 1:
+        return conditionings[0]
+    tensors = [c[0][0] for c in conditionings]
+    # Long prompts encode to more 77-token chunks; repeating the shorter ones
+    # up to a common length leaves cross-attention unchanged (ComfyUI batches
+    # conds of different lengths the same way)
+    length = math.lcm(*(t.shape[1] for t in tensors))
+    cond = torch.cat([t.repeat(1, length // t.shape[1], 1) for t in tensors])
+    extra = {}
+    for key, value in conditionings[0][0][1].items():
+        extra[key] = torch.cat([c[0][1][key] for c in conditionings]) if torch.is_tensor(value) else value
+    return [[cond, extra]]
+
+def sample_images(ckpt_name, items, width, height, steps, cfg, sampler_name, scheduler, denoise):
+    """
+    Run checkpoint -> CLIPTextEncode -> KSampler -> VAEDecode for
+    (prompt, negative_prompt, seed) items sharing every other setting, in one
+    batch, and return their PIL images in order
+    """
+    # Load checkpoint
+    checkpoint_output = load_checkpoint(ckpt_name)
+    model = checkpoint_output[0]
+    clip = checkpoint_output[1]
+    vae = checkpoint_output[2]
+    
+    # Encode prompts (cached per checkpoint)
+    positive_cond = batch_conditioning([conditioning_cache.encode(ckpt_name, clip, p) for p, _, _ in items])
+    negative_cond = batch_conditioning([conditioning_cache.encode(ckpt_name, clip, n) for _, n, _ in items])
+    
+    # Create latent image
+    latent = EmptyLatentImage.generate(width=width, height=height, batch_size=len(items))[0]
+    
+    if len(items) == 1:
+        # Sample using ComfyUI KSampler node
+        # All parameters are ComfyUI node inputs
+        samples = KSampler.sample(
+            model=model,                    # From CheckpointLoaderSimple node
+            seed=items[0][2],               # KSampler node input
+            steps=steps,                    # KSampler node input
+            cfg=cfg,                        # KSampler node input (guidance_scale)
+            sampler_name=sampler_name,      # KSampler node input
+            scheduler=scheduler,            # KSampler node input
+            positive=positive_cond,         # From CLIPTextEncode node
+            negative=negative_cond,         # From CLIPTextEncode node
+            latent_image=latent,            # From EmptyLatentImage node
+            denoise=denoise                 # KSampler node input
+        )[0]
+    else:
+        # KSampler draws one noise tensor from one seed for the whole batch;
+        # build it per item instead, so each starts from its own seed's noise
+        latent_image = comfy.sample.fix_empty_latent_channels(model, latent["samples"])
+        noise = torch.cat([comfy.sample.prepare_noise(latent_image[i:i + 1], seed)
+                           for i, (_, _, seed) in enumerate(items)])
+        samples = {**latent, "samples": comfy.sample.sample(
+            model, noise, steps, cfg, sampler_name, scheduler, positive_cond, negative_cond,
+            latent_image, denoise=denoise, seed=items[0][2])}
+    
+    # Decode
+    decoded = VAEDecode.decode(samples=samples, vae=vae)[0]
+    
+    # Convert to PIL Images
+    return [Image.fromarray((255. * image_tensor.cpu().numpy()).astype('uint8')) for image_tensor in decoded]
+
+def sample_with_recovery(ckpt_name, items, *settings):
+    """sample_images, retrying out-of-memory errors with fewer checkpoints cached, then in smaller batches"""
+    try:
+        return sample_images(ckpt_name, items, *settings)
+    except Exception as e:
+        if not is_out_of_memory(e):
+            raise
+        if len(checkpoint_cache.entries) > 1:
+            # Other cached checkpoints may be what filled the GPU; retry
+            # without them rather than fail (and have the backend's healer
+            # shrink the resolution for a problem that isn't the resolution)
+            print(f"⚠️ Out of memory with {len(checkpoint_cache.entries)} checkpoints cached, evicting the others")
+            checkpoint_cache.evict_others(ckpt_name)
+            return sample_with_recovery(ckpt_name, items, *settings)
+        if len(items) > 1:
+            print(f"⚠️ Out of memory sampling a batch of {len(items)}, splitting it")
+            half = len(items) // 2
+            return (sample_with_recovery(ckpt_name, items[:half], *settings)
+                    + sample_with_recovery(ckpt_name, items[half:], *settings))
+        raise
+
+def encode_png(image):
+    buffered = io.BytesIO()
+    image.save(buffered, format="PNG")
+    return base64.b64encode(buffered.getvalue()).decode('utf-8')
+
+def generate_image(job):
+    """
+    Generate image using ComfyUI workflow
+    Supports all uncensored models
+
+    A `batch` list of {prompt, negative_prompt, seed} items generates one
+    image per item in a single sampling pass; every other setting is shared
+    and missing item fields fall back to the top-level ones.
+    """
+    job_input = job.get("input", {})
+    
+    # Extract parameters
+    prompt = job_input.get("prompt", "a beautiful landscape")
+    negative_prompt = job_input.get("negative_prompt", "bad quality, blurry")
+    width = int(job_input.get("width", 1024))
+    height = int(job_input.get("height", 1024))
+    steps = int(job_input.get("num_inference_steps", 25))
+    cfg = float(job_input.get("guidance_scale", 7.5))
+    seed = job_input.get("seed", random.randint(1, 999999999))
+    model_id = job_input.get("model_id", "pony-v6")
+    batch = job_input.get("batch")
+    if batch:
+        items = [(item.get("prompt", prompt), item.get("negative_prompt", negative_prompt),
+                  item.get("seed", random.randint(1, 999999999))) for item in batch]
+    else:
+        items = [(prompt, negative_prompt, seed)]
+    
+    if batch:
+        print(f"🎨 Generating batch of {len(items)}: {items[0][0][:50]}...")
+    else:
+        print(f"🎨 Generating: {prompt[:50]}...")
+    print(f"   Model: {model_id}")
+    print(f"   Size: {width}x{height}, Steps: {steps}, CFG: {cfg}, Seed: {', '.join(str(s) for _, _, s in items)}")
+    
+    # Get model info
+    model_info = get_model_info(model_id)
+    
+    # Override steps/cfg with recommended if not provided
+    if steps == 25 and 'recommended_steps' in model_info:
+        steps = model_info['recommended_steps']
+    if cfg == 7.5 and 'recommended_cfg' in model_info:
+        cfg = model_info['recommended_cfg']
+    
+    # Clamp resolution
+    max_res = model_info.get('max_resolution', 1024)
+    width = min(width, max_res)
+    height = min(height, max_res)
+    # Ensure divisible by 8
+    width = (width // 8) * 8
+    height = (height // 8) * 8
+    
+    # Get checkpoint name
+    ckpt_name = get_model_checkpoint_name(model_id)
+    
+    # Get sampler settings from input (all ComfyUI node parameters)
+    sampler_name = job_input.get("sampler_name", "euler_ancestral")
+    scheduler = job_input.get("scheduler", "normal")
+    denoise = float(job_input.get("denoise", 1.0))
+    
+    try:
+        started = time.time()
+        images = sample_with_recovery(ckpt_name, items, width, height, steps, cfg,
+                                      sampler_name, scheduler, denoise)
+        
+        # Convert to base64
+        encoded = [encode_png(image) for image in images]
+        
+        print(f"✅ Generation complete ({len(items)} in {time.time() - started:.1f}s)")
+        
+        result = {
+            "model_id": model_id,
+            "width": width,
+            "height": height,
+            "steps": steps,
+            "cfg": cfg,
+            "checkpoint_cache": checkpoint_cache.stats(),
+            "conditioning_cache": conditioning_cache.stats()
+        }
+        if batch:
+            result["images"] = [{"image_base64": img_base64, "prompt": p, "seed": s}
+                                for img_base64, (p, _, s) in zip(encoded, items)]
+        else:
+            result.update({"image_base64": encoded[0], "prompt": prompt, "seed": seed})
+        return result
+        
+    except Exception as e:
+        error_msg = str(e)
+        print(f"❌ Generation error: {error_msg}")
+        return {
+            "error": error_msg,
+            "model_id": model_id,
+            "prompt": prompt
+        }
+
+def preload_model_ids():
+    """Model IDs to warm up: PRELOAD_MODELS, else the PRELOAD_TOP_N most popular in the model config"""
+    explicit = os.getenv("PRELOAD_MODELS")
+    if explicit is not None:
+        return [m.strip() for m in explicit.split(",") if m.strip()]
+    top_n = int(os.getenv("PRELOAD_TOP_N", "1"))
+    config = load_model_config() or {}
+    ranked = sorted((m for m in config.get('models', []) if m.get('popularity')),
+                    key=lambda m: m['popularity'], reverse=True)
+    return [m['id'] for m in ranked[:top_n]]
+
+def preload_checkpoints():
+    """
+    Load the hottest checkpoints and run one tiny sample on the hottest, so
+    the first jobs after a cold start don't pay for checkpoint loading and
+    CUDA kernel/allocator setup. Failures are logged, never fatal.
+    """
+    model_ids = preload_model_ids()[:checkpoint_cache.max_models]
+    if not model_ids:
+        print("ℹ️ No checkpoints to preload (set PRELOAD_MODELS, or add popularity to models.json)")
+        return
+    started = time.time()
+    ckpt_names = list(dict.fromkeys(get_model_checkpoint_name(m) for m in model_ids))
+    # Hottest last, so it is the most recently used and the last to be evicted
+    for ckpt_name in reversed(ckpt_names):
+        try:
+            checkpoint_cache.get(ckpt_name)
+        except Exception as e:
+            print(f"⚠️ Could not preload {ckpt_name}: {e}")
+    hottest = ckpt_names[0]
+    if hottest in checkpoint_cache.entries:
+        try:
+            sample_images(hottest, [("warm-up", "", 0)], 64, 64, 1, 1.0, "euler", "normal", 1.0)
+            print(f"🔥 Warm-up sample done on {hottest}")
+        except Exception as e:
+            print(f"⚠️ Warm-up sample failed on {hottest}: {e}")
+    print(f"✅ Preloaded {list(checkpoint_cache.entries)} in {time.time() - started:.1f}s")
+
+
+# Start RunPod serverless handler
+print("🚀 ComfyUI Multi-Model Worker Starting...")
+print("   ComfyUI path: /comfyui")
+print("   Models directory: /comfyui/models/checkpoints")
+# Warm up before runpod.serverless.start, which is when the worker reports ready
+preload_checkpoints()
+runpod.serverless.start({"handler": generate_image})
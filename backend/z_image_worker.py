@@ -6,11 +6,26 @@ import requests
 import time
 import json
 import random
+import hmac
+import uuid
+import httpx
 from pathlib import Path
 from datetime import datetime
 import fal_client
 from base_worker import BaseWorker
 from self_healing_agent import SelfHealingAgent
+from runpod_client import RunPodClient, RunPodError
+from runpod_health import EndpointHealthCache, format_workers
+from runpod_poller import RunPodPoller
+from endpoint_router import EndpointRouter, RouterSlot
+from endpoint_mapping import endpoint_ids, load_endpoints
+from warm_pool import WarmPoolController
+from circuit_breaker import CircuitBreaker
+from hedging import HedgeBudget, LatencyTracker
+from image_result import ImageResult
+from artifact_store import ArtifactStore
+from result_cache import ResultCache
+from runpod_batcher import RunPodBatcher
 
 class ZImageWorker(BaseWorker):
     def __init__(self):
@@ -26,12 +41,67 @@ class ZImageWorker(BaseWorker):
         
         if self.runpod_api_key:
             runpod.api_key = self.runpod_api_key
+
+        # Async RunPod API client (pooled per endpoint), one health cache for
+        # every /health reader, and the shared status poller for in-flight jobs
+        self.runpod = RunPodClient(self.runpod_api_key)
+        self.runpod_health = EndpointHealthCache(self.runpod)
+        self.runpod_poller = RunPodPoller(self.runpod, health=self.runpod_health)
+        # Groups compatible unseeded generations into one RunPod job (RUNPOD_BATCH_MAX=1 = off)
+        self.runpod_batcher = RunPodBatcher(self.runpod, self.runpod_poller)
+        # Spreads models with several endpoints by expected wait
+        self.endpoint_router = EndpointRouter(self.runpod_health)
+        # Provider name -> CircuitBreaker, created on first use
+        self.breakers = {}
+
+        # Tail-latency hedging for RunPod (HEDGE_PROVIDER empty = off)
+        self.hedge_provider = os.getenv("HEDGE_PROVIDER", "").strip() or None
+        self.hedge_percentile = float(os.getenv("HEDGE_PERCENTILE", "95"))
+        self.hedge_min_samples = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+        self.hedge_min_delay = float(os.getenv("HEDGE_MIN_DELAY", "10"))
+        self.runpod_latency = LatencyTracker()
+        self.hedge_budget = HedgeBudget()
+
+        # Endpoints whose workersMin follows demand (comma-separated; empty = off)
+        self.warm_pools = [
+            WarmPoolController(self.runpod, self.runpod_health, eid, self._count_queued_generations)
+            for eid in (e.strip() for e in os.getenv("WARM_POOL_ENDPOINTS", "").split(',')) if eid
+        ]
+
+        # RunPod completion webhooks land on server.py; polling is only the fallback
+        self.public_url = (os.getenv("WORKER_PUBLIC_URL") or "").rstrip('/')
+        self.webhook_secret = os.getenv("RUNPOD_WEBHOOK_SECRET") or uuid.uuid4().hex
+        # With several Fly machines behind WORKER_PUBLIC_URL, webhooks name the
+        # machine waiting for the job and server.py has fly-replay route them there
+        self.machine_id = os.getenv("FLY_MACHINE_ID")
+        # Jobs still unfinished after this are cancelled on RunPod
+        self.runpod_timeout = int(os.getenv("RUNPOD_JOB_TIMEOUT", "1800"))
+
+        # Generated images go to PocketBase file records, not into job results
+        # ('inline' keeps the old base64 data: URIs)
+        self.artifacts = ArtifactStore(self.store) if os.getenv("ARTIFACT_STORE", "pocketbase") == "pocketbase" else None
+        # Outputs of seeded RunPod generations, reused for identical requests
+        # (RESULT_CACHE_MAX_MB=0 turns it off)
+        self.result_cache = ResultCache() if float(os.getenv("RESULT_CACHE_MAX_MB", "2048")) > 0 else None
+        # Generation key -> (future, leader task id) for deterministic jobs in flight
+        self._generations = {}
             
         print(f"🚀 Z-Image Worker initialized")
         print(f"   RunPod endpoint: {self.endpoint_id or 'Not configured'}")
         print(f"   Fal.ai: {'Configured' if self.fal_api_key else 'Not configured'}")
         print(f"   Models configured: {len(self.model_config.get('models', [])) if self.model_config else 0}")
     
+    def background_jobs(self):
+        return [controller.run() for controller in self.warm_pools]
+
+    async def _count_queued_generations(self) -> int:
+        return await self.store.count_records('jobs', "status='queued' && type='image_generation'")
+
+    async def shutdown(self):
+        await self.runpod_poller.close()
+        await self.runpod.close()
+        await super().shutdown()
+
     def _load_api_keys(self):
         """Load API keys from Supabase, MCP, or environment variables"""
         # Initialize attributes first
@@ -125,26 +195,29 @@ class ZImageWorker(BaseWorker):
             return None
     
     def _load_model_config(self):
-        """Load model configuration from JSON file"""
-        config_path = Path(__file__).parent.parent.parent / "config" / "models.json"
+        """Load model configuration from JSON file (MODEL_CONFIG_PATH, else the repo's config/)"""
+        config_path = Path(os.getenv("MODEL_CONFIG_PATH") or Path(__file__).parent.parent / "config" / "models.json")
         try:
             if config_path.exists():
                 with open(config_path, 'r') as f:
                     return json.load(f)
+            print(f"Warning: No model config at {config_path}")
         except Exception as e:
             print(f"Warning: Could not load model config: {e}")
         return None
     
     def _load_endpoint_mapping(self):
-        """Load endpoint ID mapping from file or environment"""
-        # Try to load from endpoints.json file
-        endpoints_path = Path(__file__).parent.parent / "endpoints.json"
+        """
+        Load the model_id -> [endpoint_id, ...] mapping from file or environment.
+
+        An endpoints.json entry is either one endpoint ({"endpoint_id": ...}) or
+        a list of them (e.g. the same model on different GPU types or regions).
+        """
+        # Try to load from endpoints.json file (next to this module)
         try:
-            if endpoints_path.exists():
-                with open(endpoints_path, 'r') as f:
-                    endpoints = json.load(f)
-                    # Convert to model_id -> endpoint_id mapping
-                    return {model_id: info['endpoint_id'] for model_id, info in endpoints.items()}
+            endpoints = load_endpoints()
+            if endpoints:
+                return {model_id: endpoint_ids(info) for model_id, info in endpoints.items()}
         except Exception as e:
             print(f"Warning: Could not load endpoint mapping: {e}")
         
@@ -153,18 +226,30 @@ class ZImageWorker(BaseWorker):
         if default_endpoint:
             # Create mapping for all known models
             models = self.model_config.get('models', []) if self.model_config else []
-            return {model['id']: default_endpoint for model in models}
+            return {model['id']: [default_endpoint] for model in models}
         
         return {}
-    
-    def get_endpoint_for_model(self, model_id):
-        """Get RunPod endpoint ID for a specific model"""
+
+    def get_endpoints_for_model(self, model_id):
+        """All RunPod endpoint IDs that serve a model"""
         # First check explicit mapping
-        if model_id in self.model_endpoints:
+        if self.model_endpoints.get(model_id):
             return self.model_endpoints[model_id]
         
         # Fallback to default endpoint
-        return self.endpoint_id
+        return [self.endpoint_id] if self.endpoint_id else []
+
+    def get_endpoint_for_model(self, model_id):
+        """Get RunPod endpoint ID for a specific model (first configured one)"""
+        endpoints = self.get_endpoints_for_model(model_id)
+        return endpoints[0] if endpoints else None
+
+    async def choose_endpoint_for_model(self, model_id):
+        """Endpoint with the smallest expected wait among those serving the model"""
+        endpoints = self.get_endpoints_for_model(model_id)
+        if not endpoints:
+            return None
+        return await self.endpoint_router.choose(endpoints)
 
     async def process_task(self, task: dict) -> dict:
         """
@@ -183,6 +268,249 @@ class ZImageWorker(BaseWorker):
         if task['type'] == 'audio_transcription':
              return await self.transcribe_audio(task, input_data)
 
+        key = self._generation_key(input_data)
+        if key is None:
+            return await self.generate_with_fallback(task, input_data, self.get_provider_chain(input_data))
+        return await self._generate_coalesced(task, input_data, key)
+
+    async def _generate_coalesced(self, task: dict, input_data: dict, key: str) -> dict:
+        """
+        Run a deterministic generation once for every identical job in
+        flight. The first job becomes the leader (cache lookup, then the
+        provider chain); later ones await the leader's future and get a copy
+        of its result. If the leader is cancelled, a waiting job takes over.
+        """
+        while key in self._generations:
+            future, leader_id = self._generations[key]
+            print(f"🔗 Task {task.get('id')} attached to identical in-flight task {leader_id}")
+            try:
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                continue
+            if 'output' not in result:
+                return result
+            return {**result, 'output': {**result['output'], 'coalesced_with': leader_id}}
+
+        future = asyncio.get_running_loop().create_future()
+        self._generations[key] = (future, task.get('id'))
+        try:
+            result = (await self.cached_result(task, input_data, key)
+                      or await self.generate_with_fallback(task, input_data, self.get_provider_chain(input_data)))
+        except BaseException:
+            # Followers retry on their own rather than inherit this failure
+            future.cancel()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._generations[key]
+
+    def _generation_key(self, input_data: dict):
+        """
+        Key identifying a deterministic generation: a seeded request on the
+        standard RunPod path. None when the output isn't reproducible.
+        """
+        if (input_data.get('seed') is None
+                or input_data.get('provider', 'runpod') != 'runpod'
+                or input_data.get('workflow') or input_data.get('use_comfy_workflow')):
+            return None
+        params = self._runpod_generation_params(input_data)
+        params['checkpoint'] = self._model_entry(params['model_id']).get('checkpoint_name')
+        params['image_url'] = input_data.get('image_url')
+        return ResultCache.key(params)
+
+    async def cached_result(self, task: dict, input_data: dict, cache_key: str):
+        """The result of an identical earlier generation, if it is still cached."""
+        if self.result_cache is None:
+            return None
+        try:
+            data = await asyncio.to_thread(self.result_cache.get, cache_key)
+        except Exception as e:
+            print(f"⚠️ Result cache lookup failed for task {task.get('id')}, generating instead: {e}")
+            return None
+        if data is None:
+            return None
+        print(f"💾 Result cache hit for task {task.get('id')} ({cache_key[:12]})")
+        image_output = await self._stored_artifact(task, cache_key)
+        if image_output is None:
+            image_output = await self._image_output(task, ImageResult.from_bytes(data), 'runpod',
+                                                    (input_data.get('width', 1024), input_data.get('height', 1024)))
+            if image_output['artifacts'][0].get('key'):
+                await self._remember_artifact(task, cache_key, image_output['artifacts'][0])
+        return {
+            'success': True,
+            'output': {
+                'prompt': input_data.get('prompt') or input_data.get('description') or "A beautiful scene",
+                'provider': 'runpod',
+                'cached': True
+            },
+            **image_output
+        }
+
+    async def _stored_artifact(self, task: dict, cache_key: str):
+        """
+        `images`/`artifacts` entries for the upload an earlier generation (or
+        cache hit) already made of this cached image, if it still exists.
+        """
+        if not self.artifacts:
+            return None
+        try:
+            meta = await asyncio.to_thread(self.result_cache.get_meta, cache_key)
+            artifact = (meta or {}).get('artifact')
+            if not artifact or not await self.artifacts.exists(artifact['key']):
+                return None
+        except Exception as e:
+            print(f"⚠️ Could not look up the stored image for task {task.get('id')}, uploading it again: {e}")
+            return None
+        return {'images': [{'url': artifact['url']}], 'artifacts': [artifact]}
+
+    async def _remember_artifact(self, task: dict, cache_key: str, artifact: dict):
+        """Record where a cached image was uploaded, so later hits reuse that artifact"""
+        try:
+            await asyncio.to_thread(self.result_cache.put_meta, cache_key, {'artifact': artifact})
+        except Exception as e:
+            print(f"⚠️ Could not record the stored image for task {task.get('id')}: {e}")
+
+    def get_provider_chain(self, input_data: dict) -> list:
+        """
+        Providers to try in order: the requested one, then the model's
+        `fallback_providers` from models.json (or PROVIDER_FALLBACKS).
+        """
+        chain = [input_data.get('provider', 'runpod')]
+        model = self._model_entry(input_data.get('model_id', 'pony-v6'))
+        fallbacks = model.get('fallback_providers')
+        if fallbacks is None:
+            fallbacks = [p.strip() for p in os.getenv("PROVIDER_FALLBACKS", "").split(',') if p.strip()]
+        for provider in fallbacks:
+            if provider not in chain:
+                chain.append(provider)
+        return chain
+
+    def _model_entry(self, model_id: str) -> dict:
+        models = self.model_config.get('models', []) if self.model_config else []
+        return next((m for m in models if m.get('id') == model_id), {})
+
+    async def generate_with_fallback(self, task: dict, input_data: dict, chain: list) -> dict:
+        """
+        Try each provider in the chain until one succeeds, skipping providers
+        whose circuit breaker is open instead of paying their timeout again.
+        The last provider is always tried: with nothing to fall back to, an
+        open breaker would only turn a slow job into a failed one.
+        """
+        result = None
+        for i, provider in enumerate(chain):
+            breaker = self.breakers.setdefault(provider, CircuitBreaker(provider))
+            allowed = breaker.allow()
+            if not allowed and i + 1 < len(chain):
+                print(f"⛔ Skipping {provider}: circuit open")
+                continue
+
+            started = time.monotonic()
+            try:
+                if provider == 'runpod':
+                    result = await self.generate_with_hedge(task, input_data)
+                else:
+                    result = await self.generate_with_provider(provider, task, input_data)
+            except asyncio.CancelledError:
+                if allowed:
+                    breaker.abandon()
+                raise
+            except Exception as e:
+                result = {'success': False, 'error': f'{provider} error: {e}'}
+            # A call made past an open breaker doesn't count; its half-open trial decides
+            if allowed:
+                if (result.get('output') or {}).get('hedged_by'):
+                    # RunPod was cancelled mid-flight, so this says nothing about its health
+                    breaker.abandon()
+                else:
+                    breaker.record(result.get('success', False), time.monotonic() - started)
+
+            if result.get('success'):
+                if i > 0:
+                    result.setdefault('output', {})['fallback_from'] = chain[0]
+                return result
+            if i + 1 < len(chain):
+                print(f"↪️ {provider} failed ({result.get('error')}), falling back to {chain[i + 1]}")
+        return result
+
+    async def generate_with_hedge(self, task: dict, input_data: dict) -> dict:
+        """
+        RunPod generation with tail-latency hedging.
+
+        If the job is still running after the model's observed p95 and the
+        hedge budget allows, the same request also goes to the hedge provider
+        (model `hedge_provider` or HEDGE_PROVIDER). The first success wins and
+        the other request is cancelled.
+        """
+        model_id = input_data.get('model_id', 'pony-v6')
+        hedge_provider = self._model_entry(model_id).get('hedge_provider', self.hedge_provider)
+        delay = self._hedge_delay(model_id) if hedge_provider else None
+
+        started = time.monotonic()
+        primary = asyncio.create_task(self.generate_with_provider('runpod', task, input_data))
+        pending = {primary}
+        hedge = None
+        breaker = None
+        try:
+            if delay is not None:
+                await asyncio.wait(pending, timeout=delay)
+            if not primary.done():
+                breaker = self.breakers.setdefault(hedge_provider, CircuitBreaker(hedge_provider)) if delay is not None else None
+                if breaker and breaker.allow():
+                    if self.hedge_budget.try_spend(task.get('user_id')):
+                        print(f"🏁 Task {task.get('id')} past RunPod p{self.hedge_percentile:g} "
+                              f"({delay:.0f}s) for {model_id}, hedging on {hedge_provider}")
+                        hedge = asyncio.create_task(self.generate_with_provider(hedge_provider, task, input_data))
+                        pending.add(hedge)
+                    else:
+                        breaker.abandon()
+                        print(f"💸 Hedge budget exhausted, not hedging task {task.get('id')}")
+
+            hedge_started = time.monotonic()
+            result = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for finished in done:
+                    try:
+                        outcome = finished.result()
+                    except Exception as e:
+                        outcome = {'success': False, 'error': str(e)}
+                    if finished is hedge:
+                        breaker.record(outcome.get('success', False), time.monotonic() - hedge_started)
+                    elif outcome.get('success'):
+                        self.runpod_latency.record(model_id, time.monotonic() - started)
+                    if outcome.get('success'):
+                        if hedge is not None:
+                            winner = hedge_provider if finished is hedge else 'runpod'
+                            print(f"🏁 Task {task.get('id')}: {winner} won the hedge race")
+                            if finished is hedge:
+                                outcome.setdefault('output', {})['hedged_by'] = hedge_provider
+                        return outcome
+                    # Keep RunPod's own error if both lose
+                    if result is None or finished is primary:
+                        result = outcome
+            return result
+        finally:
+            for loser in pending:
+                loser.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            if hedge in pending:
+                breaker.abandon()
+            if primary in pending:
+                # Censored tail sample: RunPod took at least this long
+                self.runpod_latency.record(model_id, time.monotonic() - started)
+
+    def _hedge_delay(self, model_id: str):
+        """Seconds to give RunPod before hedging, or None until enough samples exist."""
+        if self.runpod_latency.count(model_id) < self.hedge_min_samples:
+            return None
+        return max(self.hedge_min_delay, self.runpod_latency.percentile(model_id, self.hedge_percentile))
+
+    async def generate_with_provider(self, provider: str, task: dict, input_data: dict) -> dict:
         if provider == 'openrouter':
             return await self.generate_with_openrouter(task, input_data)
         elif provider == 'fal':
@@ -194,7 +522,9 @@ class ZImageWorker(BaseWorker):
             # ALL RunPod models use ComfyUI pipeline
             # ComfyUI is the engine, models are checkpoints loaded inside it
             model_id = input_data.get('model_id', 'pony-v6')
-            target_endpoint = input_data.get('endpoint_id') or self.get_endpoint_for_model(model_id)
+            pinned = input_data.get('endpoint_id')
+            # choose() takes the router slot for the endpoint it picks
+            target_endpoint = pinned or await self.choose_endpoint_for_model(model_id)
             
             
 
@@ -204,7 +534,7 @@ class ZImageWorker(BaseWorker):
             
             # All RunPod requests use ComfyUI worker (handler_multi.py)
             # The worker loads the correct model checkpoint based on model_id
-            result = await self.generate_with_runpod(task, input_data, target_endpoint)
+            result = await self.generate_with_runpod(task, input_data, target_endpoint, reserved=not pinned)
             return result
 
     async def generate_with_fal(self, task: dict, input_data: dict) -> dict:
@@ -242,16 +572,10 @@ class ZImageWorker(BaseWorker):
             if not result or 'images' not in result or not result['images']:
                 return {'success': False, 'error': 'No images returned from Fal.ai'}
             
-            image_url = result['images'][0]['url']
+            fal_image = result['images'][0]
+            image_url = fal_image['url']
             print(f"✅ Fal.ai success: {image_url}")
             
-            # Download the image
-            img_response = requests.get(image_url)
-            if img_response.status_code != 200:
-                return {'success': False, 'error': f'Failed to download image: {img_response.status_code}'}
-            
-            img_bytes = img_response.content
-            
             return {
                 'success': True,
                 'output': {
@@ -262,9 +586,10 @@ class ZImageWorker(BaseWorker):
                 'artifacts': [
                     {
                         'type': 'image_png',
-                        'content_type': 'image/png',
+                        'content_type': fal_image.get('content_type', 'image/png'),
                         'filename': f"generated_{task.get('id')}.png",
-                        'metadata': {'width': 1024, 'height': 1024, 'provider': 'fal-ai'}
+                        'metadata': {'width': fal_image.get('width', 1024), 'height': fal_image.get('height', 1024),
+                                     'provider': 'fal-ai'}
                     }
                 ]
             }
@@ -292,29 +617,28 @@ class ZImageWorker(BaseWorker):
             
             print(f"🎨 Generating with OpenRouter: {prompt[:50]}... ({width}x{height})")
             
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.openrouter_api_key}",
-                    "Content-Type": "application/json",
-                    "HTTP-Referer": "https://uncensored-studio.fly.dev",
-                    "X-Title": "Uncensored Studio"
-                },
-                json={
-                    "model": model,
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    "modalities": ["image", "text"]
-                },
-                timeout=120
-            )
-            
-            response.raise_for_status()
-            data = response.json()
+            async with httpx.AsyncClient(timeout=120) as client:
+                response = await client.post(
+                    "https://openrouter.ai/api/v1/chat/completions",
+                    headers={
+                        "Authorization": f"Bearer {self.openrouter_api_key}",
+                        "Content-Type": "application/json",
+                        "HTTP-Referer": "https://uncensored-studio.fly.dev",
+                        "X-Title": "Uncensored Studio"
+                    },
+                    json={
+                        "model": model,
+                        "messages": [
+                            {
+                                "role": "user",
+                                "content": prompt
+                            }
+                        ],
+                        "modalities": ["image", "text"]
+                    }
+                )
+                response.raise_for_status()
+                data = response.json()
             
             if not data.get('choices') or len(data['choices']) == 0:
                 return {'success': False, 'error': 'No response from OpenRouter'}
@@ -330,14 +654,9 @@ class ZImageWorker(BaseWorker):
             if not image_data:
                 return {'success': False, 'error': 'No image URL in OpenRouter response'}
             
-            if image_data.startswith('data:'):
-                img_b64 = image_data.split(',')[1]
-            else:
+            if not image_data.startswith('data:'):
                 print(f"⬇️ Downloading image from OpenRouter...")
-                img_response = requests.get(image_data, timeout=60)
-                if img_response.status_code != 200:
-                    return {'success': False, 'error': f'Failed to download image: {img_response.status_code}'}
-                img_b64 = base64.b64encode(img_response.content).decode('utf-8')
+            image_output = await self._image_output(task, image_data, 'openrouter', (width, height))
             
             print(f"✅ OpenRouter success!")
             
@@ -347,20 +666,15 @@ class ZImageWorker(BaseWorker):
                     'prompt': prompt,
                     'provider': 'openrouter'
                 },
-                'images': [{'url': f"data:image/png;base64,{img_b64}"}],
-                'artifacts': [
-                    {
-                        'type': 'image_png',
-                        'content_type': 'image/png',
-                        'filename': f"generated_{task.get('id')}.png",
-                        'metadata': {'width': width, 'height': height, 'provider': 'openrouter'}
-                    }
-                ]
+                **image_output
             }
             
-        except requests.exceptions.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             err_msg = str(e)
-            error_data = e.response.json() if e.response else {}
+            try:
+                error_data = e.response.json()
+            except ValueError:
+                error_data = {}
             if error_data.get('error', {}).get('message'):
                 err_msg = error_data['error']['message']
             print(f"❌ OpenRouter HTTP error: {err_msg}")
@@ -453,12 +767,71 @@ class ZImageWorker(BaseWorker):
             print(f"❌ ComfyUI error: {str(e)}")
             return {'success': False, 'error': f'ComfyUI error: {str(e)}'}
 
-    async def generate_with_runpod(self, task: dict, input_data: dict, endpoint_id: str = None) -> dict:
-        """Generate image using RunPod endpoint"""
-        
+    def _runpod_generation_params(self, input_data: dict) -> dict:
+        """
+        Input for the ComfyUI worker (handler_multi.py), with healer overrides
+        applied. Every value here feeds the generation, so with a fixed seed
+        the same params give the same image.
+        """
+        prompt = input_data.get('prompt') or input_data.get('description') or "A beautiful scene"
+        seed = input_data.get('seed')  # may be present but null
+        steps = int(input_data.get('num_inference_steps', 25))
+        guidance = float(input_data.get('guidance_scale', 7.5))
 
+        # CHECK HEALER OVERRIDES
+        model_id = input_data.get('model_id', 'pony-v6')
+        overrides = self.healer.get_overrides(model_id)
+        
+        width = int(overrides.get('width', input_data.get('width', 1024)))
+        height = int(overrides.get('height', input_data.get('height', 1024)))
         
+        # Check step cap
+        req_steps = steps
+        if 'max_steps' in overrides:
+            req_steps = min(steps, overrides['max_steps'])
+
+        # ALL parameters map to ComfyUI nodes:
+        # - prompt → CLIPTextEncode node (positive)
+        # - negative_prompt → CLIPTextEncode node (negative)
+        # - width/height → EmptyLatentImage node
+        # - num_inference_steps → KSampler node (steps)
+        # - guidance_scale → KSampler node (cfg)
+        # - model_id → CheckpointLoaderSimple node (loads checkpoint)
+        # - seed → KSampler node
+        # - sampler_name → KSampler node
+        # - scheduler → KSampler node
+        return {
+            "prompt": prompt,                                    # → CLIPTextEncode node
+            "negative_prompt": input_data.get('negative_prompt', 'bad quality, blurry'),  # → CLIPTextEncode node
+            "width": width,                                      # → EmptyLatentImage node
+            "height": height,                                    # → EmptyLatentImage node
+            "num_inference_steps": req_steps,                   # → KSampler node (steps)
+            "guidance_scale": guidance,                          # → KSampler node (cfg)
+            "model_id": model_id,                                # → CheckpointLoaderSimple node (loads checkpoint)
+            "seed": int(seed) if seed is not None else random.randint(1, 999999999),  # → KSampler node
+            "sampler_name": input_data.get('sampler_name', 'euler_ancestral'),  # → KSampler node
+            "scheduler": input_data.get('scheduler', 'normal'),  # → KSampler node
+            "denoise": float(input_data.get('denoise', 1.0))     # → KSampler node
+        }
+
+    async def generate_with_runpod(self, task: dict, input_data: dict, endpoint_id: str = None,
+                                   reserved: bool = False) -> dict:
+        """
+        Generate image using RunPod endpoint.
+
+        Holds the endpoint's router slot until the job ends: `reserved` means
+        EndpointRouter.choose() already took it, otherwise it is taken here.
+        """
         eid = endpoint_id or self.endpoint_id
+        if eid and not reserved:
+            self.endpoint_router.started(eid)
+        slot = RouterSlot(self.endpoint_router, eid)
+        try:
+            return await self._generate_with_runpod(task, input_data, eid, slot)
+        finally:
+            slot.release()
+
+    async def _generate_with_runpod(self, task: dict, input_data: dict, eid: str, slot: RouterSlot) -> dict:
         if not eid:
             
 
@@ -496,212 +869,133 @@ class ZImageWorker(BaseWorker):
              }
         else:
             # Standard SDXL/SD Payload
-            
-            # CHECK HEALER OVERRIDES
-            model_id = input_data.get('model_id', 'pony-v6')
-            overrides = self.healer.get_overrides(model_id)
-            
-            width = overrides.get('width', input_data.get('width', 1024))
-            height = overrides.get('height', input_data.get('height', 1024))
-            
-            # Check step cap
-            req_steps = steps
-            if 'max_steps' in overrides:
-                req_steps = min(steps, overrides['max_steps'])
-                if req_steps < steps:
-                    print(f"⚠️ HEALER: Capping steps for {model_id} to {req_steps}")
-
-            # Payload for ComfyUI worker (handler_multi.py)
-            # ALL parameters map to ComfyUI nodes:
-            # - prompt → CLIPTextEncode node (positive)
-            # - negative_prompt → CLIPTextEncode node (negative)
-            # - width/height → EmptyLatentImage node
-            # - num_inference_steps → KSampler node (steps)
-            # - guidance_scale → KSampler node (cfg)
-            # - model_id → CheckpointLoaderSimple node (loads checkpoint)
-            # - seed → KSampler node
-            # - sampler_name → KSampler node
-            # - scheduler → KSampler node
-            payload = {
-                "input": {
-                    "prompt": prompt,                                    # → CLIPTextEncode node
-                    "negative_prompt": input_data.get('negative_prompt', 'bad quality, blurry'),  # → CLIPTextEncode node
-                    "width": width,                                      # → EmptyLatentImage node
-                    "height": height,                                    # → EmptyLatentImage node
-                    "num_inference_steps": req_steps,                   # → KSampler node (steps)
-                    "guidance_scale": guidance,                          # → KSampler node (cfg)
-                    "model_id": model_id,                                # → CheckpointLoaderSimple node (loads checkpoint)
-                    "seed": input_data.get('seed', random.randint(1, 999999999)),  # → KSampler node
-                    "sampler_name": input_data.get('sampler_name', 'euler_ancestral'),  # → KSampler node
-                    "scheduler": input_data.get('scheduler', 'normal'),  # → KSampler node
-                    "denoise": input_data.get('denoise', 1.0)            # → KSampler node
-                }
-            }
+            payload = {"input": self._runpod_generation_params(input_data)}
+            if payload["input"]["num_inference_steps"] < steps:
+                print(f"⚠️ HEALER: Capping steps for {payload['input']['model_id']} to {payload['input']['num_inference_steps']}")
         
         # Support image-to-image or refiner if image_url provided
         if input_data.get('image_url'):
              payload["input"]["image_url"] = input_data['image_url']
              
         print(f"DEBUG: Sending payload to RunPod: {payload}")
+
+        webhook_url = self._runpod_webhook_url()
+        if webhook_url:
+            payload["webhook"] = webhook_url
         
         
 
 
         try:
-            endpoint = runpod.Endpoint(eid)
-            
-            # 1. Trigger Run (Async)
-            
-
-            run_request = endpoint.run(payload)
-            
-            
-
-            
-            # Handle response type safely to get ID
             job_id_runpod = None
-            if isinstance(run_request, dict):
-                job_id_runpod = run_request.get('id')
-            else:
-                job_id_runpod = getattr(run_request, 'job_id', getattr(run_request, 'id', None))
-            
-            
 
-                
-            if not job_id_runpod:
-                
-
-                return {'success': False, 'error': f"Failed to get RunPod Job ID. Resp: {run_request}"}
-
-            print(f"⏳ Polling RunPod Job: {job_id_runpod} on endpoint {eid} (Timeout: 300s)")
-
-            # 2. Poll using Raw REST API
-            url = f"https://api.runpod.ai/v2/{eid}/status/{job_id_runpod}"
-            headers = {"Authorization": f"Bearer {self.runpod_api_key}"}
-            
-            total_wait = 0
-            max_wait = 1800  # 30 minute timeout - just need to prove it works
-            
+            # Resume a generation submitted before a restart instead of paying for it twice
+            if task.get('external_job_id'):
+                resume_eid = task.get('external_endpoint_id') or eid
+                if await self._runpod_job_exists(resume_eid, task['external_job_id']):
+                    eid = resume_eid
+                    slot.move(eid)
+                    job_id_runpod = task['external_job_id']
+                    print(f"♻️ Resuming RunPod Job: {job_id_runpod} on endpoint {eid}")
+                else:
+                    print(f"⚠️ RunPod no longer knows job {task['external_job_id']}, resubmitting")
 
-            
-            output_data = {}
-            
-            while True:
-                try:
-                    
+            ticket = None
+            if not job_id_runpod and self._batchable(input_data):
+                # Shares a RunPod job with compatible generations. Batches are
+                # not recorded for resume: the job's output is the whole batch
+                ticket = await self.runpod_batcher.submit(eid, payload["input"], webhook_url)
+                job_id_runpod = ticket.job_id
+                if ticket.index > 0:
+                    # A batch is one job to the router, counted by its first member
+                    slot.release()
+                if ticket.size > 1:
+                    print(f"📦 Task {task.get('id')} is item {ticket.index + 1}/{ticket.size} of RunPod job {job_id_runpod}")
+                else:
+                    await self.record_external_job(task, job_id_runpod, eid)
+            elif not job_id_runpod:
+                # 1. Trigger Run (Async)
+                run_request = await self.runpod.submit(eid, payload)
+                job_id_runpod = run_request.get('id')
 
-                    r = requests.get(url, headers=headers)
-                    r_data = r.json()
-                    
+                if not job_id_runpod:
+                    return {'success': False, 'error': f"Failed to get RunPod Job ID. Resp: {run_request}"}
 
-                except Exception as e:
-                    print(f"Warning: Poll failed: {e}")
-                    await asyncio.sleep(2)
-                    total_wait += 2
-                    continue
-                
-                status = r_data.get('status')
-                
-                if status == 'COMPLETED':
-                    output_data = r_data.get('output', {})
-                    
-
-                    print(f"✅ RunPod Completed! Output Keys: {list(output_data.keys())}")
-                    break
-                elif status in ['FAILED', 'CANCELLED', 'TIMED_OUT']:
-                    
-
-                    raw_err = r_data.get('error', status)
-                    self._log_stuck_job(job_id_runpod, status, total_wait, prompt, eid, raw_err)
-                    if "balance" in str(raw_err).lower() or "credits" in str(raw_err).lower():
-                        return {'success': False, 'error': f"Insufficient balance on RunPod."}
-                    return {'success': False, 'error': f"RunPod failed: {raw_err}"}
-                
-                if total_wait > max_wait:
-                    
+                await self.record_external_job(task, job_id_runpod, eid)
 
-                    self._log_stuck_job(job_id_runpod, 'TIMEOUT', total_wait, prompt, eid, 'Timeout after 300 seconds')
-                    print(f"❌ TIMEOUT: RunPod endpoint {eid} exceeded 300 second limit.")
-                    return {'success': False, 'error': f"Image generation timed out after 300 seconds. The model may be too slow or the endpoint may need optimization. Try a faster model or reduce image resolution."}
-                    
-                await asyncio.sleep(2)
-                total_wait += 2
-                if total_wait % 20 == 0:
-                    ts = datetime.utcnow().isoformat()
-                    worker_status = self._get_worker_count(eid)
-                    
+            max_wait = self.runpod_timeout
+            print(f"⏳ Polling RunPod Job: {job_id_runpod} on endpoint {eid} (Timeout: {max_wait}s)")
 
-                    print(f"⏳ [{ts}] Job {job_id_runpod[:8]}... | Status: {status} | Wait: {total_wait}s | Workers: {worker_status}")
+            # 2. Wait on the shared poller (one health check per endpoint per tick, not one loop per job)
+            started = time.monotonic()
+            r_data = None
 
-            # Decode image
-            
+            def handed_off():
+                # Lost the lease: the next owner resumes the recorded RunPod job, so leave it running
+                return task.get('cancel_reason') == 'lease_lost' and task.get('external_job_id') == job_id_runpod
 
-            img_b64 = output_data.get('image_base64') or output_data.get('audio_base64')
-            
-            # Check for standard RunPod "images" list
-            if not img_b64 and 'images' in output_data:
-                images_list = output_data['images']
-                if isinstance(images_list, list) and len(images_list) > 0:
-                    img_val = images_list[0]
-                    # Check if it's base64 (long str) or url
-                    if len(img_val) > 1000: # Likely base64
-                        img_b64 = img_val
-                    else:
-                        output_data['image_url'] = img_val # Handle as URL below
-            
-            # Handle image_url (Data URI or HTTP URL) if image_base64 is missing
-            if not img_b64 and 'image_url' in output_data:
-                img_url = output_data['image_url']
-                if img_url.startswith('data:'):
-                    # Parse Data URI: data:image/png;base64,....
-                    try:
-                        img_b64 = img_url.split(',')[1]
-                    except IndexError:
-                        print(f"❌ Failed to parse data URI: {img_url[:50]}...")
+            try:
+                if ticket:
+                    r_data = await self.runpod_batcher.wait(ticket, timeout=max_wait, keep_running=handed_off)
                 else:
-                    # Assume HTTP URL and try to download (similar to Fal.ai)
-                    print(f"⬇️ Downloading image from URL: {img_url}")
-                    try:
-                        r_img = requests.get(img_url)
-                        if r_img.status_code == 200:
-                            img_b64 = base64.b64encode(r_img.content).decode('utf-8')
-                        else:
-                            print(f"❌ Failed to download image: {r_img.status_code}")
-                    except Exception as e:
-                        print(f"❌ Error downloading image: {e}")
+                    r_data = await self.runpod_poller.wait(eid, job_id_runpod, timeout=max_wait,
+                                                           webhook=bool(webhook_url))
+            except asyncio.TimeoutError:
+                total_wait = int(time.monotonic() - started)
+                await self._log_stuck_job(job_id_runpod, 'TIMEOUT', total_wait, prompt, eid, f'Timeout after {max_wait} seconds')
+                print(f"❌ TIMEOUT: RunPod endpoint {eid} exceeded {max_wait} second limit.")
+                # Don't leave it holding a GPU (and billing) after we stopped waiting
+                # (a batch job is cancelled by the batcher once no member waits)
+                if ticket is None:
+                    await self._cancel_runpod_job(eid, job_id_runpod, 'timeout')
+                return {'success': False, 'error': f"Image generation timed out after {max_wait} seconds. The model may be too slow or the endpoint may need optimization. Try a faster model or reduce image resolution."}
+            except asyncio.CancelledError:
+                # Task abandoned (user cancel, worker shutdown, lost lease)
+                if ticket is None and not handed_off():
+                    await self._cancel_runpod_job(eid, job_id_runpod, task.get('cancel_reason') or 'abandoned')
+                raise
+            finally:
+                run_seconds = None
+                if r_data and r_data.get('status') == 'COMPLETED':
+                    # RunPod reports executionTime in ms; our own wall clock includes queueing
+                    run_seconds = (r_data.get('executionTime') or 0) / 1000 or (time.monotonic() - started)
+                slot.finish(run_seconds)
 
-            if not img_b64:
-                
-
-                return {'success': False, 'error': f'No image data returned. Data: {output_data}'}
-            
-            
+            total_wait = int(time.monotonic() - started)
+            status = r_data.get('status')
 
-            try:
-                img_bytes = base64.b64decode(img_b64)
-                
+            if status != 'COMPLETED':
+                raw_err = r_data.get('error', status)
+                await self._log_stuck_job(job_id_runpod, status, total_wait, prompt, eid, raw_err)
+                if "balance" in str(raw_err).lower() or "credits" in str(raw_err).lower():
+                    return {'success': False, 'error': f"Insufficient balance on RunPod."}
+                return {'success': False, 'error': f"RunPod failed: {raw_err}"}
 
-            except Exception as e:
-                
+            output_data = r_data.get('output', {})
+            print(f"✅ RunPod Completed! Output Keys: {list(output_data.keys())}")
 
-                return {'success': False, 'error': f'Failed to decode base64 image: {str(e)}'}
-            
+            source = self._runpod_image_source(output_data)
+            if not source:
+                return {'success': False, 'error': f'No image data returned. Data keys: {list(output_data.keys())}'}
+            try:
+                image_output = await self._image_output(task, source, 'runpod',
+                                                        (input_data.get('width', 1024), input_data.get('height', 1024)),
+                                                        cache_key=self._generation_key(input_data) if self.result_cache else None)
+            except ValueError as e:
+                return {'success': False, 'error': f'Invalid image returned: {e}'}
+            except httpx.HTTPError as e:
+                return {'success': False, 'error': f'Failed to download image: {e}'}
 
+            output = {
+                'prompt': prompt,
+                'provider': 'runpod'
+            }
+            if ticket and ticket.size > 1:
+                output['batch_size'] = ticket.size
             return {
                 'success': True,
-                'output': {
-                    'prompt': prompt,
-                    'provider': 'runpod'
-                },
-                'images': [{'url': f"data:image/png;base64,{img_b64}"}],
-                'artifacts': [
-                    {
-                        'type': 'image_png',
-                        'content_type': 'image/png',
-                        'filename': f"generated_{task.get('id')}.png",
-                        'metadata': {'width': 512, 'height': 512, 'provider': 'runpod'}
-                    }
-                ]
+                'output': output,
+                **image_output
             }
         except Exception as e:
 
@@ -709,35 +1003,39 @@ class ZImageWorker(BaseWorker):
 
             # AUTO-DEBUG: Detect dead endpoints and suggest alternatives
             model_id = input_data.get('model_id', 'unknown')
-            if "404" in error_msg and "runpod.ai" in error_msg:
-                error_msg = f"Auto-debug: RunPod endpoint for {model_id} is dead (404). Switching to OpenRouter Flux 2 Pro..."
+            if ("404" in error_msg and "runpod.ai" in error_msg) or (isinstance(e, RunPodError) and e.status == 404):
+                error_msg = f"Auto-debug: RunPod endpoint for {model_id} is dead (404)."
                 print(f"🚨 DEAD ENDPOINT DETECTED: {eid} for model {model_id}")
-                # Could automatically retry with OpenRouter here
 
             elif "balance" in error_msg.lower() or "credits" in error_msg.lower():
-                error_msg = "Auto-debug: Insufficient RunPod balance. Consider switching to OpenRouter."
+                error_msg = "Auto-debug: Insufficient RunPod balance."
 
             elif "timeout" in error_msg.lower():
-                error_msg = "Auto-debug: Generation timed out. Try OpenRouter for faster results."
+                error_msg = "Auto-debug: Generation timed out."
 
             # REPORT FAILURE TO HEALER
             self.healer.report_failure(model_id, str(e))
             return {'success': False, 'error': error_msg}
+
+    def _batchable(self, input_data: dict) -> bool:
+        """
+        Whether a RunPod generation may share a job with compatible ones.
+        Seeded requests always run alone: with ancestral/SDE samplers the
+        noise added during sampling is drawn for the whole batch, so a
+        batched seed would not reproduce its image (or the cached one).
+        """
+        return (self.runpod_batcher.enabled and input_data.get('seed') is None
+                and not (input_data.get('workflow') or input_data.get('use_comfy_workflow')
+                         or input_data.get('image_url')))
+
     async def check_balance(self, task: dict) -> dict:
         """Check balance for providers."""
         try:
-            url = "https://api.runpod.io/graphql"
-            query = "query { myself { clientBalance } }"
-            headers = {
-                "Authorization": f"Bearer {self.runpod_api_key}",
-                "Content-Type": "application/json"
-            }
-            r = requests.post(url, json={"query": query}, headers=headers)
-            data = r.json()
-            balance = data.get('data', {}).get('myself', {}).get('clientBalance', 'N/A')
+            data = await self.runpod.graphql("query { myself { clientBalance } }")
+            balance = (data.get('myself') or {}).get('clientBalance', 'N/A')
             
             # Additional: Check Worker Status for "Cold Start" visibility
-            worker_status = self._get_worker_count(self.endpoint_id)
+            worker_status = await self._get_worker_count(self.endpoint_id)
 
             return {
                 'success': True,
@@ -794,17 +1092,109 @@ class ZImageWorker(BaseWorker):
             print(f"❌ Transcription error: {str(e)}")
             return {'success': False, 'error': f'Transcription error: {str(e)}'}
 
-    def _get_worker_count(self, eid):
+    def _runpod_webhook_url(self):
+        """Webhook URL RunPod should POST the finished job to, if this worker is reachable"""
+        if not self.public_url:
+            return None
+        url = f"{self.public_url}/webhooks/runpod/{self.webhook_secret}"
+        return f"{url}?instance={self.machine_id}" if self.machine_id else url
+
+    def handle_runpod_webhook(self, secret: str, payload: dict):
+        """Resolve a waiting generation from a RunPod webhook. Returns None if the secret is wrong."""
+        if not hmac.compare_digest(secret, self.webhook_secret):
+            return None
+        job_id = payload.get('id')
+        if not job_id:
+            return False
+        print(f"📬 RunPod webhook: {job_id} -> {payload.get('status')}")
+        return self.runpod_poller.resolve(job_id, payload)
+
+    async def _cancel_runpod_job(self, endpoint_id: str, job_id: str, reason: str):
+        """
+        Best-effort cancel of a RunPod job we are no longer waiting for.
+        """
+        print(f"🛑 Cancelling RunPod job {job_id} on {endpoint_id} ({reason})")
+        if not await self.runpod_poller.cancel(endpoint_id, job_id):
+            print(f"⚠️ RunPod did not confirm cancellation of {job_id}")
+
+    @staticmethod
+    def _runpod_image_source(output_data: dict):
+        """The image in a RunPod output: image_base64, else the first of `images`, else image_url."""
+        value = output_data.get('image_base64')
+        if not value:
+            images = output_data.get('images')
+            value = images[0] if isinstance(images, list) and images else output_data.get('image_url')
+        return value
+
+    async def _image_output(self, task: dict, source, provider: str, size: tuple, cache_key: str = None) -> dict:
+        """
+        `images`/`artifacts` result entries for an image given as an
+        ImageResult, base64, a data: URI or a URL. With a cache_key the image
+        is also written to the result cache, along with where it was uploaded.
+
+        With the artifact store enabled the image is uploaded as a file (URLs
+        are streamed straight through) and referenced by key and URL;
+        otherwise, or if the upload fails, it is returned inline as a data: URI.
+        Raises ValueError if the payload is not an image.
+        """
+        stem = f"generated_{task.get('id')}"
+        if isinstance(source, ImageResult):
+            image = source
+        elif source.startswith(('http://', 'https://')):
+            # Stream straight into the store unless the bytes are wanted for the cache
+            if self.artifacts and not cache_key:
+                try:
+                    stored = await self.artifacts.put_url(task.get('id'), stem, source)
+                    artifact = ImageResult(stored.pop('content_type'), stored.pop('extension'),
+                                           stored.pop('size')).artifact(stem, provider, size)
+                    artifact.update(stored)
+                    return {'images': [{'url': stored['url']}], 'artifacts': [artifact]}
+                except ValueError:
+                    raise
+                except Exception as e:
+                    print(f"⚠️ Could not store image for task {task.get('id')}, returning it inline: {e}")
+            async with httpx.AsyncClient(timeout=60) as http:
+                response = await http.get(source)
+            response.raise_for_status()
+            image = ImageResult.from_bytes(response.content)
+        elif source.startswith('data:'):
+            image = ImageResult.from_data_uri(source)
+        else:
+            image = ImageResult.from_base64(source)
+
+        if cache_key:
+            try:
+                await asyncio.to_thread(self.result_cache.put, cache_key, image.iter_bytes())
+            except Exception as e:
+                print(f"⚠️ Could not cache result for task {task.get('id')}: {e}")
+
+        artifact = image.artifact(stem, provider, size)
+        if self.artifacts:
+            try:
+                artifact.update(await self.artifacts.put_image(task.get('id'), artifact['filename'], image))
+                if cache_key:
+                    await self._remember_artifact(task, cache_key, artifact)
+                return {'images': [{'url': artifact['url']}], 'artifacts': [artifact]}
+            except Exception as e:
+                print(f"⚠️ Could not store image for task {task.get('id')}, returning it inline: {e}")
+        return {'images': [{'url': image.data_uri()}], 'artifacts': [artifact]}
+
+    async def _runpod_job_exists(self, eid, job_id):
+        """Check whether RunPod still has a job we submitted earlier"""
+        try:
+            return bool((await self.runpod.status(eid, job_id)).get('status'))
+        except RunPodError as e:
+            if e.status != 404:
+                print(f"Warning: Could not look up RunPod job {job_id}: {e}")
+            return False
+        except Exception as e:
+            print(f"Warning: Could not look up RunPod job {job_id}: {e}")
+            return False
+
+    async def _get_worker_count(self, eid):
         """Helper to get worker status for logging"""
         try:
-            url = f"https://api.runpod.ai/v2/{eid}/health"
-            headers = {"Authorization": f"Bearer {self.runpod_api_key}"}
-            r = requests.get(url, headers=headers, timeout=2)
-            if r.status_code == 200:
-                h = r.json()
-                w = h.get('workers', {})
-                return f"Init: {w.get('initializing', 0)} | Ready: {w.get('ready', 0)} | Run: {w.get('running', 0)}"
-            return "Unknown"
+            return format_workers(await self.runpod_health.get(eid))
         except:
             return "Unknown"
 
@@ -877,12 +1267,8 @@ class ZImageWorker(BaseWorker):
             if not self.endpoint_id or not self.runpod_api_key:
                 return {"error": "RunPod not configured"}
                 
-            url = f"https://api.runpod.ai/v2/{self.endpoint_id}/health"
-            headers = {"Authorization": f"Bearer {self.runpod_api_key}"}
-            
-            # Fetch Health (Worker Counts)
-            r = requests.get(url, headers=headers, timeout=5)
-            health_data = r.json() if r.status_code == 200 else {}
+            # Fetch Health (Worker Counts), shared with the job poller
+            health_data = await self.runpod_health.get(self.endpoint_id) or {}
             
             # Extract worker stats
             workers = health_data.get('workers', {})
@@ -913,15 +1299,20 @@ class ZImageWorker(BaseWorker):
                 "cost_estimate": {
                     "hourly_burn_usd": round(hourly_burn, 3),
                     "currency": "USD"
-                }
+                },
+                "providers": {name: breaker.snapshot() for name, breaker in self.breakers.items()},
+                "hedging": self.hedge_budget.snapshot(),
+                "result_cache": self.result_cache.snapshot() if self.result_cache else None,
+                "batching": self.runpod_batcher.snapshot()
             }
         except Exception as e:
             print(f"Metrics error: {e}")
             return {"success": False, "error": str(e)}
 
-    def _log_stuck_job(self, job_id, status, wait_time, prompt, endpoint_id, error=None):
+    async def _log_stuck_job(self, job_id, status, wait_time, prompt, endpoint_id, error=None):
         """Comprehensive logging for stuck or failed jobs."""
         ts = datetime.utcnow().isoformat()
+        workers = await self._get_worker_count(endpoint_id)
         print(f"""
 ================================================================================
 🚨 STUCK JOB LOG @ {ts}
@@ -932,7 +1323,7 @@ Status:       {status}
 Wait Time:    {wait_time}s
 Error:        {error or 'N/A'}
 Prompt:       {prompt[:100]}...
-Workers:      {self._get_worker_count(endpoint_id)}
+Workers:      {workers}
 ================================================================================
 """)
 